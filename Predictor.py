@@ -1,32 +1,17 @@
 import streamlit as st
-import joblib as jb
-import pandas as pd
-import numpy as np
-import sklearn
+import inference
+from instrumentation import begin_run, diagnostics_panel
+from feature_schema import ST_defaults, MOTHER_OCCU_MAP, CA_defaults, labels, SWEEP_FEATURES, STUDENT_SWEEP_RANGES
 
-#Loading our trained models
-Clf_model = jb.load("student_rf_model.pkl")
-Reg_model =jb.load("cancer_rf_model.pkl")
+# Opt-in timing panel (APP_DIAGNOSTICS=1 or ?diagnostics=1)
+begin_run("Predictor")
 
-#================================================================Students Data=====================================================================================
-
-#Feature names Expected by model
-ST_feature_names  = ['Marital status', 'Application mode', 'Application order', 'Course', 'Daytime/evening attendance\t', 'Previous qualification', 'Previous qualification (grade)', 'Nacionality', "Mother's qualification", "Father's qualification", "Mother's occupation", "Father's occupation", 'Admission grade', 'Displaced', 'Educational special needs', 'Debtor', 'Tuition fees up to date', 'Gender', 'Scholarship holder', 'Age at enrollment', 'International', 'Curricular units 1st sem (credited)', 'Curricular units 1st sem (enrolled)', 'Curricular units 1st sem (evaluations)', 'Curricular units 1st sem (approved)', 'Curricular units 1st sem (grade)', 'Curricular units 1st sem (without evaluations)', 'Curricular units 2nd sem (credited)', 'Curricular units 2nd sem (enrolled)', 'Curricular units 2nd sem (evaluations)', 'Curricular units 2nd sem (approved)', 'Curricular units 2nd sem (grade)', 'Curricular units 2nd sem (without evaluations)', 'Unemployment rate', 'Inflation rate', 'GDP']
+#Trained models are loaded lazily (once per process) by the model registry; the model
+#modules themselves are imported by inference.py on the first prediction
 
-# Set default values for all features
-ST_defaults = {
-    'Marital status': 1.0, 'Application mode': 17.0, 'Application order': 1.0, 'Course': 9238.0, 'Daytime/evening attendance\t': 1.0, 'Previous qualification': 1.0, 'Previous qualification (grade)': 133.1, 'Nacionality': 1.0, "Mother's qualification": 19.0, "Father's qualification": 19.0, "Mother's occupation": 5.0, "Father's occupation": 7.0, 'Admission grade': 126.0, 'Displaced': 1.0, 'Educational special needs': 0.0, 'Debtor': 0.0, 'Tuition fees up to date': 1.0, 'Gender': 0.0, 'Scholarship holder': 0.0, 'Age at enrollment': 20.0, 'International': 0.0, 'Curricular units 1st sem (credited)': 0.0, 'Curricular units 1st sem (enrolled)': 6.0, 'Curricular units 1st sem (evaluations)': 8.0, 'Curricular units 1st sem (approved)': 5.0, 'Curricular units 1st sem (grade)': 12.32, 'Curricular units 1st sem (without evaluations)': 0.0, 'Curricular units 2nd sem (credited)': 0.0, 'Curricular units 2nd sem (enrolled)': 6.0, 'Curricular units 2nd sem (evaluations)': 8.0, 'Curricular units 2nd sem (approved)': 5.0, 'Curricular units 2nd sem (grade)': 12.2, 'Curricular units 2nd sem (without evaluations)': 0.0, 'Unemployment rate': 11.1, 'Inflation rate': 1.4, 'GDP': 0.32
-}
+#================================================================Students Data=====================================================================================
 
-MOTHER_OCCU_MAP = {
-    "Unemployed": 0.0,
-    "Student": 1.0,
-    "Professional": 2.0,
-    "Administrative staff": 3.0,
-    "Service worker": 4.0,
-    "Manual laborer": 5.0,
-    "Other": 6.0
-}
+#Feature names, defaults and text option maps live in feature_schema.py
 
 
 # Student Helping Functions
@@ -101,50 +86,12 @@ def get_std_inputs():
 
     return inputs
 
-def prepare_std_input(user_inputs, defaults):
-    # Start with all defaults
-    full_input = defaults.copy()
-    
-    # Override with user inputs
-    for key, val in user_inputs.items():
-        if key in full_input:
-            # Handle Yes/No
-            if val == "Yes":
-                full_input[key] = 1.0
-            elif val == "No":
-                full_input[key] = 0.0
-            # Handle Marital Status
-            elif key == "Marital status":
-                marital_map = {
-                    "Single": 1.0, "Married": 2.0, "Widower": 3.0,
-                    "Divorced": 4.0, "Legally Separated": 5.0, "Other": 6.0
-                }
-                full_input[key] = marital_map[val]
-            # Handle Gender
-            elif key == "Gender":
-                full_input[key] = 0.0 if val == "Female" else 1.0
-            # Handle Attendance
-            elif key == "Daytime/evening attendance\t":
-                full_input[key] = 1.0 if val == "Daytime" else 0.0
-            elif key == "Mother's occupation":
-                full_input[key] = MOTHER_OCCU_MAP[val]
-            # Handle numeric inputs
-            else:
-                try:
-                    full_input[key] = float(val)
-                except (ValueError, TypeError):
-                    pass  # Keep default if conversion fails
-    
-    # Convert to DataFrame (one row, all 36 features)
-    return pd.DataFrame([full_input])
-
+#prepare_std_input now comes from feature_encoder.py (compiled STUDENT_ENCODER)
 
 
 #================================================================Cancer Data=====================================================================================
 
-CA_feature_names = ['avganncount', 'avgdeathsperyear', 'incidencerate', 'medincome', 'popest2015', 'povertypercent', 'studypercap', 'medianage', 'medianagemale', 'medianagefemale', 'percentmarried', 'pctnohs18_24', 'pcths18_24', 'pctsomecol18_24', 'pctbachdeg18_24', 'pcths25_over', 'pctbachdeg25_over', 'pctemployed16_over', 'pctunemployed16_over', 'pctprivatecoverage', 'pctprivatecoveragealone', 'pctempprivcoverage', 'pctpubliccoverage', 'pctpubliccoveragealone', 'pctwhite', 'pctblack', 'pctasian', 'pctotherrace', 'pctmarriedhouseholds', 'birthrate']
-
-CA_defaults = {'avganncount': 169.0, 'avgdeathsperyear': 61.0, 'incidencerate': 453.5494221, 'medincome': 45269.0, 'popest2015': 25788.0, 'povertypercent': 15.8, 'studypercap': 0.0, 'medianage': 41.0, 'medianagemale': 39.6, 'medianagefemale': 42.4, 'percentmarried': 52.5, 'pctnohs18_24': 17.2, 'pcths18_24': 34.8, 'pctsomecol18_24': 40.4, 'pctbachdeg18_24': 5.4, 'pcths25_over': 35.4, 'pctbachdeg25_over': 12.4, 'pctemployed16_over': 54.5, 'pctunemployed16_over': 7.6, 'pctprivatecoverage': 65.1, 'pctprivatecoveragealone': 48.7, 'pctempprivcoverage': 41.1, 'pctpubliccoverage': 36.4, 'pctpubliccoveragealone': 18.8, 'pctwhite': 90.12443712, 'pctblack': 2.231905108, 'pctasian': 0.543811087, 'pctotherrace': 0.844356882, 'pctmarriedhouseholds': 51.70068027, 'birthrate': 5.356186395}
+#CA_feature_names / CA_defaults live in feature_schema.py
 
 # Cancer Helping Functions
 
@@ -280,18 +227,7 @@ def get_can_inputs():
 
     return inputs
 
-def prepare_can_inputs(user_inputs, defaults):
-
-    # start with defaults
-    full_inputs = defaults.copy()
-    for key, val in user_inputs.items():
-     if key in full_inputs:
-        try:
-         full_inputs[key] = float(val)
-        except (ValueError, TypeError):
-          pass
-
-     return pd.DataFrame([full_inputs])
+#prepare_can_inputs now comes from feature_encoder.py (compiled CANCER_ENCODER)
 
 
 #=================================================================================================================================================================================================================================
@@ -305,39 +241,78 @@ st.title("🎓 Student Academic Performance  &  🏫 Public Health Predictors ")
 st.markdown("Powered by Random Forest • Accuracy: 76% • R²: 0.55")
 
 # separated tabs
-tab1, tab2 = st.tabs(["🎓 Student Success ", "🏥 Cancer Mortality "])
+tab1, tab2, tab3 = st.tabs(["🎓 Student Success ", "🏥 Cancer Mortality ", "📂 Batch Scoring "])
 
 # First tab: Students outcome prediction
 with tab1:
     user_inputs = get_std_inputs()
     if st.button("Predict Academic Outcome", key="student_btn"): #Critical: Without key, buttons in different tabs interfere
-        input_df1 = prepare_std_input(user_inputs, ST_defaults)
-
         # make prediction
-        pred = Clf_model.predict(input_df1)[0]
-        proba = Clf_model.predict_proba(input_df1)[0]     
+        pred, proba = inference.student_outcome(user_inputs, ST_defaults)
 
         # Get results
-        labels = ["Dropout", "Enrolled", "Graduate"]
         st.success(f"**Prediction**: {labels[pred]}")
         st.write("Confidence:")
         for i, p in enumerate(proba):
           st.write(f"- {labels[i]}: {p:.1%}")
 
+        # Per-feature contributions to the predicted class (tree path attribution)
+        _, base, contrib = inference.student_explanation(user_inputs, ST_defaults)
+        st.markdown(f"**Why {labels[pred]}?** Average student: {base:.1%}; top feature contributions:")
+        st.bar_chart(contrib, x="feature", y="contribution", horizontal=True, sort=False)
+
+    # What-if: sweep features over their range with the other inputs held fixed
+    with st.expander("📈 What-if Sweep"):
+        sweep_feats = st.multiselect("Features to sweep", SWEEP_FEATURES,
+                                     default=["Curricular units 2nd sem (approved)"], format_func=str.strip,
+                                     key="sweep_feats")
+        if st.button("Run Sweep", key="sweep_btn") and sweep_feats:
+            curves = inference.student_sweep(user_inputs, sweep_feats, ST_defaults)
+            for feature, curve in curves.items():
+                st.markdown(f"**{feature.strip()}**")
+                if feature in STUDENT_SWEEP_RANGES:
+                    st.line_chart(curve)
+                else:
+                    st.bar_chart(curve, stack=False)
+
 
 # Second Tab: Cancer mortality prediciton
 with tab2:
     user_input = get_can_inputs()
     if st.button("Predict Death Rate", key="cancer_btn"):
-        input_df2 = prepare_can_inputs(user_input, CA_defaults)
-
         # Make prediction
-        pred = int(Reg_model.predict(input_df2)[0]) # you cannot have a half person
+        pred = int(inference.cancer_death_rate(user_input, CA_defaults)) # you cannot have a half person
 
         # get results
         st.success(f"**Predicted Death Rate**: {pred} per 100,000 people")
         st.info("Model Performance: R² = 0.55 | Mean Error = ±14.1 deaths/100k")
 
+        # Per-feature contributions to the death rate (tree path attribution)
+        base, contrib = inference.cancer_explanation(user_input, CA_defaults)
+        st.markdown(f"**Why {pred}?** Average county: {base:.1f}; top feature contributions (deaths per 100k):")
+        st.bar_chart(contrib, x="feature", y="contribution", horizontal=True, sort=False)
+
+
+# Third Tab: score a whole student cohort file
+with tab3:
+    st.subheader("📂 Score a Student Cohort")
+    st.markdown("Upload a CSV or Parquet file with the student features (codes or the text options above). "
+                "Missing columns use the default values.")
+    uploaded = st.file_uploader("Student file", type=["csv", "parquet"], key="batch_file")
+    id_column = st.text_input("ID column to keep (optional)", "", key="batch_id")
+    if uploaded is not None and st.button("Score Cohort", key="batch_btn"):
+        # Score chunk by chunk, then offer the file for download
+        rows, result_bytes, preview = inference.score_student_file(uploaded, id_column)
+
+        st.success(f"**Scored**: {rows} students")
+        st.dataframe(preview)
+        st.download_button("Download predictions (CSV)", result_bytes, "student_predictions.csv", "text/csv", key="batch_download")
+
+with st.expander("⚙️ Model load metrics"):
+    st.json(inference.metrics())
+
+diagnostics_panel()
+
 
 
 
@@ -0,0 +1,132 @@
+"""Early-exit ("anytime") voting for the student classifier.
+
+Usage:
+    python student_batch.py cohort.csv predictions.csv --anytime 0.99
+    python -m benchmarks.bench_anytime_voting [--dataset data.csv]
+
+Most students' Dropout / Enrolled / Graduate vote is settled long before the
+last tree. AnytimeVoter runs the pickled forest's own trees (each tree's
+Cython predict, without the forest's per-call validation and thread pool)
+chunk_trees trees at a time and drops a row once its predicted class can no
+longer change:
+    exact      the top class leads the runner-up by more than the trees still
+               to come could take away (each tree moves the lead by at most 1)
+    bound      with confidence < 1, the trees are visited in a fixed random
+               order, so the first k are a sample without replacement of all
+               T. Each tree's top-minus-runner-up difference lies in [-1, 1],
+               and by the Hoeffding-Serfling inequality the mean over all T
+               trees stays above mean_k - eps with probability >= 1 - delta,
+                   eps = 2 * sqrt((1 - (k - 1) / T) * ln(1 / delta) / (2 k))
+               The rule is checked after every chunk but the last, so
+               delta = (1 - confidence) / (n_checks * (n_classes - 1)): a union
+               bound over the checkpoints and over the classes that could
+               overtake the leader, so the confidence holds for the whole
+               procedure, not just one look.
+confidence=1.0 uses the exact rule only and always agrees with the full
+forest (up to float rounding on exact ties). Rows that stop early get the
+average probabilities of the trees they used; vote() also returns that count.
+"""
+import math
+
+import numpy as np
+import pandas as pd
+
+from model_registry import registry
+
+DEFAULT_CONFIDENCE = 0.99
+DEFAULT_CHUNK_TREES = 10
+# Seed of the tree order (None: the forest's order)
+TREE_ORDER_SEED = 42
+# Rows voted on at once (bounds the per-chunk arrays)
+DEFAULT_CHUNK_ROWS = 65536
+
+
+class AnytimeVoter:
+    """predict / predict_proba of a fitted RandomForestClassifier that stops each row as soon as its vote is settled."""
+
+    def __init__(self, forest, confidence=DEFAULT_CONFIDENCE, chunk_trees=DEFAULT_CHUNK_TREES,
+                 seed=TREE_ORDER_SEED):
+        if not hasattr(forest, "classes_") or getattr(forest, "n_outputs_", 1) != 1:
+            raise ValueError("Anytime voting needs a single-output classifier")
+        if not 0.0 < confidence <= 1.0:
+            raise ValueError(f"confidence must be in (0, 1], got {confidence}")
+        self.forest = forest
+        self.confidence = confidence
+        self.chunk_trees = max(1, int(chunk_trees))
+        n_trees = len(forest.estimators_)
+        order = np.arange(n_trees) if seed is None else np.random.default_rng(seed).permutation(n_trees)
+        self.trees = [forest.estimators_[i].tree_ for i in order]
+        self.classes_ = forest.classes_
+        self.feature_names_in_ = getattr(forest, "feature_names_in_", None)
+        self.n_features_in_ = forest.n_features_in_
+
+    @property
+    def n_trees(self):
+        return len(self.trees)
+
+    @property
+    def n_checks(self):
+        """Checkpoints at which the bound is tested (after every chunk but the last)."""
+        return max(1, math.ceil(self.n_trees / self.chunk_trees) - 1)
+
+    def margin(self, k):
+        """Mean lead over the first k trees that settles the vote at this confidence (inf if exact only)."""
+        if self.confidence >= 1.0 or k >= self.n_trees:
+            return math.inf
+        delta = (1.0 - self.confidence) / (self.n_checks * max(1, len(self.classes_) - 1))
+        return 2.0 * math.sqrt((1.0 - (k - 1) / self.n_trees) * math.log(1.0 / delta) / (2.0 * k))
+
+    def _as_array(self, X):
+        # Same input handling as the forest: training column order, float32 like sklearn's trees
+        if isinstance(X, pd.DataFrame) and self.feature_names_in_ is not None:
+            X = X[list(self.feature_names_in_)]
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but the forest expects {self.n_features_in_}")
+        return X
+
+    def _vote(self, X):
+        n_trees, n_classes = self.n_trees, len(self.classes_)
+        total = np.zeros((len(X), n_classes), dtype=np.float64)
+        used = np.zeros(len(X), dtype=np.intp)
+        active = np.arange(len(X))
+        rows = X
+        for start in range(0, n_trees, self.chunk_trees):
+            chunk = np.zeros((len(active), n_classes), dtype=np.float64)
+            for tree in self.trees[start:start + self.chunk_trees]:
+                chunk += tree.predict(rows)[:, :n_classes]
+            total[active] += chunk
+            k = min(start + self.chunk_trees, n_trees)
+            used[active] = k
+            if k == n_trees:
+                break
+            top_two = np.partition(total[active], -2, axis=1)[:, -2:]
+            lead = top_two[:, 1] - top_two[:, 0]
+            settled = (lead > n_trees - k) | (lead > k * self.margin(k))
+            if settled.any():
+                active = active[~settled]
+                if not active.size:
+                    break
+                rows = X[active]
+        return total / used[:, np.newaxis], used
+
+    def vote(self, X):
+        """(class probabilities over the trees used, number of trees used) per row."""
+        X = self._as_array(X)
+        chunks = [self._vote(X[i:i + DEFAULT_CHUNK_ROWS]) for i in range(0, len(X), DEFAULT_CHUNK_ROWS)]
+        if not chunks:
+            return np.empty((0, len(self.classes_))), np.empty(0, dtype=np.intp)
+        return np.vstack([proba for proba, _ in chunks]), np.concatenate([used for _, used in chunks])
+
+    def predict_proba(self, X):
+        return self.vote(X)[0]
+
+    def predict(self, X):
+        return self.classes_.take(self.predict_proba(X).argmax(axis=1), axis=0)
+
+
+def anytime_model(confidence=DEFAULT_CONFIDENCE, chunk_trees=DEFAULT_CHUNK_TREES):
+    """AnytimeVoter over the registry's student classifier."""
+    return AnytimeVoter(registry.get("student_model"), confidence, chunk_trees)
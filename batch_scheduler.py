@@ -0,0 +1,163 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from fleet_clustering import fleet_predictor
+from instrumentation import instruments
+from prediction_cache import cached_predict, cached_predict_proba
+
+# Latency / throughput knobs: a batch runs when it holds BATCH_MAX_ROWS rows
+# or when its oldest row has waited BATCH_MAX_WAIT_MS
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", "5"))
+BATCH_MAX_ROWS = int(os.environ.get("BATCH_MAX_ROWS", "256"))
+
+
+class MicroBatcher:
+    """Queues rows from concurrent callers and scores them with one model call.
+
+    `submit` returns a concurrent.futures.Future holding the caller's slice of
+    the batched output; `predict` waits for it. One daemon thread per batcher
+    drains the queue, so Streamlit sessions (threads) and the HTTP service
+    (asyncio.wrap_future) share the same batches.
+    """
+
+    def __init__(self, predict_fn, max_batch_rows=BATCH_MAX_ROWS, max_wait_ms=BATCH_MAX_WAIT_MS, name=None):
+        self.predict_fn = predict_fn
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+
+        self.batches = self.rows = self.requests = self.errors = 0
+        self.max_batch_rows_seen = 0
+        self.max_queue_depth = 0
+        self.total_wait = 0.0
+
+    def submit(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        future = Future()
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"batcher-{self.name}", daemon=True)
+                self._thread.start()
+            # Remember whether the caller is being instrumented, so its batch is too
+            self._queue.append((X, future, time.perf_counter(), instruments.active()))
+            self.max_queue_depth = max(self.max_queue_depth, self._queued_rows())
+            self._cond.notify()
+        return future
+
+    def predict(self, X):
+        return self.submit(X).result()
+
+    def _queued_rows(self):
+        return sum(len(x) for x, _, _, _ in self._queue)
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            deadline = self._queue[0][2] + self.max_wait
+            while self._queued_rows() < self.max_batch_rows:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                self._cond.wait(timeout)
+
+            # Whole requests only; a request bigger than max_batch_rows runs alone
+            batch, n_rows = [], 0
+            while self._queue and (not batch or n_rows + len(self._queue[0][0]) <= self.max_batch_rows):
+                item = self._queue.popleft()
+                batch.append(item)
+                n_rows += len(item[0])
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            instruments.enable_for_thread(any(traced for _, _, _, traced in batch))
+            self._score_batch(batch, time.perf_counter())
+
+    def _score_batch(self, batch, started):
+        try:
+            # Inside the try: rows of the wrong width fail their batch, not the thread
+            X = np.vstack([x for x, _, _, _ in batch])
+            with instruments.span("batch", batcher=self.name):
+                out = self.predict_fn(X)
+        except Exception as e:
+            if len(batch) > 1:
+                # One bad request must not fail the others: score each request on its own
+                for item in batch:
+                    self._score_batch([item], started)
+                return
+            self.errors += 1
+            batch[0][1].set_exception(e)
+            return
+
+        self.batches += 1
+        self.requests += len(batch)
+        self.rows += len(X)
+        self.max_batch_rows_seen = max(self.max_batch_rows_seen, len(X))
+        self.total_wait += sum(started - queued_at for _, _, queued_at, _ in batch)
+        start = 0
+        for x, future, _, _ in batch:
+            future.set_result(out[start:start + len(x)])
+            start += len(x)
+
+    def stats(self):
+        with self._cond:
+            queue_depth = self._queued_rows()
+            queued_requests = len(self._queue)
+        return {
+            "max_batch_rows": self.max_batch_rows, "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches, "requests": self.requests, "rows": self.rows, "errors": self.errors,
+            "mean_batch_rows": self.rows / self.batches if self.batches else 0.0,
+            "max_batch_rows_seen": self.max_batch_rows_seen,
+            "mean_wait_ms": self.total_wait / self.requests * 1000 if self.requests else 0.0,
+            "queue_depth_rows": queue_depth, "queued_requests": queued_requests,
+            "max_queue_depth_rows": self.max_queue_depth,
+        }
+
+
+# ==============================
+# SHARED SCHEDULERS
+# ==============================
+_batchers = {}
+_batchers_lock = threading.Lock()
+
+
+def get_batcher(key, predict_fn):
+    """Process-wide batcher for `key`, created on first use."""
+    with _batchers_lock:
+        if key not in _batchers:
+            _batchers[key] = MicroBatcher(predict_fn, name=key)
+        return _batchers[key]
+
+
+def batched_predict_proba(name, X):
+    """cached_predict_proba, batched with the other sessions' concurrent requests."""
+    with instruments.span("predict", model=name):
+        return get_batcher(f"{name}.predict_proba", lambda rows: cached_predict_proba(name, rows)).predict(X)
+
+
+def batched_predict(name, X):
+    """cached_predict, batched with the other sessions' concurrent requests."""
+    with instruments.span("predict", model=name):
+        return get_batcher(f"{name}.predict", lambda rows: cached_predict(name, rows)).predict(X)
+
+
+def batched_cluster(X):
+    """Fleet cluster ids for raw one-hot rows, batched across callers."""
+    with instruments.span("predict", model="fleet"):
+        return get_batcher("fleet.predict", lambda rows: fleet_predictor().predict(rows)).predict(X)
+
+
+def scheduler_stats():
+    return {key: batcher.stats() for key, batcher in _batchers.items()}
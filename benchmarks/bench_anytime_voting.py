@@ -0,0 +1,76 @@
+"""Early-exit voting against the full student forest's sklearn predict_proba.
+
+For each confidence level prints the mean and 90th-percentile number of
+trees evaluated per row, how often the class matches the full forest's, and
+the time against sklearn's predict_proba, both on the whole cohort and on
+single rows (the apps' case). The cohort is the student dataset when given,
+else synthetic rows around the saved defaults.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_anytime_voting [--dataset data.csv] [--confidence 0.9 0.99 0.999 1.0]
+"""
+import argparse
+
+import numpy as np
+
+from anytime_voting import AnytimeVoter, DEFAULT_CHUNK_TREES
+from feature_encoder import STUDENT_ENCODER
+from model_registry import registry
+from benchmarks.common import sample_student_records, best_time
+
+# Single rows timed per confidence level
+SINGLE_ROWS = 50
+
+
+def cohort(dataset, rows):
+    if dataset:
+        from training_pipeline import cached_matrix
+
+        return STUDENT_ENCODER.frame(cached_matrix("student", dataset)[0])
+    return STUDENT_ENCODER.frame(sample_student_records(rows, seed=0))
+
+
+def _single_rows(predict, X):
+    # Mean time of one-row calls over the first SINGLE_ROWS rows
+    rows = [X.iloc[[i]] for i in range(min(SINGLE_ROWS, len(X)))]
+    return best_time(lambda: [predict(row) for row in rows]) / len(rows)
+
+
+def run(X, confidences, chunk_trees):
+    forest = registry.get("student_model")
+    expected = forest.predict(X)
+    batch_time = best_time(lambda: forest.predict_proba(X))
+    row_time = _single_rows(forest.predict_proba, X)
+    print(f"{len(X)} rows, {len(forest.estimators_)} trees: sklearn predict_proba {batch_time * 1e3:.1f} ms "
+          f"per batch, {row_time * 1e3:.2f} ms per single row")
+
+    print(f"{'confidence':>10} {'mean trees':>11} {'p90 trees':>10} {'agreement':>10} {'batch ms':>9} "
+          f"{'speedup':>8} {'row ms':>7} {'speedup':>8}")
+    # "all trees": the same tree loop without early exit, so the gain from skipping the
+    # forest's per-call overhead shows separately from the gain from stopping early
+    for confidence in ["all trees"] + list(confidences):
+        if confidence == "all trees":
+            voter = AnytimeVoter(forest, 1.0, len(forest.estimators_))
+        else:
+            voter = AnytimeVoter(forest, confidence, chunk_trees)
+        proba, used = voter.vote(X)
+        agreement = np.mean(voter.classes_[proba.argmax(axis=1)] == expected)
+        seconds = best_time(lambda: voter.vote(X))
+        row_seconds = _single_rows(voter.predict_proba, X)
+        print(f"{confidence:>10} {used.mean():>11.1f} {np.percentile(used, 90):>10.0f} {agreement:>10.4f} "
+              f"{seconds * 1e3:>9.1f} {batch_time / seconds:>7.1f}x {row_seconds * 1e3:>7.2f} "
+              f"{row_time / row_seconds:>7.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dataset", help="student dataset CSV to use as the cohort")
+    parser.add_argument("--rows", type=int, default=10000, help="synthetic rows when no dataset is given")
+    parser.add_argument("--confidence", type=float, nargs="+", default=[0.9, 0.99, 0.999, 1.0])
+    parser.add_argument("--chunk-trees", type=int, default=DEFAULT_CHUNK_TREES)
+    args = parser.parse_args(argv)
+    run(cohort(args.dataset, args.rows), args.confidence, args.chunk_trees)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compact quantized forests against the pickles and the compiled node tables.
+
+Checks compact_format.check_parity on synthetic rows around the saved
+defaults (every split the same, prediction error within the quantization
+bound), then prints the artifact size and load time of each format and the
+per-call predict latency at a few batch sizes.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_compact_format [--rows 1 100 10000] [--value-bits 16]
+"""
+import argparse
+import os
+import tempfile
+
+import joblib as jb
+
+from compact_format import DEFAULT_VALUE_BITS, VALUE_DTYPES, check_parity, compact_forest
+from feature_encoder import STUDENT_ENCODER, CANCER_ENCODER
+from forest_compiler import compile_forest
+from model_registry import registry
+from benchmarks.common import sample_student_records, sample_cancer_records, best_time
+
+
+def run(sizes, value_bits):
+    cases = [
+        ("student", "student_model", STUDENT_ENCODER, sample_student_records),
+        ("cancer", "cancer_model", CANCER_ENCODER, sample_cancer_records),
+    ]
+    for name, model_name, encoder, sample in cases:
+        forest = registry.get(model_name)
+        compiled, compact = compile_forest(forest), compact_forest(forest, value_bits)
+
+        X = encoder.frame(sample(max(sizes), seed=1))
+        report = check_parity(forest, compact, X)
+        if not report["ok"]:
+            raise AssertionError(f"compact {name} forest fails the parity check: {report}")
+        print(f"{name}: parity on {report['rows']} rows, max error {report['max_error']:.3g} "
+              f"(bound {report['error_bound']:.3g})")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            print(f"  {'format':<9} {'MB':>7} {'load ms':>8}")
+            for label, obj, mmap_mode in [("pickle", None, None), ("compiled", compiled, "r"), ("compact", compact, "r")]:
+                path = registry.path(model_name) if obj is None else os.path.join(tmp, f"{label}.joblib")
+                if obj is not None:
+                    jb.dump(obj, path)
+                load_time = best_time(lambda: jb.load(path, mmap_mode=mmap_mode))
+                print(f"  {label:<9} {os.path.getsize(path) / 1e6:>7.2f} {load_time * 1e3:>8.2f}")
+
+        print(f"  {'rows':>8} {'sklearn ms':>11} {'compiled ms':>12} {'compact ms':>11}")
+        for n in sizes:
+            X = encoder.frame(sample(n, seed=n))
+            times = [best_time(lambda: model.predict(X)) for model in (forest, compiled, compact)]
+            print(f"  {n:>8} " + " ".join(f"{t * 1e3:>{w}.2f}" for t, w in zip(times, (11, 12, 11))))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 10000])
+    parser.add_argument("--value-bits", type=int, choices=sorted(VALUE_DTYPES), default=DEFAULT_VALUE_BITS)
+    args = parser.parse_args(argv)
+    run(args.rows, args.value_bits)
+
+
+if __name__ == "__main__":
+    main()
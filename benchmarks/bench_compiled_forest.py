@@ -0,0 +1,47 @@
+"""Compiled node-table forests against sklearn predict / predict_proba.
+
+Checks exact parity on synthetic rows around the saved defaults, then prints the
+per-call latency at a few batch sizes.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_compiled_forest [--rows 1 100 10000]
+"""
+import argparse
+
+from feature_encoder import STUDENT_ENCODER, CANCER_ENCODER
+from forest_compiler import compile_forest, check_parity
+from model_registry import registry
+from benchmarks.common import sample_student_records, sample_cancer_records, best_time
+
+
+def run(sizes):
+    cases = [
+        ("student", "student_model", STUDENT_ENCODER, sample_student_records),
+        ("cancer", "cancer_model", CANCER_ENCODER, sample_cancer_records),
+    ]
+    print(f"{'model':<8} {'rows':>8} {'sklearn ms':>11} {'compiled ms':>12} {'speedup':>8}")
+    for name, model_name, encoder, sample in cases:
+        forest = registry.get(model_name)
+        compiled = compile_forest(forest)
+        predict = forest.predict_proba if compiled.is_classifier else forest.predict
+        predict_compiled = compiled.predict_proba if compiled.is_classifier else compiled.predict
+
+        for n in sizes:
+            X = encoder.frame(sample(n, seed=n))
+            if not check_parity(forest, compiled, X):
+                raise AssertionError(f"compiled {name} forest differs from sklearn on {n} rows")
+
+            sklearn_time = best_time(lambda: predict(X))
+            compiled_time = best_time(lambda: predict_compiled(X))
+            print(f"{name:<8} {n:>8} {sklearn_time * 1e3:>11.2f} {compiled_time * 1e3:>12.2f} "
+                  f"{sklearn_time / compiled_time:>7.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 100, 10000])
+    run(parser.parse_args(argv).rows)
+
+
+if __name__ == "__main__":
+    main()
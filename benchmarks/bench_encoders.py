@@ -0,0 +1,55 @@
+"""Rows/sec of the compiled feature encoders against the old per-row functions.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_encoders [--rows 1 1000 20000]
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from feature_encoder import STUDENT_ENCODER, CANCER_ENCODER, SHIP_ENCODER
+from feature_schema import ST_defaults, CA_defaults, categorical_features, all_onehot_features
+from benchmarks.common import sample_student_records, sample_cancer_records, sample_ship_records, best_time
+from benchmarks.legacy_inputs import legacy_prepare_std_input, legacy_prepare_can_inputs, legacy_ship_encode
+
+
+def legacy_batch(prepare, records, defaults):
+    return pd.concat([prepare(record, defaults) for record in records], ignore_index=True)
+
+
+def legacy_ship(record, _):
+    return legacy_ship_encode(record, categorical_features, all_onehot_features)
+
+
+def run(sizes):
+    cases = [
+        ("student", sample_student_records, legacy_prepare_std_input, STUDENT_ENCODER, ST_defaults),
+        ("cancer", sample_cancer_records, legacy_prepare_can_inputs, CANCER_ENCODER, CA_defaults),
+        ("ship", sample_ship_records, legacy_ship, SHIP_ENCODER, None),
+    ]
+    print(f"{'model':<8} {'rows':>8} {'legacy rows/s':>15} {'encoder rows/s':>15} {'speedup':>8}")
+    for name, sample, legacy, encoder, defaults in cases:
+        for n in sizes:
+            records = sample(n)
+
+            # Both paths must produce the same matrix (except where the old ship
+            # path silently zeroed categories whose names didn't match training)
+            if name != "ship":
+                expected = legacy_batch(legacy, records, defaults).to_numpy(dtype=np.float64)
+                np.testing.assert_allclose(encoder.transform(records), expected)
+
+            legacy_time = best_time(lambda: legacy_batch(legacy, records, defaults))
+            encoder_time = best_time(lambda: encoder.transform(records))
+            print(f"{name:<8} {n:>8} {n / legacy_time:>15.0f} {n / encoder_time:>15.0f} "
+                  f"{legacy_time / encoder_time:>7.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 1000, 20000])
+    run(parser.parse_args(argv).rows)
+
+
+if __name__ == "__main__":
+    main()
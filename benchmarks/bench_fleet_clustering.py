@@ -0,0 +1,40 @@
+"""Fused scale + nearest-centroid kernel against scaler.transform + kmeans.predict.
+
+Checks that both paths give the same cluster for every row, then prints rows/sec.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_fleet_clustering [--rows 1 1000 100000 1000000]
+"""
+import argparse
+
+from feature_encoder import SHIP_ENCODER
+from fleet_clustering import FusedClusterPredictor, two_step_predict
+from model_registry import registry
+from benchmarks.common import sample_ship_frame, best_time
+
+
+def run(sizes):
+    scaler, kmeans = registry.get("scaler"), registry.get("kmeans")
+    fused = FusedClusterPredictor(scaler, kmeans)
+
+    print(f"{'rows':>8} {'two-step rows/s':>16} {'fused rows/s':>14} {'speedup':>8}")
+    for n in sizes:
+        X = SHIP_ENCODER.frame(sample_ship_frame(n))
+
+        mismatches = int((fused.predict(X) != two_step_predict(scaler, kmeans, X)).sum())
+        if mismatches:
+            raise AssertionError(f"fused kernel disagrees with scaler+kmeans on {mismatches} of {n} rows")
+
+        two_step_time = best_time(lambda: two_step_predict(scaler, kmeans, X))
+        fused_time = best_time(lambda: fused.predict(X))
+        print(f"{n:>8} {n / two_step_time:>16.0f} {n / fused_time:>14.0f} {two_step_time / fused_time:>7.1f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 1000, 100000, 1000000])
+    run(parser.parse_args(argv).rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Memory per worker and load time: private unpickled forests vs memory-mapped node tables.
+
+Starts N worker processes that load the models at the same time, run one
+prediction each, and report their load time, RSS and PSS (RSS with shared
+pages split between the processes mapping them). Run
+`python forest_compiler.py --all` first to write the *_compiled.joblib files.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_mmap_workers [--workers 4]
+"""
+import argparse
+import multiprocessing as mp
+import time
+
+# Artifacts each worker loads, per layout
+LAYOUTS = {
+    "pickle": ["student_model", "cancer_model", "kmeans", "scaler"],
+    "mmap": ["student_compiled", "cancer_compiled", "kmeans", "scaler"],
+}
+
+
+def _worker(layout, barrier, results):
+    from feature_encoder import STUDENT_ENCODER, CANCER_ENCODER
+    from feature_schema import ST_defaults, CA_defaults
+    from model_registry import ModelRegistry, current_rss, current_pss
+
+    # Import sklearn up front so load time is deserialization only
+    import sklearn.cluster, sklearn.ensemble, sklearn.preprocessing  # noqa: F401
+
+    registry = ModelRegistry(mmap_mode="r" if layout == "mmap" else None)
+    rss_before = current_rss()
+    start = time.perf_counter()
+    student, cancer, _, _ = [registry.get(name) for name in LAYOUTS[layout]]
+    load_seconds = time.perf_counter() - start
+
+    # Serve one request each so the pages actually get touched
+    student.predict_proba(STUDENT_ENCODER.frame(ST_defaults))
+    cancer.predict(CANCER_ENCODER.frame(CA_defaults))
+
+    barrier.wait()  # every worker is loaded before anyone measures
+    results.put({"load_seconds": load_seconds, "rss": current_rss(), "pss": current_pss(),
+                 "rss_growth": current_rss() - rss_before})
+    barrier.wait()  # stay alive until everyone has measured
+
+
+def run_layout(layout, workers):
+    ctx = mp.get_context("spawn")
+    barrier, results = ctx.Barrier(workers), ctx.Queue()
+    procs = [ctx.Process(target=_worker, args=(layout, barrier, results)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    stats = [results.get(timeout=600) for _ in procs]
+    for p in procs:
+        p.join()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args(argv)
+
+    mb = 1024 * 1024
+    print(f"{'layout':<8} {'workers':>7} {'load s':>8} {'RSS MB':>8} {'growth MB':>10} {'PSS MB':>8}")
+    for layout in LAYOUTS:
+        stats = run_layout(layout, args.workers)
+        mean = {key: sum(s[key] for s in stats) / len(stats) for key in stats[0]}
+        print(f"{layout:<8} {args.workers:>7} {mean['load_seconds']:>8.3f} {mean['rss'] / mb:>8.1f} "
+              f"{mean['rss_growth'] / mb:>10.1f} {mean['pss'] / mb:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
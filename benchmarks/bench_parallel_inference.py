@@ -0,0 +1,62 @@
+"""Scaling of the process-pool batch runner: rows/s at 1, 2, 4 and 8 workers.
+
+Every run's output is checked against the single-process output. Worker
+start-up and model loading are done before timing (warm_up).
+
+Usage (from the repository root):
+    python -m benchmarks.bench_parallel_inference [--rows 200000] [--workers 1 2 4 8]
+        [--models student cancer ship] [--engine sklearn]
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from feature_encoder import STUDENT_ENCODER, CANCER_ENCODER, SHIP_ENCODER
+from parallel_inference import ENGINES, MODELS, PARALLEL_CHUNK_ROWS, ParallelPredictor
+from benchmarks.common import sample_student_records, sample_cancer_records, sample_ship_records
+
+
+def sample_inputs(model, n_rows):
+    """n_rows encoded rows, built from 10k sampled records tiled up to size."""
+    base = {
+        "student": lambda n: STUDENT_ENCODER.transform(sample_student_records(n)),
+        "cancer": lambda n: CANCER_ENCODER.transform(sample_cancer_records(n)),
+        "ship": lambda n: SHIP_ENCODER.transform(sample_ship_records(n)),
+    }[model](min(n_rows, 10_000))
+    return np.resize(base, (n_rows, base.shape[1]))
+
+
+def run(models, n_rows, worker_counts, chunk_rows, engine):
+    print(f"{os.cpu_count()} CPUs, {n_rows} rows, chunks of {chunk_rows}, engine={engine}")
+    print(f"{'model':<8} {'workers':>7} {'seconds':>8} {'rows/s':>10} {'speedup':>8}")
+    for model in models:
+        X = sample_inputs(model, n_rows)
+        expected, baseline = None, None
+        for workers in worker_counts:
+            with ParallelPredictor(workers, chunk_rows, engine) as predictor:
+                predictor.warm_up(model)
+                start = time.perf_counter()
+                out = predictor.predict(model, X)
+                seconds = time.perf_counter() - start
+            if expected is None:
+                expected, baseline = out, seconds
+            elif not np.array_equal(out, expected):
+                raise AssertionError(f"{model}: {workers} workers differ from {worker_counts[0]}")
+            print(f"{model:<8} {workers:>7} {seconds:>8.2f} {n_rows / seconds:>10,.0f} {baseline / seconds:>7.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--models", nargs="+", choices=sorted(MODELS), default=["student", "cancer", "ship"])
+    parser.add_argument("--chunk-rows", type=int, default=PARALLEL_CHUNK_ROWS)
+    parser.add_argument("--engine", choices=ENGINES, default="sklearn")
+    args = parser.parse_args(argv)
+    run(args.models, args.rows, args.workers, args.chunk_rows, args.engine)
+
+
+if __name__ == "__main__":
+    main()
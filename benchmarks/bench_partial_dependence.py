@@ -0,0 +1,51 @@
+"""Partial dependence / ICE over a county-sized dataset: parity, cold and cached time.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_partial_dependence [--counties 3000] [--grid-points 20]
+"""
+import argparse
+import tempfile
+import time
+
+import partial_dependence
+from feature_encoder import CANCER_ENCODER
+from model_registry import registry
+from benchmarks.common import sample_cancer_records
+
+
+def run(n_counties, grid_points):
+    counties = sample_cancer_records(n_counties)
+    features = list(registry.get("top_cancer"))[:10]
+    model = registry.get("cancer_model")
+    columns = list(model.feature_names_in_)
+
+    # Chunked ICE must equal predicting every grid point on its own
+    X = CANCER_ENCODER.frame(counties[:200])[columns].to_numpy()
+    j = columns.index(features[0])
+    if not partial_dependence.check_ice(model, X, j, partial_dependence.feature_grid(X[:, j], grid_points), columns):
+        raise AssertionError("chunked ICE differs from per-grid-point predictions")
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        start = time.perf_counter()
+        partial_dependence.cancer_partial_dependence(counties, features, grid_points, cache_dir=cache_dir)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        partial_dependence.cancer_partial_dependence(counties, features, grid_points, cache_dir=cache_dir)
+        cached = time.perf_counter() - start
+
+    rows = n_counties * grid_points * len(features)
+    print(f"{n_counties} counties x {grid_points} grid points x {len(features)} features = {rows} predictions")
+    print(f"cold: {cold:.2f} s ({rows / cold:,.0f} rows/s, {cold / len(features):.2f} s per feature)")
+    print(f"cached: {cached * 1e3:.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counties", type=int, default=3000)
+    parser.add_argument("--grid-points", type=int, default=20)
+    args = parser.parse_args(argv)
+    run(args.counties, args.grid_points)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Cold-start cost of each app: import time budget, first paint and first prediction.
+
+Every measurement runs in a fresh interpreter:
+  * `python -X importtime` of the modules an app script imports before its
+    first paint, checked against IMPORT_BUDGET_MS;
+  * the first script run (first paint) and the first button click through
+    streamlit's AppTest, with the heavy modules each step pulled in.
+
+Exits with status 1 when a budget is exceeded or sklearn is imported before the
+first prediction.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_startup [--apps Predictor.py ...] [--output startup.json]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+APPS = ["Predictor.py", "std_academic_success_predictor.py", "cancer_mortality_predictor.py",
+        "ship_performance_prediction.py", "predictive_app.py"]
+
+# Our modules the app scripts import at first paint, and their cumulative import budget
+# (streamlit itself is measured but not budgeted)
+FIRST_PAINT_MODULES = ["inference", "instrumentation", "feature_schema", "model_registry"]
+IMPORT_BUDGET_MS = 250.0
+
+HEAVY_MODULES = ["pandas", "numpy", "pyarrow", "joblib", "sklearn"]
+
+# Runs inside the child interpreter
+_APP_PROBE = """
+import json, sys, time, warnings
+warnings.filterwarnings("ignore")
+heavy = {heavy!r}
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+import_seconds = time.perf_counter() - start
+def loaded():
+    return sorted(m for m in heavy if m in sys.modules)
+result = {{"streamlit_import_seconds": import_seconds, "before_run": loaded()}}
+
+start = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=300).run()
+result["first_paint_seconds"] = time.perf_counter() - start
+result["after_first_paint"] = loaded()
+result["exceptions"] = [str(e.value) for e in at.exception]
+
+if at.button:
+    start = time.perf_counter()
+    at = at.button[0].click().run()
+    result["first_prediction_seconds"] = time.perf_counter() - start
+    result["after_first_prediction"] = loaded()
+    result["exceptions"] += [str(e.value) for e in at.exception]
+print(json.dumps(result))
+"""
+
+
+def import_times(modules):
+    """Cumulative import time (ms) of each module, from `python -X importtime`."""
+    code = "import streamlit\n" + "".join(f"import {m}\n" for m in modules)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Top-level entries only (nested imports are indented further)
+        if name.startswith("  "):
+            continue
+        name = name.strip()
+        if name in modules or name == "streamlit":
+            times[name] = int(cumulative) / 1000.0
+    return times
+
+
+def probe_app(app):
+    proc = subprocess.run([sys.executable, "-c", _APP_PROBE.format(app=app, heavy=HEAVY_MODULES)],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{app} failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run(apps, budget_ms=IMPORT_BUDGET_MS):
+    failures = []
+
+    times = import_times(FIRST_PAINT_MODULES)
+    first_paint_ms = sum(times.get(m, 0.0) for m in FIRST_PAINT_MODULES)
+    print(f"import streamlit: {times.get('streamlit', 0.0):.1f} ms")
+    for m in FIRST_PAINT_MODULES:
+        print(f"import {m}: {times.get(m, 0.0):.1f} ms")
+    print(f"first-paint modules: {first_paint_ms:.1f} ms (budget {budget_ms:.0f} ms)")
+    if first_paint_ms > budget_ms:
+        failures.append(f"first-paint imports take {first_paint_ms:.1f} ms > {budget_ms:.0f} ms")
+
+    print(f"\n{'app':<36} {'first paint':>12} {'1st predict':>12}  imported at first paint -> after predict")
+    results = {}
+    for app in apps:
+        r = results[app] = probe_app(app)
+        if r["exceptions"]:
+            failures.append(f"{app}: {r['exceptions']}")
+        if "sklearn" in r["after_first_paint"]:
+            failures.append(f"{app} imports sklearn before the first prediction")
+        predict = r.get("first_prediction_seconds")
+        print(f"{app:<36} {r['first_paint_seconds'] * 1e3:>9.0f} ms "
+              f"{'' if predict is None else f'{predict * 1e3:>9.0f} ms':>12}  "
+              f"{r['after_first_paint']} -> {r.get('after_first_prediction', '-')}")
+
+    return {"import_ms": times, "first_paint_import_ms": first_paint_ms, "budget_ms": budget_ms,
+            "apps": results, "failures": failures}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--apps", nargs="+", default=APPS)
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args(argv)
+
+    report = run(args.apps, args.budget_ms)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    for failure in report["failures"]:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if report["failures"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""Path-attribution explanations: additivity check and batched vs row-by-row time.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_tree_explain [--rows 1000]
+"""
+import argparse
+import time
+
+import tree_explain
+from feature_encoder import STUDENT_ENCODER, CANCER_ENCODER
+from benchmarks.common import sample_student_records, sample_cancer_records
+
+
+def run(n_rows):
+    inputs = {
+        "student_model": STUDENT_ENCODER.transform(sample_student_records(n_rows)),
+        "cancer_model": CANCER_ENCODER.transform(sample_cancer_records(n_rows)),
+    }
+    for name, X in inputs.items():
+        start = time.perf_counter()
+        explainer = tree_explain.explainer(name)
+        setup = time.perf_counter() - start
+
+        # bias + contributions must add up to the forest's prediction
+        if not explainer.check(X):
+            raise AssertionError(f"{name}: contributions don't add up to the predictions")
+
+        start = time.perf_counter()
+        explainer.contributions(X)
+        batched = time.perf_counter() - start
+        n_single = min(n_rows, 100)
+        start = time.perf_counter()
+        for i in range(n_single):
+            explainer.contributions(X[i:i + 1])
+        single = (time.perf_counter() - start) / n_single
+
+        print(f"{name}: {explainer.forest.n_trees} trees, {explainer.forest.n_nodes} nodes, setup {setup * 1e3:.0f} ms")
+        print(f"  batched: {batched * 1e3:.1f} ms for {n_rows} rows ({batched / n_rows * 1e6:.0f} us/row)")
+        print(f"  one row: {single * 1e3:.2f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    args = parser.parse_args(argv)
+    run(args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Shared helpers for the benchmark scripts: synthetic inputs and timing."""
+import time
+
+import numpy as np
+import pandas as pd
+
+from feature_schema import ST_defaults, CA_defaults, ST_CATEGORY_MAPS, numerical_features, categorical_features
+
+# Student features the app shows as Yes/No
+ST_YES_NO_FEATURES = ["Displaced", "Educational special needs", "Debtor", "Tuition fees up to date",
+                      "Scholarship holder", "International"]
+
+
+def sample_student_records(n, seed=0):
+    """n student records shaped like the app's widget values, jittered around ST_defaults."""
+    rng = np.random.default_rng(seed)
+    records = [dict(ST_defaults) for _ in range(n)]
+    for name, default in ST_defaults.items():
+        if name in ST_CATEGORY_MAPS:
+            options = list(ST_CATEGORY_MAPS[name])
+            values = [options[i] for i in rng.integers(0, len(options), n)]
+        elif name in ST_YES_NO_FEATURES:
+            values = [("Yes", "No")[i] for i in rng.integers(0, 2, n)]
+        else:
+            values = (default * rng.uniform(0.8, 1.2, n)).tolist()
+        for record, value in zip(records, values):
+            record[name] = value
+    return records
+
+
+def sample_cancer_records(n, seed=0):
+    """n county records jittered around CA_defaults."""
+    rng = np.random.default_rng(seed)
+    names = list(CA_defaults)
+    values = np.array([CA_defaults[name] for name in names]) * rng.uniform(0.8, 1.2, (n, len(names)))
+    return [dict(zip(names, row)) for row in values.tolist()]
+
+
+# (min, max) of each numeric input in ship_performance_prediction.py
+SHIP_NUMERIC_RANGES = {
+    'Speed_Over_Ground_knots': (10.00975574, 24.99704335),
+    'Engine_Power_kW': (501.0252196, 2998.734329),
+    'Distance_Traveled_nm': (50.43314997, 1998.337057),
+    'Draft_meters': (5.001946569, 14.99294749),
+    'Cargo_Weight_tons': (50.22962415, 1999.126697),
+    'Operational_Cost_USD': (10092.30632, 499734.8679),
+    'Revenue_per_Voyage_USD': (50351.81445, 999916.6961),
+    'Turnaround_Time_hours': (12.01990927, 71.9724153),
+    'Efficiency_nm_per_kWh': (0.100211333, 1.499259399),
+    'Seasonal_Impact_Score': (1.003816044, 1.499223608),
+    'Weekly_Voyage_Count': (1.0, 9.0),
+    'Average_Load_Percentage': (50.01200505, 99.99964331),
+}
+
+
+def sample_ship_frame(n, seed=0):
+    """n voyages (DataFrame) with the app's numeric ranges and category options."""
+    rng = np.random.default_rng(seed)
+    data = {name: rng.uniform(*SHIP_NUMERIC_RANGES[name], n) for name in numerical_features}
+    for feature, options in categorical_features.items():
+        data[feature] = np.asarray(options, dtype=object)[rng.integers(0, len(options), n)]
+    return pd.DataFrame(data)
+
+
+def sample_ship_records(n, seed=0):
+    return sample_ship_frame(n, seed).to_dict("records")
+
+
+def best_time(func, repeat=3):
+    """Best wall time of `repeat` calls, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
@@ -0,0 +1,108 @@
+"""Row-by-row input preparation as the apps did it before feature_encoder.py.
+
+Kept verbatim (only renamed) as the reference for the encoder benchmarks.
+"""
+import pandas as pd
+
+from feature_schema import MOTHER_OCCU_MAP
+
+
+# From Predictor.py / std_academic_success_predictor.py
+def legacy_prepare_std_input(user_inputs, defaults):
+    # Start with all defaults
+    full_input = defaults.copy()
+    
+    # Override with user inputs
+    for key, val in user_inputs.items():
+        if key in full_input:
+            # Handle Yes/No
+            if val == "Yes":
+                full_input[key] = 1.0
+            elif val == "No":
+                full_input[key] = 0.0
+            # Handle Marital Status
+            elif key == "Marital status":
+                marital_map = {
+                    "Single": 1.0, "Married": 2.0, "Widower": 3.0,
+                    "Divorced": 4.0, "Legally Separated": 5.0, "Other": 6.0
+                }
+                full_input[key] = marital_map[val]
+            # Handle Gender
+            elif key == "Gender":
+                full_input[key] = 0.0 if val == "Female" else 1.0
+            # Handle Attendance
+            elif key == "Daytime/evening attendance\t":
+                full_input[key] = 1.0 if val == "Daytime" else 0.0
+            elif key == "Mother's occupation":
+                full_input[key] = MOTHER_OCCU_MAP[val]
+            # Handle numeric inputs
+            else:
+                try:
+                    full_input[key] = float(val)
+                except (ValueError, TypeError):
+                    pass  # Keep default if conversion fails
+    
+    # Convert to DataFrame (one row, all 36 features)
+    return pd.DataFrame([full_input])
+
+
+# From cancer_mortality_predictor.py
+def legacy_prepare_can_inputs(user_inputs, defaults):
+
+    # start with defaults
+    full_inputs = defaults.copy()
+    
+    for key, val in user_inputs.items():
+      if key in full_inputs:
+
+         full_inputs[key] = val
+
+    return pd.DataFrame([full_inputs])
+
+
+# From Predictor.py (its `return` sits inside the loop, so only the first key is applied)
+def legacy_prepare_can_inputs_predictor(user_inputs, defaults):
+
+    # start with defaults
+    full_inputs = defaults.copy()
+    for key, val in user_inputs.items():
+     if key in full_inputs:
+        try:
+         full_inputs[key] = float(val)
+        except (ValueError, TypeError):
+          pass
+
+     return pd.DataFrame([full_inputs])
+
+
+# From ship_performance_prediction.py (predict button, before scaling)
+def legacy_ship_encode(input_data, categorical_features, all_onehot_features):
+    # Create input DataFrame
+    df_input = pd.DataFrame([input_data])
+
+    # One-hot encode (same as training)
+    df_encoded = pd.get_dummies(df_input, columns=list(categorical_features.keys()))
+
+    # Align columns: add missing one-hot columns as 0
+    for col in all_onehot_features:
+        if col not in df_encoded.columns:
+            df_encoded[col] = 0
+
+    # Reorder to match training data
+    df_encoded = df_encoded[all_onehot_features]
+    return df_encoded
+
+
+# From predictive_app.py
+def legacy_create_full_input(user_inputs, defaults_dict):
+    """Merge user inputs with defaults to create full feature vector."""
+    full_input = defaults_dict.copy()
+    for feat, val in user_inputs.items():
+        if feat in full_input:
+            full_input[feat] = val
+    return pd.DataFrame([full_input])
+
+
+def legacy_encode_yes_no(df):
+    """Convert 'Yes'/'No' to 1/0 for model compatibility."""
+    return df.replace({"Yes": 1, "No": 0})
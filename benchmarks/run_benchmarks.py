@@ -0,0 +1,197 @@
+"""Benchmark suite: artifact load, input preparation and inference for all three models.
+
+Every case is timed separately on synthetic rows sampled around the saved
+defaults (and the ship app's input ranges), and the results are written as
+JSON so two commits can be compared.
+
+Usage (from the repository root):
+    python -m benchmarks.run_benchmarks [--sizes 1 100 10000 1000000] [--output bench.json]
+    python -m benchmarks.run_benchmarks --compare old.json new.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import joblib as jb
+import numpy as np
+import pandas as pd
+import sklearn
+
+from feature_encoder import STUDENT_ENCODER, CANCER_ENCODER, SHIP_ENCODER, prepare_std_input, prepare_can_inputs
+from feature_schema import ST_defaults, CA_defaults, categorical_features, all_onehot_features
+from fleet_clustering import FusedClusterPredictor, two_step_predict
+from forest_compiler import compile_forest
+from model_registry import registry, MMAP_ARTIFACTS, MMAP_MODE
+from benchmarks.common import sample_student_records, sample_cancer_records, sample_ship_records
+from benchmarks.legacy_inputs import (legacy_prepare_std_input, legacy_prepare_can_inputs,
+                                      legacy_create_full_input, legacy_encode_yes_no, legacy_ship_encode)
+
+DEFAULT_SIZES = [1, 100, 10000, 1000000]
+
+# Distinct synthetic rows; bigger batches resample from them
+SAMPLE_ROWS = 10000
+
+
+def measure(func, repeat=3, min_seconds=0.2, max_seconds=5.0):
+    """Best per-call time over `repeat` rounds of at least `min_seconds` each.
+
+    A first call slower than `max_seconds` is taken as the result as-is.
+    """
+    start = time.perf_counter()
+    func()
+    best = time.perf_counter() - start
+    if best > max_seconds:
+        return best
+    number = max(1, int(min_seconds / best)) if best > 0 else 1000
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def record(results, group, name, seconds, rows=1, **extra):
+    results.append({"group": group, "name": name, "rows": rows, "seconds": seconds,
+                    "rows_per_second": rows / seconds if seconds else None, **extra})
+    print(f"{group:<10} {name:<42} {rows:>8} {seconds * 1e3:>12.3f} ms")
+
+
+# ==============================
+# CASES
+# ==============================
+def bench_load(results):
+    for name in registry.artifacts:
+        path = registry.path(name)
+        if not os.path.exists(path):
+            print(f"{'load':<10} {name:<42} skipped ({path} not found)")
+            continue
+        size = os.path.getsize(path)
+        record(results, "load", name, measure(lambda: jb.load(path), min_seconds=0), size_bytes=size)
+        if name in MMAP_ARTIFACTS and MMAP_MODE:
+            record(results, "load", f"{name} (mmap_mode={MMAP_MODE})",
+                   measure(lambda: jb.load(path, mmap_mode=MMAP_MODE), min_seconds=0), size_bytes=size)
+
+
+def bench_prepare(results):
+    student = sample_student_records(1)[0]
+    cancer = sample_cancer_records(1)[0]
+    ship = sample_ship_records(1)[0]
+    cases = [
+        ("prepare_std_input", lambda: prepare_std_input(student)),
+        ("legacy prepare_std_input", lambda: legacy_prepare_std_input(student, ST_defaults)),
+        ("prepare_can_inputs", lambda: prepare_can_inputs(cancer)),
+        ("legacy prepare_can_inputs", lambda: legacy_prepare_can_inputs(cancer, CA_defaults)),
+        ("create_full_input + encode_yes_no (student)",
+         lambda: legacy_encode_yes_no(legacy_create_full_input(student, ST_defaults))),
+        ("create_full_input + encode_yes_no (cancer)",
+         lambda: legacy_encode_yes_no(legacy_create_full_input(cancer, CA_defaults))),
+        ("SHIP_ENCODER.frame", lambda: SHIP_ENCODER.frame(ship)),
+        ("legacy ship get_dummies", lambda: legacy_ship_encode(ship, categorical_features, all_onehot_features)),
+    ]
+    for name, func in cases:
+        record(results, "prepare", name, measure(func))
+
+
+def _resample(X, n, seed=0):
+    if n <= len(X):
+        return X[:n]
+    return X[np.random.default_rng(seed).integers(0, len(X), n)]
+
+
+def bench_inference(results, sizes):
+    # Encoded once; each batch size is a DataFrame like the apps pass in
+    student = STUDENT_ENCODER.transform(sample_student_records(SAMPLE_ROWS))
+    cancer = CANCER_ENCODER.transform(sample_cancer_records(SAMPLE_ROWS))
+    ship = SHIP_ENCODER.transform(sample_ship_records(SAMPLE_ROWS))
+
+    cases = []
+    for label, model_name, encoder, X in [("student", "student_model", STUDENT_ENCODER, student),
+                                          ("cancer", "cancer_model", CANCER_ENCODER, cancer)]:
+        if not os.path.exists(registry.path(model_name)):
+            print(f"{'inference':<10} {label:<42} skipped ({registry.path(model_name)} not found)")
+            continue
+        forest = registry.get(model_name)
+        compiled = compile_forest(forest)
+        method = "predict_proba" if compiled.is_classifier else "predict"
+        cases.append((f"{label} sklearn {method}", encoder, X,
+                      lambda F, f=getattr(forest, method): f(F)))
+        cases.append((f"{label} compiled {method}", encoder, X,
+                      lambda F, f=getattr(compiled, method): f(F)))
+
+    scaler, kmeans = registry.get("scaler"), registry.get("kmeans")
+    fused = FusedClusterPredictor(scaler, kmeans)
+    cases.append(("ship scaler + kmeans", SHIP_ENCODER, ship, lambda F: two_step_predict(scaler, kmeans, F)))
+    cases.append(("ship fused", SHIP_ENCODER, ship, lambda F: fused.predict(F)))
+
+    for name, encoder, X, predict in cases:
+        columns = encoder.columns if encoder is SHIP_ENCODER else encoder.feature_names
+        for n in sizes:
+            F = pd.DataFrame(_resample(X, n), columns=columns)
+            record(results, "inference", name, measure(lambda: predict(F)), rows=n)
+
+
+# ==============================
+# OUTPUT
+# ==============================
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": sys.version.split()[0], "numpy": np.__version__, "sklearn": sklearn.__version__,
+        "platform": platform.platform(), "cpu_count": os.cpu_count(),
+        "model_dir": registry.model_dir,
+    }
+
+
+def compare(old_path, new_path):
+    """Print the per-case time ratio new/old (>1 is slower)."""
+    with open(old_path) as f:
+        old = {(r["group"], r["name"], r["rows"]): r["seconds"] for r in json.load(f)["results"]}
+    with open(new_path) as f:
+        new = json.load(f)["results"]
+    print(f"{'group':<10} {'case':<42} {'rows':>8} {'old ms':>10} {'new ms':>10} {'new/old':>8}")
+    for r in new:
+        key = (r["group"], r["name"], r["rows"])
+        if key in old:
+            print(f"{key[0]:<10} {key[1]:<42} {key[2]:>8} {old[key] * 1e3:>10.3f} "
+                  f"{r['seconds'] * 1e3:>10.3f} {r['seconds'] / old[key]:>7.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="inference batch sizes")
+    parser.add_argument("--groups", nargs="+", default=["load", "prepare", "inference"])
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two result files")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = []
+    if "load" in args.groups:
+        bench_load(results)
+    if "prepare" in args.groups:
+        bench_prepare(results)
+    if "inference" in args.groups:
+        bench_inference(results, args.sizes)
+
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
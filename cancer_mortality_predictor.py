@@ -1,8 +1,10 @@
 import streamlit as st
-import joblib as jb
-import pandas as pd
-import numpy as np
-import sklearn
+import inference
+from instrumentation import begin_run, diagnostics_panel
+from feature_schema import CA_defaults
+
+# Opt-in timing panel (APP_DIAGNOSTICS=1 or ?diagnostics=1)
+begin_run("cancer")
 
 #-=================================================Enhancing the app UI========================================================================================
 # Custom CSS for a clean, modern look
@@ -51,15 +53,12 @@ st.markdown("""
 """, unsafe_allow_html=True)
 #===============================================================================================================================================================
 
-#Loading our trained models
-Reg_model =jb.load("cancer_rf_model.pkl")
+#Trained model is loaded lazily (once per process) by the model registry
 
 
 #================================================================Cancer Data=====================================================================================
 
-CA_feature_names = ['avganncount', 'avgdeathsperyear', 'incidencerate', 'medincome', 'popest2015', 'povertypercent', 'studypercap', 'medianage', 'medianagemale', 'medianagefemale', 'percentmarried', 'pctnohs18_24', 'pcths18_24', 'pctsomecol18_24', 'pctbachdeg18_24', 'pcths25_over', 'pctbachdeg25_over', 'pctemployed16_over', 'pctunemployed16_over', 'pctprivatecoverage', 'pctprivatecoveragealone', 'pctempprivcoverage', 'pctpubliccoverage', 'pctpubliccoveragealone', 'pctwhite', 'pctblack', 'pctasian', 'pctotherrace', 'pctmarriedhouseholds', 'birthrate']
-
-CA_defaults = {'avganncount': 169.0, 'avgdeathsperyear': 61.0, 'incidencerate': 453.5494221, 'medincome': 45269.0, 'popest2015': 25788.0, 'povertypercent': 15.8, 'studypercap': 0.0, 'medianage': 41.0, 'medianagemale': 39.6, 'medianagefemale': 42.4, 'percentmarried': 52.5, 'pctnohs18_24': 17.2, 'pcths18_24': 34.8, 'pctsomecol18_24': 40.4, 'pctbachdeg18_24': 5.4, 'pcths25_over': 35.4, 'pctbachdeg25_over': 12.4, 'pctemployed16_over': 54.5, 'pctunemployed16_over': 7.6, 'pctprivatecoverage': 65.1, 'pctprivatecoveragealone': 48.7, 'pctempprivcoverage': 41.1, 'pctpubliccoverage': 36.4, 'pctpubliccoveragealone': 18.8, 'pctwhite': 90.12443712, 'pctblack': 2.231905108, 'pctasian': 0.543811087, 'pctotherrace': 0.844356882, 'pctmarriedhouseholds': 51.70068027, 'birthrate': 5.356186395}
+#CA_feature_names / CA_defaults live in feature_schema.py
 
 # Cancer Helping Functions
 
@@ -189,17 +188,7 @@ def get_can_inputs():
 
     return inputs
 
-def prepare_can_inputs(user_inputs, defaults):
-
-    # start with defaults
-    full_inputs = defaults.copy()
-    
-    for key, val in user_inputs.items():
-      if key in full_inputs:
-
-         full_inputs[key] = val
-
-    return pd.DataFrame([full_inputs])
+#prepare_can_inputs now comes from feature_encoder.py (compiled CANCER_ENCODER)
 
 
 #=================================================================================================================================================================================================================================
@@ -219,11 +208,12 @@ st.markdown(
 
 user_input = get_can_inputs()
 
-if st.button("Predict Death Rate", key="cancer_btn"):
-        input_df2 = prepare_can_inputs(user_input, CA_defaults)
+tab1, tab2, tab3 = st.tabs(["🏥 Predict", "📈 Feature Effects", "🗺️ Nationwide Scoring"])
 
+with tab1:
+    if st.button("Predict Death Rate", key="cancer_btn"):
         # Make prediction
-        pred = int(Reg_model.predict(input_df2)[0]) # you cannot have a half person
+        pred = int(inference.cancer_death_rate(user_input, CA_defaults)) # you cannot have a half person
 
         # get results
         st.markdown(
@@ -235,7 +225,67 @@ if st.button("Predict Death Rate", key="cancer_btn"):
                 """,
                unsafe_allow_html=True)
         st.info("Model Performance | Mean Error = ±14.1 deaths/100k")
-st.image("dataset-cover (1).jpg", caption = "Cancer Death Rates Prediction Regression", width=1250)
+    st.image("dataset-cover (1).jpg", caption = "Cancer Death Rates Prediction Regression", width=1250)
+
+# Partial dependence / ICE over a whole county dataset
+with tab2:
+    st.subheader("📈 How One Indicator Moves the Predicted Death Rate")
+    st.markdown("Upload the county dataset (CSV with the model's feature columns; missing columns use the "
+                "default values). The thick line is the average effect (partial dependence), the thin "
+                "lines are individual counties (ICE).")
+    counties_file = st.file_uploader("County CSV", type=["csv"], key="pd_file")
+    if counties_file is not None:
+        import altair as alt
+
+        feature = st.selectbox("Feature", inference.cancer_effect_features(), key="pd_feature")
+        grid_points = st.slider("Grid points", 5, 50, 20, key="pd_grid")
+        # Computed once per model + dataset, then read back from the disk cache
+        with st.spinner("Scoring every county at every grid point..."):
+            pd_frame, ice_frame = inference.cancer_feature_effect(counties_file, feature, grid_points)
+
+        ice_lines = alt.Chart(ice_frame).mark_line(opacity=0.15, color="#7f8c8d").encode(
+            x=alt.X(f"{feature}:Q", title=feature), y=alt.Y("death_rate:Q", title="Predicted death rate"),
+            detail="county:N")
+        pd_line = alt.Chart(pd_frame).mark_line(color="#c0392b", strokeWidth=4).encode(
+            x=f"{feature}:Q", y="death_rate:Q")
+        st.altair_chart(ice_lines + pd_line, width="stretch")
+
+# Every county at once, rolled up by state and population size
+with tab3:
+    st.subheader("🗺️ Nationwide County Scoring")
+    st.markdown("Upload the county dataset (CSV or Parquet with the model's feature columns and "
+                "`geography` as \"County, State\"). Every county is scored, then rolled up by state and "
+                "by population size; weighted rates use `popest2015` as the weight.")
+    nation_file = st.file_uploader("County file", type=["csv", "parquet"], key="county_file")
+    if nation_file is not None:
+        # Cached per model + file, so reopening the same file is instant
+        with st.spinner("Scoring every county..."):
+            tables = inference.cancer_county_scores(nation_file)
+        states = tables["states"]
+
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Counties", f"{len(tables['counties']):,}")
+        c2.metric("States", f"{len(states):,}")
+        population = states["population"].sum()
+        national = (states["weighted_death_rate"] * states["population"]).sum() / population if population else 0.0
+        c3.metric("Population-weighted rate", f"{national:.1f} per 100k")
+
+        st.bar_chart(states.sort_values("weighted_death_rate", ascending=False),
+                     x="state", y="weighted_death_rate", horizontal=True, sort=False)
+        st.dataframe(states, hide_index=True, width="stretch")
+        st.markdown("**By population size**")
+        st.dataframe(tables["population_buckets"], hide_index=True, width="stretch")
+
+        d1, d2 = st.columns(2)
+        d1.download_button("Download county scores (Parquet)", tables["counties"].to_parquet(index=False),
+                           "county_scores.parquet", "application/octet-stream", key="county_download")
+        d2.download_button("Download state rollup (Parquet)", states.to_parquet(index=False),
+                           "state_rollup.parquet", "application/octet-stream", key="state_download")
+
+with st.expander("⚙️ Model load metrics"):
+    st.json(inference.metrics())
+
+diagnostics_panel()
 
 
 
@@ -0,0 +1,345 @@
+"""Compact, quantized node tables for the student and cancer forests.
+
+Usage:
+    python -m compact_format student_rf_model.pkl student_rf_compact.joblib [--value-bits 16]
+    python -m compact_format --all [--student data.csv] [--cancer cancer_reg.csv]
+
+A CompiledForest (forest_compiler.py) keeps sklearn's widths: float64
+thresholds and values, int64 feature ids and child pointers, about 42 bytes
+per node plus the values. CompactForest stores per node
+    feature      uint8 (uint16 past 255 features)
+    threshold    float32: the largest float32 <= the float64 threshold
+    children     uint16 (uint32 for trees past 65536 nodes), relative to the tree's root
+    is_leaf, missing_left   bool
+i.e. 11 bytes, and one quantized row of values per leaf only:
+value = offset + scale * q, with q uint16 (or uint8) and offset/scale per
+output. A leaf's children slot holds the index of its value row within its
+tree.
+
+Inputs are cast to float32 before the walk, as in sklearn, and for a float32
+x, x <= t64 exactly when x <= the largest float32 not above t64, so every
+split goes the same way as in the pickle; export re-checks this on the
+training matrix when given one. Predictions average the quantized leaves
+in integers and differ from the pickle's by at most scale / 2.
+"""
+import argparse
+import os
+
+import joblib as jb
+import numpy as np
+import pandas as pd
+
+from forest_compiler import DEFAULT_CHUNK_ROWS, compile_forest, export_is_current
+from model_registry import file_sha256, registry
+
+DEFAULT_VALUE_BITS = 16
+VALUE_DTYPES = {8: np.uint8, 16: np.uint16}
+
+
+def float32_floor(threshold):
+    """Largest float32 <= each float64 threshold (+inf stays +inf)."""
+    threshold = np.asarray(threshold, dtype=np.float64)
+    with np.errstate(over="ignore"):
+        down = threshold.astype(np.float32)
+    too_high = down.astype(np.float64) > threshold
+    down[too_high] = np.nextafter(down[too_high], np.float32(-np.inf))
+    return down
+
+
+def quantize(values, bits=DEFAULT_VALUE_BITS):
+    """(q, offset, scale) with values ~= offset + scale * q, per output column."""
+    values = np.asarray(values, dtype=np.float64)
+    offset, top = values.min(axis=0), values.max(axis=0)
+    scale = (top - offset) / (2 ** bits - 1)
+    scale = np.where(scale > 0, scale, 1.0)
+    q = np.rint((values - offset) / scale).astype(VALUE_DTYPES[bits])
+    return q, offset, scale
+
+
+class CompactForest:
+    """predict / predict_proba from the narrow node table described in the module docstring."""
+
+    def __init__(self, feature, threshold, children, is_leaf, missing_left, roots, leaf_offset, leaf_value,
+                 value_offset, value_scale, max_depth, is_classifier, classes_=None, n_features_in_=None,
+                 feature_names_in_=None, source_sha256=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.is_leaf = is_leaf
+        self.missing_left = missing_left
+        self.roots = roots
+        self.leaf_offset = leaf_offset
+        self.leaf_value = leaf_value
+        self.value_offset = value_offset
+        self.value_scale = value_scale
+        self.max_depth = max_depth
+        self.is_classifier = is_classifier
+        self.classes_ = classes_
+        self.n_features_in_ = n_features_in_
+        self.feature_names_in_ = feature_names_in_
+        # SHA-256 of the pickle an export was built from (see forest_compiler.export_is_current)
+        self.source_sha256 = source_sha256
+
+    @classmethod
+    def from_compiled(cls, compiled, value_bits=DEFAULT_VALUE_BITS):
+        roots = np.asarray(compiled.roots)
+        sizes = np.diff(np.append(roots, compiled.n_nodes))
+        tree = np.repeat(np.arange(len(roots)), sizes)
+        leaf_ids = np.flatnonzero(compiled.is_leaf)
+        # Leaves are numbered tree by tree; leaf_offset[t] is tree t's first
+        leaf_offset = np.searchsorted(leaf_ids, roots)
+
+        children = compiled.children - roots[tree][:, np.newaxis]
+        children[leaf_ids] = (np.arange(len(leaf_ids)) - leaf_offset[tree[leaf_ids]])[:, np.newaxis]
+        q, offset, scale = quantize(compiled.value[leaf_ids], value_bits)
+
+        n_features = compiled.n_features_in_ or int(compiled.feature.max()) + 1
+        return cls(
+            feature=compiled.feature.astype(np.uint8 if n_features <= 256 else np.uint16),
+            threshold=float32_floor(compiled.threshold),
+            children=children.astype(np.uint16 if sizes.max() <= 65536 else np.uint32),
+            is_leaf=np.asarray(compiled.is_leaf, dtype=bool),
+            missing_left=np.asarray(compiled.missing_left, dtype=bool),
+            roots=roots.astype(np.uint32),
+            leaf_offset=leaf_offset.astype(np.uint32),
+            leaf_value=q,
+            value_offset=offset,
+            value_scale=scale,
+            max_depth=compiled.max_depth,
+            is_classifier=compiled.is_classifier,
+            classes_=compiled.classes_,
+            n_features_in_=compiled.n_features_in_,
+            feature_names_in_=compiled.feature_names_in_,
+            source_sha256=getattr(compiled, "source_sha256", None),
+        )
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in (
+            "feature", "threshold", "children", "is_leaf", "missing_left", "roots", "leaf_offset", "leaf_value"))
+
+    def _as_array(self, X):
+        # Same input handling as CompiledForest
+        if isinstance(X, pd.DataFrame) and self.feature_names_in_ is not None:
+            X = X[list(self.feature_names_in_)]
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.n_features_in_ is not None and X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but the forest expects {self.n_features_in_}")
+        return X
+
+    def _apply(self, X):
+        """Leaf node id reached in every tree, shape (n_rows, n_trees)."""
+        n_rows, n_trees = len(X), self.n_trees
+        roots = self.roots.astype(np.intp)
+        node = np.tile(roots, n_rows)
+        # Child pointers are relative to the tree's root
+        base = node.copy()
+        offset = np.repeat(np.arange(n_rows) * X.shape[1], n_trees)
+        flat_X = np.ascontiguousarray(X).ravel()
+        children = self.children.ravel()
+        has_nan = np.isnan(flat_X).any()
+
+        active = np.flatnonzero(~self.is_leaf[node])
+        while active.size:
+            current = node[active]
+            x = flat_X[offset[active] + self.feature[current]]
+            go_left = x <= self.threshold[current]
+            if has_nan:
+                go_left |= np.isnan(x) & self.missing_left[current]
+            current = base[active] + children[2 * current + ~go_left]
+            node[active] = current
+            active = active[~self.is_leaf[current]]
+        return node.reshape(n_rows, n_trees)
+
+    def apply(self, X):
+        """Leaf node id per row and tree (same numbering as the CompiledForest it came from)."""
+        X = self._as_array(X)
+        chunks = [self._apply(X[i:i + DEFAULT_CHUNK_ROWS]) for i in range(0, len(X), DEFAULT_CHUNK_ROWS)]
+        return np.vstack(chunks) if chunks else np.empty((0, self.n_trees), dtype=np.intp)
+
+    def _mean_value(self, X):
+        X = self._as_array(X)
+        total = np.zeros((len(X),) + self.leaf_value.shape[1:], dtype=np.int64)
+        leaf_offset = self.leaf_offset.astype(np.intp)
+        for start in range(0, len(X), DEFAULT_CHUNK_ROWS):
+            leaves = self._apply(X[start:start + DEFAULT_CHUNK_ROWS])
+            rows = leaf_offset + self.children[leaves, 0]
+            chunk = total[start:start + DEFAULT_CHUNK_ROWS]
+            for t in range(self.n_trees):
+                chunk += self.leaf_value[rows[:, t]]
+        return self.value_offset + self.value_scale * (total / self.n_trees)
+
+    def predict_proba(self, X):
+        if not self.is_classifier:
+            raise AttributeError("predict_proba is only available for classifiers")
+        return self._mean_value(X)
+
+    def predict(self, X):
+        if self.is_classifier:
+            return self.classes_.take(self.predict_proba(X).argmax(axis=1), axis=0)
+        return self._mean_value(X)
+
+
+def compact_forest(forest, value_bits=DEFAULT_VALUE_BITS):
+    return CompactForest.from_compiled(compile_forest(forest), value_bits)
+
+
+def check_structure(compiled, compact):
+    """Data-free check of a compact table against the CompiledForest it came from.
+
+    Every split keeps its feature, every float32 threshold is the largest
+    float32 <= the original (so no float32 input changes side), every child
+    pointer decodes to the original child, and every leaf value is within
+    scale / 2. Returns the list of failed checks (empty when all pass).
+    """
+    failed = []
+    internal = ~np.asarray(compiled.is_leaf)
+    t64, t32 = np.asarray(compiled.threshold)[internal], np.asarray(compact.threshold)[internal]
+    if not np.array_equal(np.asarray(compiled.feature)[internal], np.asarray(compact.feature)[internal]):
+        failed.append("features")
+    above = np.nextafter(t32, np.float32(np.inf))
+    if not (np.all(t32.astype(np.float64) <= t64) and np.all((above.astype(np.float64) > t64) | np.isinf(t32))):
+        failed.append("thresholds")
+
+    roots = np.asarray(compiled.roots)
+    sizes = np.diff(np.append(roots, compiled.n_nodes))
+    base = np.repeat(roots, sizes)[internal]
+    if not np.array_equal(base[:, np.newaxis] + compact.children[internal], np.asarray(compiled.children)[internal]):
+        failed.append("children")
+
+    leaf_ids = np.flatnonzero(compiled.is_leaf)
+    tree = np.repeat(np.arange(len(roots)), sizes)[leaf_ids]
+    rows = compact.leaf_offset[tree].astype(np.intp) + compact.children[leaf_ids, 0]
+    decoded = compact.value_offset + compact.value_scale * compact.leaf_value[rows]
+    if np.abs(decoded - compiled.value[leaf_ids]).max(initial=0) > np.max(compact.value_scale) / 2 * (1 + 1e-9):
+        failed.append("leaf values")
+    return failed
+
+
+def check_parity(forest, compact, X):
+    """How closely `compact` reproduces the pickled `forest` on rows X.
+
+    same_splits: every row reaches the same leaf in every tree.
+    max_error: largest |difference| of predict_proba (classifier) or predict,
+    against the bound scale / 2 of the leaf quantization.
+    changed: rows whose predicted class differs, and those among them whose
+    top two probabilities are further apart than the quantization allows.
+    """
+    X = compact._as_array(X)
+    same_splits = bool(np.array_equal(compile_forest(forest).apply(X), compact.apply(X)))
+    if compact.is_classifier:
+        expected, got = forest.predict_proba(X), compact.predict_proba(X)
+    else:
+        expected, got = forest.predict(X), compact.predict(X)
+    bound = float(np.max(compact.value_scale)) / 2
+    report = {"rows": len(X), "same_splits": same_splits, "max_error": float(np.abs(expected - got).max(initial=0)),
+              "error_bound": bound}
+    if compact.is_classifier:
+        changed = expected.argmax(axis=1) != got.argmax(axis=1)
+        top_two = np.sort(expected[changed], axis=1)[:, -2:]
+        report["changed"] = int(changed.sum())
+        report["changed_beyond_bound"] = int((top_two[:, 1] - top_two[:, 0] > 2 * bound).sum())
+    report["ok"] = (same_splits and report["max_error"] <= bound * (1 + 1e-9) + 1e-12
+                    and not report.get("changed_beyond_bound", 0))
+    return report
+
+
+# ==============================
+# APP ACCESS
+# ==============================
+# Registry forest -> exported compact artifact
+COMPACT_ARTIFACTS = {
+    "student_model": "student_compact",
+    "cancer_model": "cancer_compact",
+}
+
+_compact = {}
+
+
+def compact_model(name):
+    """Compact forest for a registry model.
+
+    The exported artifact when it was built from the current pickle, else
+    built from the pickle once per process.
+    """
+    compact_name = COMPACT_ARTIFACTS[name]
+    if export_is_current(name, compact_name):
+        return registry.get(compact_name)
+    registry.reload_if_changed(name)
+    forest = registry.get(name)
+    if _compact.get(name, (None,))[0] is not forest:
+        _compact[name] = (forest, compact_forest(forest))
+    return _compact[name][1]
+
+
+# ==============================
+# CLI
+# ==============================
+def export(model_path, output_path, value_bits=DEFAULT_VALUE_BITS, X=None):
+    """Convert a pickled forest and save it uncompressed (memory-mappable).
+
+    The table is always checked against the forest without data
+    (check_structure). With X (e.g. the training matrix), the export is also
+    refused unless check_parity passes on it.
+    """
+    forest = jb.load(model_path)
+    compiled = compile_forest(forest)
+    compact = CompactForest.from_compiled(compiled, value_bits)
+    compact.source_sha256 = file_sha256(model_path)
+    failed = check_structure(compiled, compact)
+    if failed:
+        raise ValueError(f"{model_path}: compact forest fails the structure check: {', '.join(failed)}")
+    if X is not None:
+        report = check_parity(forest, compact, X)
+        if not report["ok"]:
+            raise ValueError(f"{model_path}: compact forest fails the parity check: {report}")
+        print(f"Parity on {report['rows']} rows: same splits, max error {report['max_error']:.3g} "
+              f"(bound {report['error_bound']:.3g})")
+    jb.dump(compact, output_path)
+    before, after = os.path.getsize(model_path), os.path.getsize(output_path)
+    print(f"Compacted {compact.n_trees} trees / {compact.n_nodes} nodes: {before / 1e6:.1f} MB -> "
+          f"{after / 1e6:.1f} MB ({before / after:.1f}x smaller) -> {output_path}")
+    return compact
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a fitted random forest as a compact quantized node table.")
+    parser.add_argument("model", nargs="?", help="pickled sklearn forest (e.g. student_rf_model.pkl)")
+    parser.add_argument("output", nargs="?", help="where to write the compact forest")
+    parser.add_argument("--all", action="store_true", help="export every registry forest next to its pickle")
+    parser.add_argument("--value-bits", type=int, choices=sorted(VALUE_DTYPES), default=DEFAULT_VALUE_BITS)
+    parser.add_argument("--student", metavar="CSV", help="student dataset to check the export against")
+    parser.add_argument("--cancer", metavar="CSV", help="cancer dataset to check the export against")
+    args = parser.parse_args(argv)
+
+    from training_pipeline import cached_matrix
+
+    datasets = {"student_model": ("student", args.student), "cancer_model": ("cancer", args.cancer)}
+    if args.all:
+        for name, compact_name in COMPACT_ARTIFACTS.items():
+            if not os.path.exists(registry.path(name)):
+                print(f"Skipping {name}: {registry.path(name)} not found")
+                continue
+            stage, path = datasets[name]
+            X = cached_matrix(stage, path)[0] if path else None
+            export(registry.path(name), registry.path(compact_name), args.value_bits, X)
+    elif args.model and args.output:
+        export(args.model, args.output, args.value_bits)
+    else:
+        parser.error("give MODEL and OUTPUT, or --all")
+
+
+if __name__ == "__main__":
+    # Pickle compact_format.CompactForest, not __main__.CompactForest
+    import compact_format
+    compact_format.main()
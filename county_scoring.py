@@ -0,0 +1,167 @@
+"""Death-rate predictions for every county at once, rolled up by state and population size.
+
+Usage:
+    python -m county_scoring cancer_reg.csv [--output-dir county_scores/]
+
+The county file is the cancer dataset layout (CSV or Parquet): the 30
+CA_feature_names columns (missing columns and values use CA_defaults), plus
+`geography` ("Kitsap County, Washington"), whose last comma-separated part
+is taken as the state. Every county is scored in one predict call, then
+rolled up with group-bys into
+    states              one row per state
+    population_buckets  one row per popest2015 size band
+each with the county count, total population, the plain and the
+population-weighted (popest2015) mean predicted death rate, and the
+min / max county. The three tables are cached on disk under the model
+checksum and the SHA-256 of the input file, so reopening a dashboard on the
+same file and model reads them back instead of rescoring.
+"""
+import argparse
+import hashlib
+import os
+
+import joblib as jb
+import numpy as np
+import pandas as pd
+
+from feature_encoder import CANCER_ENCODER
+from instrumentation import instruments
+from model_registry import file_sha256, registry
+
+COUNTY_CACHE_DIR = os.environ.get("COUNTY_CACHE_DIR", os.path.join(registry.model_dir, ".county_cache"))
+# Bump when the output tables change shape, so old cache entries are ignored
+TABLES_VERSION = 1
+
+GEOGRAPHY_COLUMN = "geography"
+POPULATION_COLUMN = "popest2015"
+PREDICTION_COLUMN = "death_rate"
+UNKNOWN_STATE = "Unknown"
+
+# popest2015 bands: right edges are exclusive
+POPULATION_EDGES = [0, 10_000, 50_000, 100_000, 500_000, 1_000_000, np.inf]
+POPULATION_LABELS = ["<10k", "10k-50k", "50k-100k", "100k-500k", "500k-1M", "1M+"]
+
+TABLES = ("counties", "states", "population_buckets")
+
+
+def read_counties(source):
+    from student_batch import is_parquet
+
+    if is_parquet(getattr(source, "name", source)):
+        data = pd.read_parquet(source)
+    else:
+        # The published cancer_reg.csv is latin-1
+        data = pd.read_csv(source, encoding="latin-1")
+    if hasattr(source, "seek"):
+        source.seek(0)
+    # Column names differ in case between copies of the dataset
+    return data.rename(columns=str.lower)
+
+
+def parse_states(geography):
+    """State of each 'County, State' string (UNKNOWN_STATE when there is no comma)."""
+    geography = pd.Series(geography, dtype="string")
+    state = geography.str.rsplit(",", n=1).str[1].str.strip()
+    return state.fillna(UNKNOWN_STATE).replace("", UNKNOWN_STATE)
+
+
+def population_buckets(population):
+    return pd.cut(population, POPULATION_EDGES, right=False, labels=POPULATION_LABELS)
+
+
+# ==============================
+# SCORING
+# ==============================
+def score_counties(counties, model_name="cancer_model", model=None):
+    """One row per county: geography, state, population, size band and predicted death rate."""
+    if model is None:
+        model = registry.get_with_checksum(model_name)[0]
+    X = CANCER_ENCODER.frame(counties)
+    # joblib threads for the forest's per-tree loop when the model doesn't set n_jobs
+    with instruments.span("county_scoring", rows=len(X)), jb.parallel_config(n_jobs=-1):
+        predicted = np.asarray(model.predict(X))
+
+    population = X[POPULATION_COLUMN].to_numpy()
+    geography = counties[GEOGRAPHY_COLUMN] if GEOGRAPHY_COLUMN in counties else pd.Series([""] * len(X))
+    return pd.DataFrame({
+        GEOGRAPHY_COLUMN: geography.to_numpy(),
+        "state": parse_states(geography.to_numpy()).to_numpy(),
+        POPULATION_COLUMN: population,
+        "population_bucket": population_buckets(population),
+        PREDICTION_COLUMN: predicted,
+    })
+
+
+def rollup(scored, by):
+    """Per-group county count, population, plain / population-weighted mean and range of the prediction."""
+    weighted = scored[PREDICTION_COLUMN] * scored[POPULATION_COLUMN]
+    groups = scored.assign(_weighted=weighted).groupby(by, observed=False, sort=True)
+    table = groups.agg(
+        counties=(PREDICTION_COLUMN, "size"),
+        population=(POPULATION_COLUMN, "sum"),
+        mean_death_rate=(PREDICTION_COLUMN, "mean"),
+        _weighted=("_weighted", "sum"),
+        min_death_rate=(PREDICTION_COLUMN, "min"),
+        max_death_rate=(PREDICTION_COLUMN, "max"),
+    )
+    population = table["population"].to_numpy()
+    table.insert(3, "weighted_death_rate",
+                 np.divide(table.pop("_weighted").to_numpy(), population,
+                           out=np.full(len(table), np.nan), where=population > 0))
+    return table.reset_index()
+
+
+def _cache_paths(cache_dir, checksum, file_hash):
+    key = hashlib.sha256(f"{checksum}|{file_hash}|{TABLES_VERSION}".encode()).hexdigest()[:32]
+    return {table: os.path.join(cache_dir, f"county_{key}_{table}.parquet") for table in TABLES}
+
+
+def county_scores(source, model_name="cancer_model", cache_dir=COUNTY_CACHE_DIR):
+    """{"counties", "states", "population_buckets"} tables for a county file (path or file object)."""
+    # Keyed on the model that does the scoring, not just whatever file is on disk now
+    model, checksum = registry.get_with_checksum(model_name)
+    paths = _cache_paths(cache_dir, checksum, file_sha256(source)) if cache_dir else None
+    if paths and all(os.path.exists(path) for path in paths.values()):
+        return {table: pd.read_parquet(path) for table, path in paths.items()}
+
+    scored = score_counties(read_counties(source), model_name, model)
+    tables = {"counties": scored, "states": rollup(scored, "state"),
+              "population_buckets": rollup(scored, "population_bucket")}
+
+    if paths:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            for table, path in paths.items():
+                # Write then rename, so a concurrent reader never sees half a file
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                tables[table].to_parquet(tmp_path, index=False)
+                os.replace(tmp_path, path)
+        except OSError:
+            # Read-only model folder: just don't cache
+            pass
+    return tables
+
+
+# ==============================
+# CLI
+# ==============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score every county and roll the predictions up by state.")
+    parser.add_argument("input", help="county CSV or Parquet file (cancer dataset layout)")
+    parser.add_argument("--output-dir", default="county_scores", help="where the Parquet tables go")
+    parser.add_argument("--no-cache", action="store_true", help="always rescore")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        parser.error(f"input file not found: {args.input}")
+
+    tables = county_scores(args.input, cache_dir=None if args.no_cache else COUNTY_CACHE_DIR)
+    os.makedirs(args.output_dir, exist_ok=True)
+    for table, frame in tables.items():
+        path = os.path.join(args.output_dir, f"{table}.parquet")
+        frame.to_parquet(path, index=False)
+        print(f"{table}: {len(frame)} rows -> {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import numpy as np
+import pandas as pd
+
+from feature_schema import (ST_feature_names, ST_defaults, ST_CATEGORY_MAPS, YES_NO_MAP,
+                            CA_feature_names, CA_defaults,
+                            numerical_features, categorical_features, all_onehot_features,
+                            SHIP_CATEGORY_COLUMNS)
+from instrumentation import instruments
+
+
+def _lookup(table, value):
+    """Code for one text option (or number); NaN when it can't be read."""
+    if isinstance(value, str):
+        value = value.strip()
+        if value in table:
+            return table[value]
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return np.nan
+
+
+# Below this many values a text column is mapped with a plain loop (pandas' per-call overhead dominates)
+LOOP_MAX_ROWS = 64
+
+
+def _lookup_column(table, values):
+    """_lookup over an object column: once per distinct value (pd.factorize), then a take."""
+    codes, uniques = pd.factorize(values, use_na_sentinel=True)
+    mapped = np.fromiter((_lookup(table, v) for v in uniques), dtype=np.float64, count=len(uniques))
+    # Missing values get code -1, which picks the appended NaN
+    return np.append(mapped, np.nan).take(codes)
+
+
+class FeatureEncoder:
+    """Compiled mapping from input records to the model's feature matrix.
+
+    Built once from the feature names, their defaults and the text option maps.
+    `transform` accepts one record (dict), a list of records or a DataFrame and
+    fills a preallocated C-contiguous matrix column by column, so the cost per
+    row is a few array operations instead of a Python if/elif chain.
+    Unknown keys are ignored; missing or unreadable values keep their default.
+    """
+
+    def __init__(self, feature_names, defaults, category_maps=None, shared_map=None, dtype=np.float64, name=None):
+        self.name = name
+        self.feature_names = list(feature_names)
+        self.dtype = np.dtype(dtype)
+        self.defaults = np.array([defaults[name] for name in self.feature_names], dtype=np.float64)
+
+        # Column lookup, also by stripped name ('Daytime/evening attendance\t' in CSV headers)
+        self.index = {}
+        for i, name in enumerate(self.feature_names):
+            self.index[name] = i
+            self.index.setdefault(name.strip(), i)
+
+        # Text option -> code, per column
+        category_maps = category_maps or {}
+        shared_map = shared_map or {}
+        self.text_maps = [{**shared_map, **category_maps.get(name, {})} for name in self.feature_names]
+
+    @property
+    def n_features(self):
+        return len(self.feature_names)
+
+    def _columns(self, data):
+        """(row count, {feature index: column values}) for the supported input shapes."""
+        if isinstance(data, pd.DataFrame):
+            columns = {}
+            for col in data.columns:
+                i = self.index.get(col, self.index.get(str(col).strip()))
+                if i is not None:
+                    columns[i] = data[col].to_numpy()
+            return len(data), columns
+
+        records = [data] if isinstance(data, dict) else list(data)
+        keys = set().union(*records) if records else set()
+        columns = {}
+        for key in keys:
+            i = self.index.get(key, self.index.get(str(key).strip()))
+            if i is not None:
+                columns[i] = [record.get(key) for record in records]
+        return len(records), columns
+
+    def _encode_column(self, i, values):
+        if not isinstance(values, np.ndarray):
+            values = np.asarray(values, dtype=object)
+        try:
+            # Fast path: numbers (or numeric strings) only
+            out = values.astype(np.float64)
+        except (ValueError, TypeError):
+            # Text options first, then anything that still parses as a number
+            table = self.text_maps[i]
+            if len(values) <= LOOP_MAX_ROWS:
+                out = np.fromiter((_lookup(table, v) for v in values), dtype=np.float64, count=len(values))
+            else:
+                out = _lookup_column(table, values)
+        return np.where(np.isnan(out), self.defaults[i], out)
+
+    def transform(self, data):
+        """Encode records into an (n_rows, n_features) C-contiguous array."""
+        with instruments.span("encode", model=self.name):
+            return self._transform(data)
+
+    def _transform(self, data):
+        n_rows, columns = self._columns(data)
+        X = np.empty((n_rows, self.n_features), dtype=self.dtype)
+        X[:] = self.defaults
+        for i, values in columns.items():
+            X[:, i] = self._encode_column(i, values)
+        return X
+
+    def frame(self, data):
+        """Same as transform, wrapped in a DataFrame with the model's column names."""
+        index = data.index if isinstance(data, pd.DataFrame) else None
+        return pd.DataFrame(self.transform(data), columns=self.feature_names, index=index)
+
+
+class ShipEncoder:
+    """Fixed-layout one-hot encoder for the ship clustering features.
+
+    Replaces pd.get_dummies + column alignment: the numeric features and one
+    1.0 per categorical feature are written straight into a preallocated
+    (n_rows, len(onehot_features)) array whose column order is the one the
+    scaler and k-means were trained on. `category_columns` maps every accepted
+    category value to its trained column and is validated up front.
+    """
+
+    def __init__(self, numerical_features, categorical_features, onehot_features, category_columns, name=None):
+        self.name = name
+        self.columns = list(onehot_features)
+        position = {name: i for i, name in enumerate(self.columns)}
+
+        missing = [f for f in numerical_features if f not in position]
+        if missing:
+            raise ValueError(f"Numerical features not in the one-hot layout: {missing}")
+        self.numerical_features = list(numerical_features)
+        self.numeric_index = np.array([position[f] for f in self.numerical_features])
+
+        # feature -> (accepted values, matching column positions)
+        self.categories = {}
+        for feature in categorical_features:
+            mapping = category_columns.get(feature, {})
+            unmapped = [v for v in categorical_features[feature] if v not in mapping]
+            unknown = [c for c in mapping.values() if c not in position]
+            if unmapped or unknown:
+                raise ValueError(f"Bad mapping for {feature}: unmapped options {unmapped}, "
+                                 f"unknown columns {unknown}")
+            self.categories[feature] = (pd.Index(list(mapping)),
+                                        np.array([position[c] for c in mapping.values()]))
+
+    @property
+    def n_features(self):
+        return len(self.columns)
+
+    def _columns(self, data):
+        if isinstance(data, pd.DataFrame):
+            return len(data), {col: data[col].to_numpy() for col in data.columns}
+        records = [data] if isinstance(data, dict) else list(data)
+        keys = (set(self.numerical_features) | set(self.categories)) & set().union(*records)
+        return len(records), {key: [record.get(key) for record in records] for key in keys}
+
+    def transform(self, data, errors="raise"):
+        """Encode records into an (n_rows, 29) float64 array.
+
+        errors="raise" rejects missing features and unknown category values;
+        errors="ignore" leaves unknown categories as all-zero rows (the old
+        get_dummies behaviour) and missing numbers as NaN.
+        """
+        with instruments.span("encode", model=self.name):
+            return self._transform(data, errors)
+
+    def _transform(self, data, errors):
+        n_rows, columns = self._columns(data)
+        X = np.zeros((n_rows, self.n_features), dtype=np.float64)
+
+        for feature, i in zip(self.numerical_features, self.numeric_index):
+            if feature not in columns:
+                if errors == "raise":
+                    raise ValueError(f"Missing numerical feature '{feature}'")
+                X[:, i] = np.nan
+                continue
+            X[:, i] = np.asarray(columns[feature], dtype=np.float64)
+            # A record without the key (or with None) in a batch comes through as NaN
+            if errors == "raise" and np.isnan(X[:, i]).any():
+                raise ValueError(f"Missing numerical feature '{feature}'")
+
+        rows = np.arange(n_rows)
+        for feature, (options, targets) in self.categories.items():
+            if feature not in columns:
+                if errors == "raise":
+                    raise ValueError(f"Missing categorical feature '{feature}'")
+                continue
+            values = pd.Series(columns[feature], dtype=object).astype(str).str.strip()
+            codes = options.get_indexer(values)
+            valid = codes >= 0
+            if errors == "raise" and not valid.all():
+                bad = sorted(set(values[~valid]))[:5]
+                raise ValueError(f"Unknown {feature} value(s) {bad}; expected one of {list(options)}")
+            X[rows[valid], targets[codes[valid]]] = 1.0
+        return X
+
+    def frame(self, data, errors="raise"):
+        """Same as transform, wrapped in a DataFrame with the trained column names."""
+        index = data.index if isinstance(data, pd.DataFrame) else None
+        return pd.DataFrame(self.transform(data, errors), columns=self.columns, index=index)
+
+
+# ==============================
+# ENCODERS USED BY THE APPS
+# ==============================
+STUDENT_ENCODER = FeatureEncoder(ST_feature_names, ST_defaults, ST_CATEGORY_MAPS, shared_map=YES_NO_MAP,
+                                 name="student")
+CANCER_ENCODER = FeatureEncoder(CA_feature_names, CA_defaults, name="cancer")
+SHIP_ENCODER = ShipEncoder(numerical_features, categorical_features, all_onehot_features, SHIP_CATEGORY_COLUMNS,
+                           name="ship")
+
+
+@instruments.timed("prepare", model="student")
+def prepare_std_input(user_inputs, defaults=ST_defaults):
+    """One-row student model input from the app's widget values."""
+    encoder = STUDENT_ENCODER
+    if defaults != ST_defaults:
+        encoder = FeatureEncoder(ST_feature_names, defaults, ST_CATEGORY_MAPS, shared_map=YES_NO_MAP,
+                                 name="student")
+    return encoder.frame(user_inputs)
+
+
+@instruments.timed("prepare", model="cancer")
+def prepare_can_inputs(user_inputs, defaults=CA_defaults):
+    """One-row cancer model input from the app's widget values."""
+    encoder = CANCER_ENCODER if defaults == CA_defaults else FeatureEncoder(CA_feature_names, defaults, name="cancer")
+    return encoder.frame(user_inputs)
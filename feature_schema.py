@@ -0,0 +1,195 @@
+# Feature names, defaults and label maps shared by the apps and the batch tools.
+
+#================================================================Students Data=====================================================================================
+
+#Feature names Expected by model
+ST_feature_names  = ['Marital status', 'Application mode', 'Application order', 'Course', 'Daytime/evening attendance\t', 'Previous qualification', 'Previous qualification (grade)', 'Nacionality', "Mother's qualification", "Father's qualification", "Mother's occupation", "Father's occupation", 'Admission grade', 'Displaced', 'Educational special needs', 'Debtor', 'Tuition fees up to date', 'Gender', 'Scholarship holder', 'Age at enrollment', 'International', 'Curricular units 1st sem (credited)', 'Curricular units 1st sem (enrolled)', 'Curricular units 1st sem (evaluations)', 'Curricular units 1st sem (approved)', 'Curricular units 1st sem (grade)', 'Curricular units 1st sem (without evaluations)', 'Curricular units 2nd sem (credited)', 'Curricular units 2nd sem (enrolled)', 'Curricular units 2nd sem (evaluations)', 'Curricular units 2nd sem (approved)', 'Curricular units 2nd sem (grade)', 'Curricular units 2nd sem (without evaluations)', 'Unemployment rate', 'Inflation rate', 'GDP']
+
+# Set default values for all features
+ST_defaults = {
+    'Marital status': 1.0, 'Application mode': 17.0, 'Application order': 1.0, 'Course': 9238.0, 'Daytime/evening attendance\t': 1.0, 'Previous qualification': 1.0, 'Previous qualification (grade)': 133.1, 'Nacionality': 1.0, "Mother's qualification": 19.0, "Father's qualification": 19.0, "Mother's occupation": 5.0, "Father's occupation": 7.0, 'Admission grade': 126.0, 'Displaced': 1.0, 'Educational special needs': 0.0, 'Debtor': 0.0, 'Tuition fees up to date': 1.0, 'Gender': 0.0, 'Scholarship holder': 0.0, 'Age at enrollment': 20.0, 'International': 0.0, 'Curricular units 1st sem (credited)': 0.0, 'Curricular units 1st sem (enrolled)': 6.0, 'Curricular units 1st sem (evaluations)': 8.0, 'Curricular units 1st sem (approved)': 5.0, 'Curricular units 1st sem (grade)': 12.32, 'Curricular units 1st sem (without evaluations)': 0.0, 'Curricular units 2nd sem (credited)': 0.0, 'Curricular units 2nd sem (enrolled)': 6.0, 'Curricular units 2nd sem (evaluations)': 8.0, 'Curricular units 2nd sem (approved)': 5.0, 'Curricular units 2nd sem (grade)': 12.2, 'Curricular units 2nd sem (without evaluations)': 0.0, 'Unemployment rate': 11.1, 'Inflation rate': 1.4, 'GDP': 0.32
+}
+
+MOTHER_OCCU_MAP = {
+    "Unemployed": 0.0,
+    "Student": 1.0,
+    "Professional": 2.0,
+    "Administrative staff": 3.0,
+    "Service worker": 4.0,
+    "Manual laborer": 5.0,
+    "Other": 6.0
+}
+
+MARITAL_MAP = {
+    "Single": 1.0, "Married": 2.0, "Widower": 3.0,
+    "Divorced": 4.0, "Legally Separated": 5.0, "Other": 6.0
+}
+
+GENDER_MAP = {"Female": 0.0, "Male": 1.0}
+
+ATTENDANCE_MAP = {"Daytime": 1.0, "Evening": 0.0}
+
+YES_NO_MAP = {"Yes": 1.0, "No": 0.0}
+
+# Text options per student feature ("Yes"/"No" is accepted for every feature)
+ST_CATEGORY_MAPS = {
+    "Marital status": MARITAL_MAP,
+    "Gender": GENDER_MAP,
+    "Daytime/evening attendance\t": ATTENDANCE_MAP,
+    "Mother's occupation": MOTHER_OCCU_MAP,
+}
+
+# Class index -> outcome
+labels = ["Dropout", "Enrolled", "Graduate"]
+
+# What-if sweeps (whatif.py): (min, max, step) of the numeric features, matching the app's inputs
+STUDENT_SWEEP_RANGES = {
+    "Curricular units 1st sem (approved)": (0.0, 26.0, 1.0),
+    "Curricular units 1st sem (grade)": (0.0, 20.0, 0.5),
+    "Curricular units 2nd sem (approved)": (0.0, 26.0, 1.0),
+    "Curricular units 2nd sem (evaluations)": (0.0, 33.0, 1.0),
+    "Curricular units 2nd sem (grade)": (0.0, 20.0, 0.5),
+    "Curricular units 1st sem (enrolled)": (0.0, 30.0, 1.0),
+    "Curricular units 2nd sem (enrolled)": (0.0, 30.0, 1.0),
+    "Age at enrollment": (16.0, 70.0, 1.0),
+    "Admission grade": (0.0, 200.0, 5.0),
+    "Previous qualification (grade)": (0.0, 200.0, 5.0),
+    "Unemployment rate": (0.0, 30.0, 1.0),
+    "Inflation rate": (-5.0, 20.0, 1.0),
+    "GDP": (-5.0, 5.0, 0.25),
+}
+
+# Features the app shows as Yes/No
+STUDENT_YES_NO_FEATURES = ["Tuition fees up to date", "Debtor", "Scholarship holder", "Displaced",
+                           "International", "Educational special needs"]
+
+SWEEP_FEATURES = list(STUDENT_SWEEP_RANGES) + STUDENT_YES_NO_FEATURES + list(ST_CATEGORY_MAPS)
+
+
+#================================================================Cancer Data=====================================================================================
+
+CA_feature_names = ['avganncount', 'avgdeathsperyear', 'incidencerate', 'medincome', 'popest2015', 'povertypercent', 'studypercap', 'medianage', 'medianagemale', 'medianagefemale', 'percentmarried', 'pctnohs18_24', 'pcths18_24', 'pctsomecol18_24', 'pctbachdeg18_24', 'pcths25_over', 'pctbachdeg25_over', 'pctemployed16_over', 'pctunemployed16_over', 'pctprivatecoverage', 'pctprivatecoveragealone', 'pctempprivcoverage', 'pctpubliccoverage', 'pctpubliccoveragealone', 'pctwhite', 'pctblack', 'pctasian', 'pctotherrace', 'pctmarriedhouseholds', 'birthrate']
+
+CA_defaults = {'avganncount': 169.0, 'avgdeathsperyear': 61.0, 'incidencerate': 453.5494221, 'medincome': 45269.0, 'popest2015': 25788.0, 'povertypercent': 15.8, 'studypercap': 0.0, 'medianage': 41.0, 'medianagemale': 39.6, 'medianagefemale': 42.4, 'percentmarried': 52.5, 'pctnohs18_24': 17.2, 'pcths18_24': 34.8, 'pctsomecol18_24': 40.4, 'pctbachdeg18_24': 5.4, 'pcths25_over': 35.4, 'pctbachdeg25_over': 12.4, 'pctemployed16_over': 54.5, 'pctunemployed16_over': 7.6, 'pctprivatecoverage': 65.1, 'pctprivatecoveragealone': 48.7, 'pctempprivcoverage': 41.1, 'pctpubliccoverage': 36.4, 'pctpubliccoveragealone': 18.8, 'pctwhite': 90.12443712, 'pctblack': 2.231905108, 'pctasian': 0.543811087, 'pctotherrace': 0.844356882, 'pctmarriedhouseholds': 51.70068027, 'birthrate': 5.356186395}
+
+
+#================================================================Ship Data=====================================================================================
+
+# Feature lists (update these to match your 29 columns!)
+numerical_features = [
+    'Speed_Over_Ground_knots', 'Engine_Power_kW', 'Distance_Traveled_nm',
+    'Draft_meters', 'Cargo_Weight_tons', 'Operational_Cost_USD',
+    'Revenue_per_Voyage_USD', 'Turnaround_Time_hours',
+    'Efficiency_nm_per_kWh', 'Seasonal_Impact_Score',
+    'Weekly_Voyage_Count', 'Average_Load_Percentage'
+]
+
+categorical_features = {
+    'Ship_Type': ['Bulk', 'Container', 'Fish', 'Tanker'],
+    'Engine_Type': ['Diesel', 'HFO', 'Steam Turbine'],
+    'Maintenance_Status': ['Good', 'Fair', 'Critical'],
+    'Route_Type': ['Coastal', 'Transoceanic', 'Long haul', 'short haul'],
+    'Weather_Condition': ['Calm', 'Moderate', 'Rough']
+}
+
+all_onehot_features = [
+ 'Speed_Over_Ground_knots',    #سرعة السفينة على الارض بالميل البحري في الساعة
+ 'Engine_Power_kW',            #انتاج الطاقة من المحرك الرئيسي اثناء الرحلة بالكيلووات
+ 'Distance_Traveled_nm',       #اجمالي الاميال البحرية التي سيتم اجتيازهااثناءالرحلة     nm = nautical mile
+ 'Draft_meters',               #العمق الرأسي لهيكل السفينة تحت الماء
+ 'Cargo_Weight_tons',          #الوزن الاجمالي للبضائع المنقولة
+ 'Operational_Cost_USD',       #التكلفة الاجمالية لتشغيل السفينة لهذه الرحلة
+ 'Revenue_per_Voyage_USD',     #الدخل المتولد من الرحلة(عقود الشحن) 
+ 'Turnaround_Time_hours',      #الوقت التس تقضيه في الميناء للشحن/التفريغ والتزود بالوقود
+ 'Efficiency_nm_per_kWh',      #مقياس الاداء الرئيسي, الاميال البحرية المقطوعة لكل كيلووات/ساعة من الطاقة
+ 'Seasonal_Impact_Score',      #مقدار الموسمية التي اثرت على العمليات درجة مشتقة من 1-9
+ 'Weekly_Voyage_Count',        #عدد الرحلات التي تكملها السفينة عادة في الاسبوع
+ 'Average_Load_Percentage',    #مدى امتلاء السفينة كنسبة مئوية من السعة الكلية
+ 'Ship_Type_Bulk Carrier',     #تصميم السفينة نقل سائب
+ 'Ship_Type_Container Ship',   #تصميم السفينة سفينة حاويات
+ 'Ship_Type_Fish Carrier',     #تصميم السفينة نقل سمك 
+ 'Ship_Type_Tanker',           #تصميم السفينة ناقلة
+ 'Route_Type_Coastal',         #طبيعة طريص الشحن : ساحلي
+ 'Route_Type_Long-haul',       #طبيعة طريص الشحن :مدى طويل 
+ 'Route_Type_Short-haul',      #طبيعة طريص الشحن : مدى قصير
+ 'Route_Type_Transoceanic',    #طبيعة طريص الشحن : عبر المحيط
+ 'Engine_Type_Diesel',         # نوع نظام الدفع: ديزل
+ 'Engine_Type_Heavy Fuel Oil (HFO)', # نوع نظام الدفع: زيت نقل ثقيل
+ 'Engine_Type_Steam Turbine',  # نوع نظام الدفع:توربين بخاري
+ 'Maintenance_Status_Critical', #حالة الصيانة: حرجة
+ 'Maintenance_Status_Fair',     #حالة الصيانة:  مُعرض
+ 'Maintenance_Status_Good',     #حالة الصيانة: جيدة
+ 'Weather_Condition_Calm',      
+ 'Weather_Condition_Moderate',
+ 'Weather_Condition_Rough']
+
+#cluster labels
+cluster_labels = {
+    0: "High-Cost Carriers",
+    1: "Cost-Efficient Carriers",
+    2: "Specialized Vessels"
+}
+
+# Descriptions for users
+cluster_descriptions = {
+    "High-Cost Carriers": (
+        "Vessels with higher operational costs and critical maintenance needs. "
+        "Often older bulk/tanker ships using Heavy Fuel Oil (HFO). Consider efficiency upgrades."
+    ),
+    "Cost-Efficient Carriers": (
+        "Modern, well-maintained ships (often bulk/container) with diesel engines. "
+        "Lowest operational cost and reliable performance — ideal for standard voyages."
+    ),
+    "Specialized Vessels": (
+        "Typically fishing or niche vessels (e.g., steam-powered). "
+        "Well-maintained but technologically distinct. Best for specialized operations, not general cargo."
+    )
+}
+
+# Recommendation shown for each operational group
+cluster_recommendations = {
+    "High-Cost Carriers": (
+        "This vessel shows signs of high operational cost. "
+        "Consider engine retrofit or preventive maintenance."
+    ),
+    "Cost-Efficient Carriers": (
+        "This is a benchmark vessel. "
+        "Use its settings (e.g., load %, speed) as a standard for similar ships."
+    ),
+    "Specialized Vessels": (
+        "This vessel is optimized for niche operations. "
+        "Avoid assigning it to standard cargo routes."
+    )
+}
+
+# Category value -> trained one-hot column. Covers both the app's short options
+# ('Bulk', 'HFO', 'Long haul') and the spellings used in the training data.
+SHIP_CATEGORY_COLUMNS = {
+    'Ship_Type': {
+        'Bulk': 'Ship_Type_Bulk Carrier', 'Bulk Carrier': 'Ship_Type_Bulk Carrier',
+        'Container': 'Ship_Type_Container Ship', 'Container Ship': 'Ship_Type_Container Ship',
+        'Fish': 'Ship_Type_Fish Carrier', 'Fish Carrier': 'Ship_Type_Fish Carrier',
+        'Tanker': 'Ship_Type_Tanker',
+    },
+    'Engine_Type': {
+        'Diesel': 'Engine_Type_Diesel',
+        'HFO': 'Engine_Type_Heavy Fuel Oil (HFO)', 'Heavy Fuel Oil (HFO)': 'Engine_Type_Heavy Fuel Oil (HFO)',
+        'Steam Turbine': 'Engine_Type_Steam Turbine',
+    },
+    'Maintenance_Status': {
+        'Good': 'Maintenance_Status_Good',
+        'Fair': 'Maintenance_Status_Fair',
+        'Critical': 'Maintenance_Status_Critical',
+    },
+    'Route_Type': {
+        'Coastal': 'Route_Type_Coastal',
+        'Transoceanic': 'Route_Type_Transoceanic',
+        'Long haul': 'Route_Type_Long-haul', 'Long-haul': 'Route_Type_Long-haul',
+        'short haul': 'Route_Type_Short-haul', 'Short-haul': 'Route_Type_Short-haul',
+    },
+    'Weather_Condition': {
+        'Calm': 'Weather_Condition_Calm',
+        'Moderate': 'Weather_Condition_Moderate',
+        'Rough': 'Weather_Condition_Rough',
+    },
+}
@@ -0,0 +1,84 @@
+import numpy as np
+
+from feature_schema import cluster_labels, cluster_descriptions, cluster_recommendations
+from instrumentation import instruments
+from model_registry import registry
+
+
+class FusedClusterPredictor:
+    """StandardScaler + KMeans.predict folded into one linear scoring step.
+
+    For a scaler with mean m and scale s and scaled centroids c_k:
+
+        ||(x - m) / s - c_k||^2 = ||x / s - d_k||^2,    d_k = c_k + m / s
+                                = ||x / s||^2 - 2 x . (d_k / s) + ||d_k||^2
+
+    The first term is the same for every cluster, so the nearest centroid is
+    argmax_k (x @ W + b) with W = 2 d / s and b = -||d||^2, both computed once
+    from the saved models. One matrix product labels a whole batch of raw
+    (unscaled) 29-column rows, without building the scaled copy.
+    """
+
+    def __init__(self, scaler, kmeans):
+        n_features = kmeans.cluster_centers_.shape[1]
+        # sklearn still fits mean_ with with_mean=False, but transform doesn't subtract it
+        mean = scaler.mean_ if scaler.with_mean and scaler.mean_ is not None else np.zeros(n_features)
+        scale = scaler.scale_ if scaler.with_std and scaler.scale_ is not None else np.ones(n_features)
+
+        shifted = kmeans.cluster_centers_ + mean / scale
+        self.weights = np.ascontiguousarray((2.0 * shifted / scale).T)
+        self.offsets = -np.einsum("ij,ij->i", shifted, shifted)
+        self.n_clusters = kmeans.cluster_centers_.shape[0]
+        self.feature_names_in_ = getattr(scaler, "feature_names_in_", None)
+
+    def scores(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.weights + self.offsets
+
+    def predict(self, X):
+        """Cluster id per row of raw (unscaled) features."""
+        # Scaling is folded into the weights, so this span covers both steps
+        with instruments.span("scale_cluster", path="fused"):
+            return self.scores(X).argmax(axis=1)
+
+
+def two_step_predict(scaler, kmeans, X):
+    """The original path: scaler.transform, then kmeans.predict."""
+    with instruments.span("scale", path="two_step"):
+        X_scaled = scaler.transform(X)
+    with instruments.span("cluster", path="two_step"):
+        return kmeans.predict(X_scaled)
+
+
+def check_parity(scaler, kmeans, X):
+    """Number of rows where the fused and two-step paths disagree (should be 0)."""
+    fused = FusedClusterPredictor(scaler, kmeans).predict(X)
+    return int((fused != two_step_predict(scaler, kmeans, X)).sum())
+
+
+def describe_clusters(cluster_ids):
+    """Cluster id, label, description and recommendation per predicted cluster id."""
+    results = []
+    for cluster_id in cluster_ids:
+        label = cluster_labels[int(cluster_id)]
+        results.append({"cluster": int(cluster_id), "label": label,
+                        "description": cluster_descriptions[label],
+                        "recommendation": cluster_recommendations[label]})
+    return results
+
+
+_fused = {}
+
+
+def fleet_predictor():
+    """Fused predictor for the registry's current scaler.pkl / kmeans_model.pkl.
+
+    Picks up a new kmeans checkpoint (see fleet_reclustering.py) on the next call.
+    """
+    registry.reload_if_changed("scaler")
+    registry.reload_if_changed("kmeans")
+    scaler, kmeans = registry.get("scaler"), registry.get("kmeans")
+    key = (id(scaler), id(kmeans))
+    if key not in _fused:
+        _fused.clear()
+        _fused[key] = FusedClusterPredictor(scaler, kmeans)
+    return _fused[key]
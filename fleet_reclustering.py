@@ -0,0 +1,252 @@
+"""Incremental re-clustering of the ship fleet from streaming voyage batches.
+
+Usage:
+    python -m fleet_reclustering voyages.csv [more.jsonl ...] [--batch-rows 4096] [--output fleet.pkl]
+    python -m fleet_reclustering --watch incoming/ [--checkpoint-every 10] --promote
+    python -m fleet_reclustering - < voyages.jsonl
+
+kmeans_model.pkl is a one-off fit. FleetReclusterer starts from its
+centroids and moves them with the mini-batch k-means update (the rule
+behind sklearn's MiniBatchKMeans.partial_fit): every centroid keeps a count
+of the voyages it has absorbed, and a batch moves it towards the mean of its
+new voyages with step m / (count + m). The counts start from the original
+fit's cluster sizes, so the first batch doesn't throw away the old fit;
+--max-count caps them so the groups keep following the fleet as routes change.
+
+Rows are encoded with SHIP_ENCODER and scaled with scaler.pkl, exactly as for
+prediction. Before each checkpoint the new centroids are matched to the
+previous checkpoint's with the Hungarian algorithm (minimum total squared
+distance), so centroid k stays cluster_labels[k]. A checkpoint is a KMeans
+like the original, written to a temporary file and renamed over the target,
+so readers never see a half-written model. Without --output, each run
+writes a new versioned checkpoint under FLEET_CHECKPOINT_DIR
+(kmeans_model-<UTC time>.pkl). The registry's kmeans_model.pkl is only
+replaced with --promote, which copies every checkpoint over it (again
+atomically); the apps' fleet_predictor() notices the new file and swaps to
+it on its next call.
+"""
+import argparse
+import copy
+import itertools
+import os
+import shutil
+import sys
+import time
+
+import joblib as jb
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+
+import fleet_stream
+from feature_encoder import SHIP_ENCODER
+from feature_schema import cluster_labels
+from instrumentation import instruments
+from model_registry import registry
+
+DEFAULT_BATCH_ROWS = 4096
+# Checkpoint after this many batches (and at the end of the input)
+DEFAULT_CHECKPOINT_EVERY = 10
+# Where checkpoints go when no --output is given
+FLEET_CHECKPOINT_DIR = os.environ.get("FLEET_CHECKPOINT_DIR", os.path.join(registry.model_dir, "fleet_checkpoints"))
+
+
+def valid_rows(X):
+    """Rows with every number present and exactly one known option per categorical feature."""
+    ok = ~np.isnan(X[:, SHIP_ENCODER.numeric_index]).any(axis=1)
+    for _, targets in SHIP_ENCODER.categories.values():
+        ok &= X[:, np.unique(targets)].sum(axis=1) == 1.0
+    return ok
+
+
+def match_centroids(reference, centers):
+    """Order of `centers` that best lines them up with `reference` (Hungarian matching).
+
+    Returns (order, cost): centers[order][k] is the centroid matched to
+    reference[k], cost the total squared distance of the matching.
+    """
+    cost = ((reference[:, np.newaxis, :] - centers[np.newaxis, :, :]) ** 2).sum(axis=2)
+    rows, order = linear_sum_assignment(cost)
+    return order[np.argsort(rows)], float(cost[rows, order].sum())
+
+
+class FleetReclusterer:
+    """Mini-batch k-means updates of the fleet centroids, in scaler.pkl's scaled space."""
+
+    def __init__(self, scaler, kmeans, max_count=None):
+        self.scaler = scaler
+        self.kmeans = kmeans
+        self.max_count = max_count
+        self.centers = np.array(kmeans.cluster_centers_, dtype=np.float64)
+        # Voyages already behind each centroid: saved by an earlier checkpoint,
+        # else the original fit's cluster sizes
+        counts = getattr(kmeans, "sample_counts_", None)
+        if counts is None:
+            labels = getattr(kmeans, "labels_", None)
+            counts = np.bincount(labels, minlength=len(self.centers)) if labels is not None else np.ones(len(self.centers))
+        self.counts = np.array(counts, dtype=np.float64)
+        self.reference = self.centers.copy()
+        self.rows_seen = 0
+        self.batches = 0
+
+    @property
+    def n_clusters(self):
+        return len(self.centers)
+
+    def partial_fit(self, X):
+        """Update the centroids with one batch of raw (encoded, unscaled) rows."""
+        X = np.asarray(X, dtype=np.float64)
+        X = X[valid_rows(X)]
+        if not len(X):
+            return self
+        with instruments.span("recluster", rows=len(X)):
+            Z = self.scaler.transform(_as_frame(X))
+            distances = (Z ** 2).sum(axis=1)[:, np.newaxis] - 2 * Z @ self.centers.T + (self.centers ** 2).sum(axis=1)
+            labels = distances.argmin(axis=1)
+
+            batch_counts = np.bincount(labels, minlength=self.n_clusters).astype(np.float64)
+            sums = np.zeros_like(self.centers)
+            np.add.at(sums, labels, Z)
+
+            moved = batch_counts > 0
+            counts = self.counts + batch_counts
+            # c += (sum - m c) / (n + m): the running mean of everything assigned so far
+            self.centers[moved] += (sums[moved] - batch_counts[moved, np.newaxis] * self.centers[moved]) \
+                / counts[moved, np.newaxis]
+            self.counts = counts if self.max_count is None else np.minimum(counts, self.max_count)
+        self.rows_seen += len(X)
+        self.batches += 1
+        return self
+
+    def to_kmeans(self):
+        """A KMeans like kmeans_model.pkl with the updated centroids, in cluster_labels order."""
+        order, cost = match_centroids(self.reference, self.centers)
+        self.centers, self.counts = self.centers[order], self.counts[order]
+        self.reference = self.centers.copy()
+
+        kmeans = copy.deepcopy(self.kmeans)
+        kmeans.cluster_centers_ = self.centers.copy()
+        kmeans.sample_counts_ = self.counts.copy()
+        # Labels / inertia of the original training set no longer describe these centroids
+        for attr in ("labels_", "inertia_"):
+            if hasattr(kmeans, attr):
+                delattr(kmeans, attr)
+        return kmeans, {"order": order.tolist(), "matching_cost": cost}
+
+    def checkpoint(self, path):
+        """Atomically write the current model to `path`. Returns a summary."""
+        kmeans, matching = self.to_kmeans()
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        jb.dump(kmeans, tmp_path)
+        os.replace(tmp_path, path)
+        return {"path": path, "rows_seen": self.rows_seen, "batches": self.batches,
+                "counts": self.counts.round().astype(int).tolist(),
+                "groups": [cluster_labels[k] for k in range(self.n_clusters)], **matching}
+
+
+def versioned_path(checkpoint_dir=FLEET_CHECKPOINT_DIR):
+    """A new checkpoint path, kmeans_model-<UTC time>.pkl, in `checkpoint_dir`."""
+    stem, ext = os.path.splitext(os.path.basename(registry.path("kmeans")))
+    return os.path.join(checkpoint_dir, f"{stem}-{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}{ext}")
+
+
+def promote(path):
+    """Atomically copy the checkpoint at `path` over the registry's kmeans_model.pkl."""
+    target = registry.path("kmeans")
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    shutil.copyfile(path, tmp_path)
+    os.replace(tmp_path, target)
+    return target
+
+
+def _as_frame(X):
+    # The scaler was fitted on named columns
+    return pd.DataFrame(X, columns=SHIP_ENCODER.columns, copy=False)
+
+
+# ==============================
+# CLI
+# ==============================
+def _encode(records):
+    # Unknown categories are dropped later by valid_rows; unreadable numbers here
+    try:
+        return SHIP_ENCODER.transform(records, errors="ignore")
+    except (ValueError, TypeError):
+        if len(records) == 1:
+            return np.empty((0, SHIP_ENCODER.n_features))
+    half = len(records) // 2
+    return np.vstack([_encode(records[:half]), _encode(records[half:])])
+
+
+def iter_batches(records, batch_rows=DEFAULT_BATCH_ROWS):
+    """Encoded (raw) batches of up to `batch_rows` records; None passes through as 'idle'."""
+    batch = []
+    for record in itertools.chain(records, [None]):
+        if record is not None:
+            batch.append(record)
+        if batch and (record is None or len(batch) >= batch_rows):
+            yield _encode(batch)
+            batch = []
+        if record is None:
+            yield None
+
+
+def _read_file(path):
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        yield from fleet_stream.iter_records(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Update the fleet clusters from new voyage records.")
+    parser.add_argument("inputs", nargs="*", default=["-"], help="CSV / JSONL files ('-' = stdin, the default)")
+    parser.add_argument("--watch", metavar="DIR", help="follow the CSV/JSONL files in a directory instead")
+    parser.add_argument("--output", default=None,
+                        help="checkpoint path (default: a new versioned file in FLEET_CHECKPOINT_DIR)")
+    parser.add_argument("--promote", action="store_true",
+                        help="also replace the registry's kmeans_model.pkl with every checkpoint")
+    parser.add_argument("--batch-rows", type=int, default=DEFAULT_BATCH_ROWS)
+    parser.add_argument("--checkpoint-every", type=int, default=DEFAULT_CHECKPOINT_EVERY, help="batches")
+    parser.add_argument("--max-count", type=float, default=None,
+                        help="cap on each centroid's voyage count (smaller = adapts faster)")
+    parser.add_argument("--poll-seconds", type=float, default=fleet_stream.DEFAULT_POLL_SECONDS)
+    parser.add_argument("--once", action="store_true", help="with --watch: read the directory once and exit")
+    args = parser.parse_args(argv)
+
+    output = args.output or versioned_path()
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    reclusterer = FleetReclusterer(registry.get("scaler"), registry.get("kmeans"), args.max_count)
+
+    if args.watch:
+        records = fleet_stream.watch_records(args.watch, args.poll_seconds, args.once)
+    else:
+        records = itertools.chain.from_iterable(
+            fleet_stream.iter_records(sys.stdin) if path == "-" else _read_file(path) for path in args.inputs)
+
+    def checkpoint():
+        summary = reclusterer.checkpoint(output)
+        if args.promote:
+            summary["promoted"] = promote(output)
+        return summary
+
+    start, pending = time.perf_counter(), 0
+    try:
+        for X in iter_batches(records, args.batch_rows):
+            if X is not None:
+                reclusterer.partial_fit(X)
+                pending += 1
+            # Checkpoint every N batches, and whenever the input goes idle
+            if pending and (X is None or pending >= args.checkpoint_every):
+                summary = checkpoint()
+                pending = 0
+                seconds = time.perf_counter() - start
+                promoted = f" (promoted to {summary['promoted']})" if args.promote else ""
+                print(f"checkpoint after {summary['rows_seen']} voyages ({summary['rows_seen'] / seconds:.0f} rows/s): "
+                      f"counts {summary['counts']}, matching cost {summary['matching_cost']:.3f} -> {output}{promoted}",
+                      file=sys.stderr, flush=True)
+    except KeyboardInterrupt:
+        if pending:
+            checkpoint()
+
+
+if __name__ == "__main__":
+    main()
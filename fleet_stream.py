@@ -0,0 +1,264 @@
+"""Streaming fleet scoring of voyage logs with the ship clustering model.
+
+Usage:
+    python -m fleet_stream < voyages.csv > clusters.jsonl
+    python -m fleet_stream --input voyages.jsonl --output clusters.jsonl
+    python -m fleet_stream --watch incoming/ [--poll-seconds 2] [--once]
+
+Records are CSV rows or JSON lines with the 12 numerical_features and the 5
+categorical_features (the app's short options or the training spellings).
+They are read one line at a time, encoded with SHIP_ENCODER and clustered
+with the fused scaler + k-means in chunks of --chunk-rows, and one JSON line
+per voyage is written with the cluster id, label, description and
+recommendation. Memory only depends on --chunk-rows, not on the size of the
+stream. A line that isn't a JSON object, or a record that can't be encoded,
+gets an "error" line instead of stopping the stream. Throughput goes to
+stderr.
+
+--watch follows every *.csv / *.jsonl file in a directory, like `tail -f`:
+lines appended to a file are scored on the next poll, and new files are
+picked up as they appear.
+"""
+import argparse
+import csv
+import glob
+import itertools
+import json
+import os
+import sys
+import time
+
+from feature_encoder import SHIP_ENCODER
+from fleet_clustering import describe_clusters, fleet_predictor
+from instrumentation import instruments
+
+DEFAULT_CHUNK_ROWS = 4096
+DEFAULT_POLL_SECONDS = 2.0
+# Seconds between throughput lines on stderr
+DEFAULT_REPORT_SECONDS = 10.0
+
+WATCH_PATTERNS = ("*.csv", "*.jsonl", "*.ndjson")
+
+
+# ==============================
+# READING
+# ==============================
+class InvalidRecord(dict):
+    """Stands in for an unreadable JSON line: an empty record carrying the reason."""
+
+    def __init__(self, error):
+        super().__init__()
+        self.error = error
+
+
+def _parse_json(line):
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return InvalidRecord(f"invalid JSON: {e}")
+    if not isinstance(record, dict):
+        return InvalidRecord(f"expected a JSON object, got {type(record).__name__}")
+    return record
+
+
+def iter_records(lines, fmt=None, fieldnames=None):
+    """Yield one dict per voyage from an iterator of CSV or JSON-lines text.
+
+    The format is guessed from the first non-blank line when not given. CSV
+    takes its header from the first line unless `fieldnames` is passed. A
+    JSON line that doesn't parse to an object yields an InvalidRecord, which
+    score_chunk reports as an error line.
+    """
+    lines = iter(lines)
+    first = next((line for line in lines if line.strip()), None)
+    if first is None:
+        return
+    lines = itertools.chain([first], lines)
+    if fmt is None:
+        fmt = "jsonl" if first.lstrip().startswith("{") else "csv"
+
+    if fmt == "jsonl":
+        for line in lines:
+            if line.strip():
+                yield _parse_json(line)
+    else:
+        yield from csv.DictReader(lines, fieldnames=fieldnames)
+
+
+def _format_of(path):
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def _new_lines(path, state):
+    """Complete lines appended to `path` since the last call; advances state['offset']."""
+    with open(path, "rb") as f:
+        f.seek(state["offset"])
+        for raw in iter(f.readline, b""):
+            if not raw.endswith(b"\n"):
+                # Still being written: read it again on the next poll
+                break
+            # Drop a byte-order mark on the file's first line
+            encoding = "utf-8-sig" if state["offset"] == 0 else "utf-8"
+            state["offset"] += len(raw)
+            yield raw.decode(encoding)
+
+
+def watch_records(directory, poll_seconds=DEFAULT_POLL_SECONDS, once=False):
+    """Yield the records of every CSV/JSONL file in `directory`, following appends.
+
+    Yields None before each wait. With once=True the directory is read a
+    single time and the generator ends.
+    """
+    files = {}
+    while True:
+        paths = sorted({p for pattern in WATCH_PATTERNS for p in glob.glob(os.path.join(directory, pattern))},
+                       key=os.path.getmtime)
+        for path in paths:
+            state = files.setdefault(path, {"offset": 0, "header": None})
+            if os.path.getsize(path) < state["offset"]:
+                # Rotated / truncated: start over
+                state.update(offset=0, header=None)
+            fmt = _format_of(path)
+            lines = _new_lines(path, state)
+            if fmt == "csv" and state["header"] is None:
+                first = next(lines, None)
+                if first is None:
+                    continue
+                state["header"] = next(csv.reader([first]))
+            yield from iter_records(lines, fmt, state["header"])
+        if once:
+            return
+        # Nothing new until the next poll: let the caller flush its partial chunk
+        yield None
+        time.sleep(poll_seconds)
+
+
+# ==============================
+# SCORING
+# ==============================
+def _with_id(results, records, id_field):
+    if id_field is None:
+        return results
+    return [{id_field: record.get(id_field), **result} for record, result in zip(records, results)]
+
+
+def score_chunk(records, predictor=None, id_field=None):
+    """Cluster results for one chunk of records, one dict per record.
+
+    If the chunk doesn't encode (a bad value or a missing feature), it is
+    split in halves until the bad records are isolated; those get
+    {"error": ...} and the rest are still scored in batches.
+    """
+    predictor = predictor if predictor is not None else fleet_predictor()
+    if any(isinstance(record, InvalidRecord) for record in records):
+        # Score the readable records together, then put the errors back in place
+        scored = iter(score_chunk([r for r in records if not isinstance(r, InvalidRecord)], predictor, id_field))
+        return [_with_id([{"error": r.error}], [r], id_field)[0] if isinstance(r, InvalidRecord) else next(scored)
+                for r in records]
+    if not records:
+        return []
+    try:
+        return _with_id(describe_clusters(predictor.predict(SHIP_ENCODER.transform(records))), records, id_field)
+    except (ValueError, TypeError) as e:
+        if len(records) == 1:
+            return _with_id([{"error": str(e)}], records, id_field)
+    half = len(records) // 2
+    return score_chunk(records[:half], predictor, id_field) + score_chunk(records[half:], predictor, id_field)
+
+
+def iter_scored(records, chunk_rows=DEFAULT_CHUNK_ROWS, id_field=None):
+    """Yield lists of results, one list per chunk of at most `chunk_rows` records.
+
+    A None in `records` scores the partial chunk right away (watch_records
+    sends one whenever it is about to wait for more data).
+    """
+    chunk = []
+    for record in itertools.chain(records, [None]):
+        if record is not None:
+            chunk.append(record)
+        if chunk and (record is None or len(chunk) >= chunk_rows):
+            with instruments.span("stream_chunk", rows=len(chunk)):
+                yield score_chunk(chunk, id_field=id_field)
+            chunk = []
+
+
+class Throughput:
+    """Voyages scored, errors and rate since start, printed every `every` seconds."""
+
+    def __init__(self, out=sys.stderr, every=DEFAULT_REPORT_SECONDS):
+        self.out = out
+        self.every = every
+        self.rows = self.errors = self.chunks = 0
+        self.start = self.last_report = time.perf_counter()
+
+    def add(self, results):
+        self.rows += len(results)
+        self.errors += sum("error" in r for r in results)
+        self.chunks += 1
+        if self.every and time.perf_counter() - self.last_report >= self.every:
+            self.report()
+
+    def summary(self):
+        seconds = time.perf_counter() - self.start
+        return {"rows": self.rows, "errors": self.errors, "chunks": self.chunks, "seconds": seconds,
+                "rows_per_sec": self.rows / seconds if seconds else 0.0}
+
+    def report(self):
+        s = self.summary()
+        self.last_report = time.perf_counter()
+        print(f"scored {s['rows']} voyages ({s['errors']} errors) in {s['seconds']:.1f}s "
+              f"({s['rows_per_sec']:.0f} rows/s)", file=self.out, flush=True)
+
+
+def stream(records, out, chunk_rows=DEFAULT_CHUNK_ROWS, id_field=None, throughput=None):
+    """Score `records` and write one JSON line per voyage to `out`. Returns the throughput summary."""
+    throughput = throughput if throughput is not None else Throughput(every=0)
+    for results in iter_scored(records, chunk_rows, id_field):
+        out.write("".join(json.dumps(r) + "\n" for r in results))
+        out.flush()
+        throughput.add(results)
+    return throughput.summary()
+
+
+# ==============================
+# CLI
+# ==============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cluster a stream of voyage records with the ship model.")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--input", default="-", help="CSV or JSONL file to read ('-' = stdin, the default)")
+    source.add_argument("--watch", metavar="DIR", help="follow the CSV/JSONL files in a directory")
+    parser.add_argument("--output", default="-", help="JSONL file to write ('-' = stdout, the default)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="input format (default: guessed)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help="records per model call")
+    parser.add_argument("--id-field", default=None, help="input field copied to every output line")
+    parser.add_argument("--poll-seconds", type=float, default=DEFAULT_POLL_SECONDS)
+    parser.add_argument("--once", action="store_true", help="with --watch: read the directory once and exit")
+    parser.add_argument("--report-seconds", type=float, default=DEFAULT_REPORT_SECONDS,
+                        help="seconds between throughput lines on stderr (0 = only at the end)")
+    args = parser.parse_args(argv)
+
+    if args.watch and not os.path.isdir(args.watch):
+        parser.error(f"not a directory: {args.watch}")
+
+    out = sys.stdout if args.output == "-" else open(args.output, "a")
+    throughput = Throughput(every=args.report_seconds)
+    try:
+        if args.watch:
+            records = watch_records(args.watch, args.poll_seconds, args.once)
+            stream(records, out, args.chunk_rows, args.id_field, throughput)
+        elif args.input == "-":
+            stream(iter_records(sys.stdin, args.format), out, args.chunk_rows, args.id_field, throughput)
+        else:
+            with open(args.input, newline="", encoding="utf-8-sig") as f:
+                stream(iter_records(f, args.format), out, args.chunk_rows, args.id_field, throughput)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        throughput.report()
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
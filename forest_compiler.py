@@ -0,0 +1,298 @@
+"""Flatten fitted random forests into one array-backed node table.
+
+Usage:
+    python forest_compiler.py student_rf_model.pkl student_rf_compiled.joblib
+    python forest_compiler.py --all      # every registry forest -> its *_compiled.joblib
+
+The export is an uncompressed joblib file, so the registry can open it with
+mmap_mode='r' and all worker processes on a host share the node table.
+
+The compiled forest predicts exactly like the sklearn model it came from
+(same float32 input cast, same tree-by-tree accumulation) but walks every
+tree for a whole batch of rows with a handful of NumPy operations per level,
+without sklearn's per-estimator dispatch and joblib threading. That makes it
+roughly 10x faster for the apps' one-row predictions and on par up to a few
+hundred rows; bulk scoring (student_batch.py) stays on sklearn's Cython loop.
+"""
+import argparse
+import os
+
+import joblib as jb
+import numpy as np
+import pandas as pd
+
+from model_registry import file_sha256, registry
+
+# Rows walked through the trees at once (bounds the (rows, trees) index arrays)
+DEFAULT_CHUNK_ROWS = 8192
+
+
+class CompiledForest:
+    """Drop-in predict / predict_proba for a fitted RandomForest{Classifier,Regressor}.
+
+    All trees share one node table:
+        feature[n], threshold[n]   split of node n (leaves: feature 0, threshold +inf)
+        children[n] = (left, right) global child ids (leaves point to themselves)
+        value[n]                   class probabilities (classifier) or mean target (regressor)
+        roots[t]                   root node of tree t
+    Leaves point to themselves, so a finished (row, tree) pair never moves again.
+
+    Every array is built once at export time and stored as-is, so a table
+    loaded with joblib's mmap_mode='r' stays a shared, read-only mapping.
+    source_sha256 is the SHA-256 of the pickle an export was compiled from.
+    """
+
+    def __init__(self, feature, threshold, children, value, missing_left, is_leaf, roots, max_depth,
+                 is_classifier, classes_=None, n_features_in_=None, feature_names_in_=None, source_sha256=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.missing_left = missing_left
+        self.is_leaf = is_leaf
+        self.roots = roots
+        self.max_depth = max_depth
+        self.is_classifier = is_classifier
+        self.classes_ = classes_
+        self.n_features_in_ = n_features_in_
+        self.feature_names_in_ = feature_names_in_
+        self.source_sha256 = source_sha256
+
+    @classmethod
+    def from_sklearn(cls, forest, classes=None):
+        """Compile a fitted forest.
+
+        `classes` compiles a multi-output regressor fitted on class
+        probabilities (a distilled classifier, see forest_compression.py) as
+        a classifier with these classes.
+        """
+        distilled = classes is not None
+        if getattr(forest, "n_outputs_", 1) != 1 and not distilled:
+            raise ValueError("Only single-output forests can be compiled")
+        is_classifier = distilled or hasattr(forest, "classes_")
+
+        features, thresholds, lefts, rights, values, missing, leaves, roots = [], [], [], [], [], [], [], []
+        offset, max_depth = 0, 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            leaf = tree.children_left == -1
+            ids = np.arange(offset, offset + n)
+
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            lefts.append(np.where(leaf, ids, tree.children_left + offset))
+            rights.append(np.where(leaf, ids, tree.children_right + offset))
+            missing.append(tree.missing_go_to_left.astype(bool) if hasattr(tree, "missing_go_to_left")
+                           else np.zeros(n, dtype=bool))
+            leaves.append(leaf)
+            roots.append(offset)
+
+            if distilled:
+                values.append(tree.value[:, :, 0].astype(np.float64))
+            elif is_classifier:
+                # tree.value already holds class fractions, and DecisionTreeClassifier.predict_proba
+                # returns them as stored: renormalising would change the last bit
+                values.append(tree.value[:, 0, :estimator.n_classes_].astype(np.float64))
+            else:
+                values.append(tree.value[:, 0, 0].astype(np.float64))
+
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            children=np.ascontiguousarray(np.column_stack([np.concatenate(lefts), np.concatenate(rights)]),
+                                          dtype=np.intp),
+            value=np.ascontiguousarray(np.concatenate(values)),
+            missing_left=np.concatenate(missing),
+            is_leaf=np.concatenate(leaves),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            is_classifier=is_classifier,
+            classes_=np.asarray(classes) if distilled else getattr(forest, "classes_", None),
+            n_features_in_=getattr(forest, "n_features_in_", None),
+            feature_names_in_=getattr(forest, "feature_names_in_", None),
+        )
+
+    @property
+    def left(self):
+        return self.children[:, 0]
+
+    @property
+    def right(self):
+        return self.children[:, 1]
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    def _as_array(self, X):
+        # Use the training column order when given a DataFrame
+        if isinstance(X, pd.DataFrame) and self.feature_names_in_ is not None:
+            X = X[list(self.feature_names_in_)]
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if self.n_features_in_ is not None and X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[1]} features, but the forest expects {self.n_features_in_}")
+        return X
+
+    def _apply(self, X, roots=None):
+        """Leaf node id reached in every tree (or only the trees at `roots`), shape (n_rows, n_trees)."""
+        roots = self.roots if roots is None else roots
+        n_rows, n_trees = len(X), len(roots)
+        # One flat (row, tree) pair per entry; only pairs not yet at a leaf move on
+        node = np.tile(roots, n_rows)
+        offset = np.repeat(np.arange(n_rows) * X.shape[1], n_trees)
+        flat_X = np.ascontiguousarray(X).ravel()
+        # children.ravel()[2 * n + go_right]: one gather per step instead of two
+        children = self.children.ravel()
+        has_nan = np.isnan(flat_X).any()
+
+        active = np.flatnonzero(~self.is_leaf[node])
+        while active.size:
+            current = node[active]
+            x = flat_X[offset[active] + self.feature[current]]
+            go_left = x <= self.threshold[current]
+            if has_nan:
+                go_left |= np.isnan(x) & self.missing_left[current]
+            current = children[2 * current + ~go_left]
+            node[active] = current
+            active = active[~self.is_leaf[current]]
+        return node.reshape(n_rows, n_trees)
+
+    def apply(self, X):
+        """Leaf node id (in the shared node table) per row and tree."""
+        X = self._as_array(X)
+        chunks = [self._apply(X[i:i + DEFAULT_CHUNK_ROWS]) for i in range(0, len(X), DEFAULT_CHUNK_ROWS)]
+        return np.vstack(chunks) if chunks else np.empty((0, self.n_trees), dtype=np.intp)
+
+    def _mean_value(self, X):
+        X = self._as_array(X)
+        out = np.zeros((len(X),) + self.value.shape[1:], dtype=np.float64)
+        for start in range(0, len(X), DEFAULT_CHUNK_ROWS):
+            leaves = self._apply(X[start:start + DEFAULT_CHUNK_ROWS])
+            chunk = out[start:start + DEFAULT_CHUNK_ROWS]
+            # Add tree by tree, in the forest's order, like sklearn does
+            for t in range(self.n_trees):
+                chunk += self.value[leaves[:, t]]
+        out /= self.n_trees
+        return out
+
+    def predict_proba(self, X):
+        if not self.is_classifier:
+            raise AttributeError("predict_proba is only available for classifiers")
+        return self._mean_value(X)
+
+    def predict(self, X):
+        if self.is_classifier:
+            return self.classes_.take(self.predict_proba(X).argmax(axis=1), axis=0)
+        return self._mean_value(X)
+
+
+def compile_forest(forest):
+    return CompiledForest.from_sklearn(forest)
+
+
+def check_parity(forest, compiled, X):
+    """True when the compiled forest reproduces predict (and predict_proba) exactly."""
+    same = np.array_equal(forest.predict(X), compiled.predict(X))
+    if compiled.is_classifier:
+        same = same and np.array_equal(forest.predict_proba(X), compiled.predict_proba(X))
+    return same
+
+
+# ==============================
+# APP ACCESS
+# ==============================
+# Registry forest -> exported compiled artifact
+COMPILED_ARTIFACTS = {
+    "student_model": "student_compiled",
+    "cancer_model": "cancer_compiled",
+}
+
+_compiled = {}
+
+
+def export_is_current(name, export_name):
+    """True when the artifact `export_name` exists and was built from the current `name` pickle.
+
+    Exports without a recorded source (older files) only count when there is
+    no pickle to compare against.
+    """
+    if not os.path.exists(registry.path(export_name)):
+        return False
+    if not os.path.exists(registry.path(name)):
+        return True
+    registry.reload_if_changed(export_name)
+    source = getattr(registry.get(export_name), "source_sha256", None)
+    return source is not None and source == registry.checksum(name)
+
+
+def compiled_model(name):
+    """Compiled forest for a registry model ('student_model' or 'cancer_model').
+
+    Uses the exported artifact when it was compiled from the current pickle;
+    otherwise (no export, or a stale one) compiles the pickled forest once per
+    process.
+    """
+    compiled_name = COMPILED_ARTIFACTS[name]
+    if export_is_current(name, compiled_name):
+        return registry.get(compiled_name)
+    registry.reload_if_changed(name)
+    forest = registry.get(name)
+    if _compiled.get(name, (None,))[0] is not forest:
+        _compiled[name] = (forest, compile_forest(forest))
+    return _compiled[name][1]
+
+
+# ==============================
+# CLI
+# ==============================
+def compile_file(model_path):
+    """Compile a pickled forest, recording the pickle's SHA-256 so stale exports can be told apart."""
+    compiled = compile_forest(jb.load(model_path))
+    compiled.source_sha256 = file_sha256(model_path)
+    return compiled
+
+
+def export(model_path, output_path):
+    """Compile a pickled forest and save it uncompressed (memory-mappable)."""
+    compiled = compile_file(model_path)
+    jb.dump(compiled, output_path)
+    print(f"Compiled {compiled.n_trees} trees / {compiled.n_nodes} nodes "
+          f"(max depth {compiled.max_depth}) -> {output_path}")
+    return compiled
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a fitted random forest as a compiled node table.")
+    parser.add_argument("model", nargs="?", help="pickled sklearn forest (e.g. student_rf_model.pkl)")
+    parser.add_argument("output", nargs="?", help="where to write the compiled forest")
+    parser.add_argument("--all", action="store_true", help="export every registry forest next to its pickle")
+    args = parser.parse_args(argv)
+
+    if args.all:
+        for name, compiled_name in COMPILED_ARTIFACTS.items():
+            if os.path.exists(registry.path(name)):
+                export(registry.path(name), registry.path(compiled_name))
+            else:
+                print(f"Skipping {name}: {registry.path(name)} not found")
+    elif args.model and args.output:
+        export(args.model, args.output)
+    else:
+        parser.error("give MODEL and OUTPUT, or --all")
+
+
+if __name__ == "__main__":
+    # Go through the importable module so exports pickle forest_compiler.CompiledForest,
+    # not __main__.CompiledForest
+    import forest_compiler
+    forest_compiler.main()
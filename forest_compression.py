@@ -0,0 +1,293 @@
+"""Smaller, faster variants of the student and cancer forests, with a trade-off report.
+
+Usage:
+    python -m forest_compression student data.csv [--output-dir compressed/] [--tolerance 0.01]
+    python -m forest_compression cancer cancer_reg.csv --trees 10 25 50 --depths 8 12 16
+
+Variants of the registry forest (the teacher), all written as compiled node
+tables (see forest_compiler.py) that the registry can memory-map:
+    select_k   k trees picked by greedy forward selection (Caruana et al.):
+               start empty and keep adding the tree that most improves the
+               averaged prediction on the selection rows
+    depth_d    every tree cut at depth d; a cut node predicts the value it
+               already stores (the class distribution / mean target of its
+               training samples)
+    distilled  a small forest fitted on the teacher's predict_proba (student)
+               or predict (cancer) over the training rows plus as many rows
+               drawn from the training columns' marginals
+
+The held-out rows of training_pipeline's split are halved: one half picks the
+trees, the other scores every variant (accuracy for student, R² for cancer).
+For each variant the report gives the score, agreement with the teacher,
+tree and node counts, artifact size, load time and single-row p50/p99 latency,
+and names the fastest variant within --tolerance of the teacher's score.
+"""
+import argparse
+import json
+import os
+import time
+
+import joblib as jb
+import numpy as np
+import pandas as pd
+
+from forest_compiler import CompiledForest, compile_forest
+from model_registry import registry
+from training_pipeline import RANDOM_STATE, cached_matrix, holdout_split
+from tuning import single_row_latency
+
+DEFAULT_TREES = (10, 25, 50)
+DEFAULT_DEPTHS = (6, 10, 14)
+DISTILLED_PARAMS = {"n_estimators": 20, "max_depth": 12}
+DEFAULT_TOLERANCE = 0.01
+# Load time: best of this many loads
+LOAD_REPEAT = 3
+
+MODELS = {"student": "student_model", "cancer": "cancer_model"}
+
+
+# ==============================
+# NODE TABLE SURGERY
+# ==============================
+def tree_of_node(forest):
+    """Tree index of every node (each tree's nodes are contiguous, starting at its root)."""
+    sizes = np.diff(np.append(forest.roots, forest.n_nodes))
+    return np.repeat(np.arange(forest.n_trees), sizes)
+
+
+def node_depth(forest):
+    depth = np.zeros(forest.n_nodes, dtype=np.intp)
+    level = np.asarray(forest.roots)
+    d = 0
+    while level.size:
+        depth[level] = d
+        internal = level[~forest.is_leaf[level]]
+        level = forest.children[internal].ravel()
+        d += 1
+    return depth
+
+
+def subforest(forest, keep, cut, roots):
+    """New CompiledForest of the `keep` nodes; `cut` nodes become leaves; trees start at `roots`.
+
+    `keep` must contain every kept node's parent.
+    """
+    ids = np.flatnonzero(keep)
+    new_id = np.full(forest.n_nodes, -1, dtype=np.intp)
+    new_id[ids] = np.arange(len(ids))
+
+    leaf = forest.is_leaf[ids] | cut[ids]
+    children = new_id[forest.children[ids]]
+    children[leaf] = np.arange(len(ids))[leaf, np.newaxis]
+    compacted = CompiledForest(
+        feature=np.where(leaf, 0, forest.feature[ids]),
+        threshold=np.where(leaf, np.inf, forest.threshold[ids]),
+        children=np.ascontiguousarray(children),
+        value=np.ascontiguousarray(forest.value[ids]),
+        missing_left=forest.missing_left[ids] & ~leaf,
+        is_leaf=leaf,
+        roots=new_id[np.asarray(roots)],
+        max_depth=0,
+        is_classifier=forest.is_classifier,
+        classes_=forest.classes_,
+        n_features_in_=forest.n_features_in_,
+        feature_names_in_=forest.feature_names_in_,
+    )
+    compacted.max_depth = int(node_depth(compacted).max())
+    return compacted
+
+
+def select_trees(forest, trees):
+    """Forest of only the given trees (kept in table order, so trees stay contiguous)."""
+    trees = np.unique(trees)
+    keep = np.isin(tree_of_node(forest), trees)
+    return subforest(forest, keep, np.zeros(forest.n_nodes, dtype=bool), np.asarray(forest.roots)[trees])
+
+
+def cap_depth(forest, max_depth):
+    """Every tree cut at `max_depth`; cut nodes predict their stored value."""
+    depth = node_depth(forest)
+    return subforest(forest, depth <= max_depth, depth == max_depth, forest.roots)
+
+
+def tree_values(forest, X):
+    """Every tree's prediction for every row, shape (n_rows, n_trees[, n_classes])."""
+    return forest.value[forest.apply(X)]
+
+
+def greedy_selection(forest, X, y, n_trees):
+    """Tree indices in the order greedy forward selection adds them (no repeats).
+
+    Each step adds the tree whose inclusion gives the lowest squared error of
+    the averaged prediction: Brier score against the one-hot labels for a
+    classifier, MSE for a regressor.
+    """
+    values = tree_values(forest, X)
+    if forest.is_classifier:
+        target = (np.asarray(y)[:, np.newaxis] == forest.classes_).astype(np.float64)
+    else:
+        values, target = values[:, :, np.newaxis], np.asarray(y, dtype=np.float64)[:, np.newaxis]
+
+    chosen, total = [], np.zeros_like(target)
+    available = np.ones(forest.n_trees, dtype=bool)
+    for k in range(min(n_trees, forest.n_trees)):
+        # (n_rows, n_trees, n_outputs) candidate averages, scored all at once
+        candidate = (total[:, np.newaxis, :] + values) / (k + 1)
+        error = ((candidate - target[:, np.newaxis, :]) ** 2).sum(axis=2).mean(axis=0)
+        error[~available] = np.inf
+        best = int(error.argmin())
+        chosen.append(best)
+        available[best] = False
+        total += values[:, best]
+    return chosen
+
+
+def distill(teacher, X, params=DISTILLED_PARAMS, augment=1.0, seed=RANDOM_STATE):
+    """Compact forest fitted on the teacher's outputs, compiled like the teacher.
+
+    The transfer set is X plus augment * len(X) rows whose columns are drawn
+    independently from X's columns, so the student also sees the teacher away
+    from the training points.
+    """
+    from sklearn.ensemble import RandomForestRegressor
+
+    rng = np.random.default_rng(seed)
+    X = np.asarray(X, dtype=np.float64)
+    n_extra = int(augment * len(X))
+    extra = np.column_stack([rng.choice(X[:, j], n_extra) for j in range(X.shape[1])])
+    transfer = np.vstack([X, extra])
+
+    targets = teacher.predict_proba(transfer) if teacher.is_classifier else teacher.predict(transfer)
+    model = RandomForestRegressor(random_state=RANDOM_STATE, n_jobs=-1, **params)
+    model.fit(transfer, targets)
+    compiled = CompiledForest.from_sklearn(model, classes=teacher.classes_ if teacher.is_classifier else None)
+    # Fitted on a plain array: take the column names from the teacher
+    compiled.feature_names_in_ = teacher.feature_names_in_
+    return compiled
+
+
+# ==============================
+# REPORT
+# ==============================
+def _score(forest, X, y):
+    from sklearn.metrics import accuracy_score, r2_score
+
+    predicted = forest.predict(X)
+    return accuracy_score(y, predicted) if forest.is_classifier else r2_score(y, predicted)
+
+
+def _agreement(forest, teacher, X):
+    from sklearn.metrics import r2_score
+
+    if teacher.is_classifier:
+        return float(np.mean(forest.predict(X) == teacher.predict(X)))
+    return float(r2_score(teacher.predict(X), forest.predict(X)))
+
+
+def _load_seconds(path, mmap_mode):
+    best = float("inf")
+    for _ in range(LOAD_REPEAT):
+        start = time.perf_counter()
+        jb.load(path, mmap_mode=mmap_mode)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(name, forest, path, X_report, y_report, teacher, mmap_mode="r", served=None):
+    """One report row. `served` is what predicts at serving time (default: `forest`)."""
+    served = forest if served is None else served
+    p50, p99 = single_row_latency(served, X_report[:1])
+    return {"variant": name, "score": _score(served, X_report, y_report),
+            "agreement": _agreement(served, teacher, X_report),
+            "n_trees": forest.n_trees, "n_nodes": forest.n_nodes, "max_depth": forest.max_depth,
+            "bytes": os.path.getsize(path), "load_seconds": _load_seconds(path, mmap_mode),
+            "latency_p50_ms": p50, "latency_p99_ms": p99, "file": os.path.basename(path)}
+
+
+def compress(model, dataset, output_dir, trees=DEFAULT_TREES, depths=DEFAULT_DEPTHS, distilled=True):
+    """Build and measure every variant of `model` ('student' or 'cancer'). Returns the report DataFrame."""
+    X, y, _ = cached_matrix(model, dataset)
+    X_train, X_held, _, y_held = holdout_split(model, X, y)
+    # Half the held-out rows choose the trees, the other half score every variant
+    X_select, y_select = X_held[::2], y_held[::2]
+    X_report, y_report = X_held[1::2], y_held[1::2]
+
+    os.makedirs(output_dir, exist_ok=True)
+    pickle_path = registry.path(MODELS[model])
+    teacher = compile_forest(registry.get(MODELS[model]))
+
+    def save(name, forest):
+        path = os.path.join(output_dir, f"{model}_{name}.joblib")
+        jb.dump(forest, path)
+        return path
+
+    rows = [
+        # The pickle as the apps load it today (sklearn predict), then its compiled table
+        measure("original_pickle", teacher, pickle_path, X_report, y_report, teacher, mmap_mode=None,
+                served=_SklearnServed(registry.get(MODELS[model]))),
+        measure("original", teacher, save("original", teacher), X_report, y_report, teacher),
+    ]
+    if trees:
+        order = greedy_selection(teacher, X_select, y_select, max(trees))
+        for k in trees:
+            forest = select_trees(teacher, order[:k])
+            rows.append(measure(f"select_{k}", forest, save(f"select_{k}", forest), X_report, y_report, teacher))
+    for d in depths:
+        forest = cap_depth(teacher, d)
+        rows.append(measure(f"depth_{d}", forest, save(f"depth_{d}", forest), X_report, y_report, teacher))
+    if distilled:
+        forest = distill(teacher, X_train)
+        rows.append(measure("distilled", forest, save("distilled", forest), X_report, y_report, teacher))
+    return pd.DataFrame(rows)
+
+
+class _SklearnServed:
+    """The pickled forest predicting numpy rows (as the compiled tables do)."""
+
+    def __init__(self, forest):
+        self.forest = forest
+        self.is_classifier = hasattr(forest, "classes_")
+
+    def predict(self, X):
+        return self.forest.predict(pd.DataFrame(X, columns=self.forest.feature_names_in_))
+
+
+def recommend(report, tolerance=DEFAULT_TOLERANCE):
+    """Fastest variant (p50 latency) whose score is within `tolerance` of the original's."""
+    floor = report.loc[report["variant"] == "original", "score"].iloc[0] - tolerance
+    within = report[report["score"] >= floor]
+    return within.sort_values("latency_p50_ms").iloc[0]
+
+
+# ==============================
+# CLI
+# ==============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compress the student or cancer forest and compare the variants.")
+    parser.add_argument("model", choices=sorted(MODELS))
+    parser.add_argument("dataset", help="raw dataset CSV (as for training_pipeline.py)")
+    parser.add_argument("--output-dir", default="compressed", help="where the variants and report go")
+    parser.add_argument("--trees", type=int, nargs="*", default=list(DEFAULT_TREES), help="greedy selection sizes")
+    parser.add_argument("--depths", type=int, nargs="*", default=list(DEFAULT_DEPTHS), help="depth caps")
+    parser.add_argument("--no-distill", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="largest acceptable score drop from the original")
+    args = parser.parse_args(argv)
+
+    report = compress(args.model, args.dataset, args.output_dir, args.trees, args.depths, not args.no_distill)
+    best = recommend(report, args.tolerance)
+
+    with pd.option_context("display.width", 200, "display.max_columns", None, "display.float_format", "{:.4g}".format):
+        print(report.drop(columns="file").to_string(index=False))
+    print(f"\nFastest within {args.tolerance} of the original score: {best['variant']} "
+          f"(score {best['score']:.4f}, p50 {best['latency_p50_ms']:.3f} ms) -> "
+          f"{os.path.join(args.output_dir, best['file'])}")
+
+    report.to_csv(os.path.join(args.output_dir, f"{args.model}_report.csv"), index=False)
+    with open(os.path.join(args.output_dir, f"{args.model}_report.json"), "w") as f:
+        json.dump({"tolerance": args.tolerance, "recommended": best["variant"],
+                   "variants": report.to_dict("records")}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
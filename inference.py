@@ -0,0 +1,174 @@
+"""Model side of the Streamlit apps, kept out of their import path.
+
+The app scripts only draw widgets at import time and call the functions below
+when a button is pressed. pandas, numpy, joblib and the model modules are
+imported inside these functions, so the first paint of an app never imports
+them, and sklearn is only imported when a pickle that needs it is loaded.
+"""
+import sys
+
+from instrumentation import instruments
+
+# Modules behind the functions below, imported on the first prediction
+MODEL_STACK = ("model_registry", "feature_encoder", "forest_compiler", "prediction_cache", "batch_scheduler")
+
+
+def _load_stack():
+    """Import the model stack once (timed as an 'import' span)."""
+    if all(name in sys.modules for name in MODEL_STACK):
+        return
+    with instruments.span("import", module="model_stack"):
+        for name in MODEL_STACK:
+            __import__(name)
+
+
+def student_outcome(user_inputs, defaults=None):
+    """(predicted class code, class probabilities) for one student's widget values."""
+    _load_stack()
+    from batch_scheduler import batched_predict_proba
+    from feature_encoder import prepare_std_input
+    from forest_compiler import compiled_model
+
+    X = prepare_std_input(user_inputs) if defaults is None else prepare_std_input(user_inputs, defaults)
+    proba = batched_predict_proba("student_model", X)[0]
+    return compiled_model("student_model").classes_[proba.argmax()], proba
+
+
+def cancer_death_rate(user_inputs, defaults=None):
+    """Predicted deaths per 100,000 people for one county's widget values."""
+    _load_stack()
+    from batch_scheduler import batched_predict
+    from feature_encoder import prepare_can_inputs
+
+    X = prepare_can_inputs(user_inputs) if defaults is None else prepare_can_inputs(user_inputs, defaults)
+    return float(batched_predict("cancer_model", X)[0])
+
+
+def ship_cluster(input_data):
+    """Fleet cluster id for one voyage's raw feature values."""
+    _load_stack()
+    from batch_scheduler import batched_cluster
+    from feature_encoder import SHIP_ENCODER
+
+    # One-hot encode straight into the trained 29-column layout, then
+    # scale + predict in one step (scaler folded into the k-means centroids)
+    return int(batched_cluster(SHIP_ENCODER.frame(input_data))[0])
+
+
+def student_explanation(user_inputs, defaults=None, top=10):
+    """Why the student model predicts its class: (class code, baseline probability, top contributions).
+
+    Contributions are toward the predicted class's probability (see tree_explain.py).
+    """
+    _load_stack()
+    import tree_explain
+    from feature_encoder import prepare_std_input
+    from forest_compiler import compiled_model
+
+    X = prepare_std_input(user_inputs) if defaults is None else prepare_std_input(user_inputs, defaults)
+    model = compiled_model("student_model")
+    output = int(model.predict_proba(X)[0].argmax())
+    bias, frame = tree_explain.explain_row("student_model", X, output, top=top)
+    return model.classes_[output], bias, frame
+
+
+def cancer_explanation(user_inputs, defaults=None, top=10):
+    """Why the cancer model predicts its death rate: (average county rate, top contributions)."""
+    _load_stack()
+    import tree_explain
+    from feature_encoder import prepare_can_inputs
+
+    X = prepare_can_inputs(user_inputs) if defaults is None else prepare_can_inputs(user_inputs, defaults)
+    return tree_explain.explain_row("cancer_model", X, top=top)
+
+
+def student_sweep(user_inputs, features, defaults=None):
+    """{feature: outcome probabilities along its sweep} from one predict_proba call (see whatif.py)."""
+    _load_stack()
+    import whatif
+    from feature_schema import ST_defaults
+
+    return whatif.student_sweep(user_inputs, features, ST_defaults if defaults is None else defaults)
+
+
+def cancer_effect_features():
+    """Cancer features for the effects tab: the saved top 10 first, then the rest."""
+    _load_stack()
+    from feature_schema import CA_feature_names
+    from model_registry import registry
+
+    top = list(registry.get("top_cancer"))
+    return top + [f for f in CA_feature_names if f not in top]
+
+
+def cancer_feature_effect(uploaded, feature, grid_points=20, ice_samples=100):
+    """PD and ICE of one feature over an uploaded county CSV (see partial_dependence.py).
+
+    Returns (partial dependence frame, long-format ICE frame for up to `ice_samples` counties).
+    """
+    _load_stack()
+    import numpy as np
+    import pandas as pd
+
+    import partial_dependence
+
+    counties = pd.read_csv(uploaded)
+    result = partial_dependence.cancer_partial_dependence(counties, [feature], grid_points)[feature]
+    pd_frame = pd.DataFrame({feature: result["grid"], "death_rate": result["pd"]})
+
+    ice = result["ice"]
+    rows = np.random.default_rng(0).choice(len(ice), min(ice_samples, len(ice)), replace=False)
+    ice_frame = pd.DataFrame({
+        feature: np.tile(result["grid"], len(rows)),
+        "county": np.repeat(rows, len(result["grid"])),
+        "death_rate": ice[rows].ravel(),
+    })
+    return pd_frame, ice_frame
+
+
+def cancer_county_scores(uploaded):
+    """Every county in an uploaded file scored and rolled up (see county_scoring.py).
+
+    Returns {"counties", "states", "population_buckets"} DataFrames, read back
+    from the disk cache when this model has already scored this file.
+    """
+    _load_stack()
+    import county_scoring
+
+    return county_scoring.county_scores(uploaded)
+
+
+def score_student_file(uploaded, id_column=None, preview_rows=20):
+    """Score an uploaded cohort file: (row count, CSV bytes, preview DataFrame)."""
+    import io
+    import os
+    import tempfile
+
+    import pandas as pd
+
+    import student_batch
+
+    # Score chunk by chunk into a temporary file, then hand back its bytes
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        out_path = os.path.join(tmp_dir, "student_predictions.csv")
+        chunks = student_batch.iter_scored_chunks(uploaded, id_column=id_column or None)
+        rows = student_batch.write_chunks(chunks, out_path)
+        with open(out_path, "rb") as f:
+            result_bytes = f.read()
+    return rows, result_bytes, pd.read_csv(io.BytesIO(result_bytes), nrows=preview_rows)
+
+
+def metrics():
+    """Registry, cache and batching metrics of whatever has been loaded so far.
+
+    Doesn't import anything: before the first prediction it only reports which
+    heavy modules are already in the process.
+    """
+    out = {"imported": {name: name in sys.modules for name in ("pandas", "numpy", "joblib", "sklearn")}}
+    if "model_registry" in sys.modules:
+        out["models"] = sys.modules["model_registry"].registry.metrics()
+    if "prediction_cache" in sys.modules:
+        out["cache"] = sys.modules["prediction_cache"].prediction_cache.stats()
+    if "batch_scheduler" in sys.modules:
+        out["batching"] = sys.modules["batch_scheduler"].scheduler_stats()
+    return out
@@ -0,0 +1,204 @@
+"""Opt-in timers and memory counters for the apps' hot path.
+
+Off by default. Turn it on for the whole process with APP_DIAGNOSTICS=1, or for
+one browser session by opening the app with ?diagnostics=1. While on, every
+`instruments.span(...)` records its wall time (perf_counter_ns) and the change
+in process RSS; spans are aggregated per name/labels and kept as recent events.
+
+Export:
+    instruments.prometheus_text()    Prometheus text exposition format
+    instruments.json_lines()         one JSON object per recorded span
+    APP_DIAGNOSTICS_LOG=spans.jsonl  also append every span to a file as it happens
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+DIAGNOSTICS = os.environ.get("APP_DIAGNOSTICS", "").lower() in ("1", "true", "yes", "on")
+DIAGNOSTICS_LOG = os.environ.get("APP_DIAGNOSTICS_LOG") or None
+QUERY_PARAM = "diagnostics"
+
+# Recent spans kept in memory for the panel / JSON lines export
+MAX_EVENTS = 1000
+
+
+def current_rss():
+    """Resident memory of this process in bytes (None if the platform can't tell)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def current_pss():
+    """Proportional set size in bytes: shared pages split between the processes using them."""
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class Instrumentation:
+    """Process-wide span recorder; a no-op unless enabled globally or for the current thread."""
+
+    def __init__(self, enabled=DIAGNOSTICS, log_path=DIAGNOSTICS_LOG, max_events=MAX_EVENTS):
+        self.enabled = enabled
+        self.log_path = log_path
+        self.events = deque(maxlen=max_events)
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def active(self):
+        return self.enabled or getattr(self._local, "enabled", False)
+
+    def enable_for_thread(self, enabled=True):
+        """Turn recording on/off for the calling thread only (one Streamlit script run)."""
+        self._local.enabled = enabled
+
+    def start_run(self, app):
+        self._local.run = (app, time.perf_counter_ns())
+
+    def finish_run(self):
+        """Record the time since start_run() as a 'script_run' span."""
+        run = getattr(self._local, "run", None)
+        self._local.run = None
+        if run is not None and self.active():
+            app, start = run
+            self.record("script_run", (time.perf_counter_ns() - start) / 1e9, rss=current_rss(),
+                        labels={"app": app})
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Time the enclosed block as `name` (with optional string labels)."""
+        if not self.active():
+            yield
+            return
+        rss_before = current_rss()
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            seconds = (time.perf_counter_ns() - start) / 1e9
+            rss_after = current_rss()
+            rss_delta = None if rss_before is None or rss_after is None else rss_after - rss_before
+            self.record(name, seconds, rss_delta, rss_after, labels)
+
+    def timed(self, name, **labels):
+        """Decorator form of span()."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name, seconds, rss_delta=None, rss=None, labels=None):
+        labels = {k: str(v) for k, v in (labels or {}).items()}
+        key = (name, tuple(sorted(labels.items())))
+        event = {"span": name, **labels, "seconds": seconds, "rss_delta_bytes": rss_delta,
+                 "rss_bytes": rss, "thread": threading.current_thread().name, "time": time.time()}
+        with self._lock:
+            stat = self._stats.get(key)
+            if stat is None:
+                stat = self._stats[key] = {"count": 0, "sum": 0.0, "min": seconds, "max": seconds,
+                                           "rss_delta_sum": 0}
+            stat["count"] += 1
+            stat["sum"] += seconds
+            stat["min"] = min(stat["min"], seconds)
+            stat["max"] = max(stat["max"], seconds)
+            stat["last"] = seconds
+            stat["rss_delta_sum"] += rss_delta or 0
+            self.events.append(event)
+            if self.log_path:
+                with open(self.log_path, "a") as f:
+                    f.write(json.dumps(event) + "\n")
+
+    def summary(self):
+        """One row per span name/labels: count, total, mean, min, max and last seconds."""
+        with self._lock:
+            rows = []
+            for (name, labels), stat in sorted(self._stats.items()):
+                rows.append({"span": name, **dict(labels), "count": stat["count"],
+                             "total_ms": stat["sum"] * 1e3, "mean_ms": stat["sum"] / stat["count"] * 1e3,
+                             "min_ms": stat["min"] * 1e3, "max_ms": stat["max"] * 1e3,
+                             "last_ms": stat["last"] * 1e3, "rss_delta_bytes": stat["rss_delta_sum"]})
+            return rows
+
+    def prometheus_text(self, prefix="app"):
+        """Aggregated spans in the Prometheus text exposition format."""
+        with self._lock:
+            stats = [(_prometheus_labels({"span": name, **dict(labels)}), dict(stat))
+                     for (name, labels), stat in sorted(self._stats.items())]
+        lines = [f"# HELP {prefix}_span_seconds Wall time of instrumented spans.",
+                 f"# TYPE {prefix}_span_seconds summary"]
+        for tags, stat in stats:
+            lines.append(f"{prefix}_span_seconds_count{tags} {stat['count']}")
+            lines.append(f"{prefix}_span_seconds_sum{tags} {stat['sum']!r}")
+        lines += [f"# HELP {prefix}_span_max_seconds Slowest recorded span.",
+                  f"# TYPE {prefix}_span_max_seconds gauge"]
+        lines += [f"{prefix}_span_max_seconds{tags} {stat['max']!r}" for tags, stat in stats]
+        lines += [f"# HELP {prefix}_span_rss_delta_bytes_total Process RSS growth inside spans.",
+                  f"# TYPE {prefix}_span_rss_delta_bytes_total counter"]
+        lines += [f"{prefix}_span_rss_delta_bytes_total{tags} {stat['rss_delta_sum']}" for tags, stat in stats]
+        rss = current_rss()
+        if rss is not None:
+            lines += [f"# HELP {prefix}_process_rss_bytes Resident memory of the process.",
+                      f"# TYPE {prefix}_process_rss_bytes gauge",
+                      f"{prefix}_process_rss_bytes {rss}"]
+        return "\n".join(lines) + "\n"
+
+    def json_lines(self):
+        """Recent spans, one JSON object per line."""
+        with self._lock:
+            return "".join(json.dumps(event) + "\n" for event in self.events)
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self.events.clear()
+
+
+def _prometheus_labels(labels):
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in labels.values())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+# Shared by the registry, encoders, scheduler and apps
+instruments = Instrumentation()
+
+
+# ==============================
+# STREAMLIT
+# ==============================
+def begin_run(app):
+    """Call at the top of an app script: honours ?diagnostics=1 and starts the re-run timer."""
+    import streamlit as st
+
+    instruments.enable_for_thread(st.query_params.get(QUERY_PARAM, "") in ("1", "true", "yes", "on"))
+    instruments.start_run(app)
+
+
+def diagnostics_panel():
+    """Call at the end of an app script: records the re-run time and shows the collapsible panel."""
+    instruments.finish_run()
+    if not instruments.active():
+        return
+    import streamlit as st
+
+    with st.expander("🩺 Diagnostics"):
+        st.dataframe(instruments.summary(), width="stretch")
+        st.caption(f"Process RSS: {(current_rss() or 0) / 2**20:.1f} MiB")
+        col1, col2 = st.columns(2)
+        col1.download_button("Prometheus text", instruments.prometheus_text(), "diagnostics.prom", "text/plain")
+        col2.download_button("JSON lines", instruments.json_lines(), "diagnostics.jsonl", "application/x-ndjson")
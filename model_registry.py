@@ -0,0 +1,197 @@
+import hashlib
+import os
+import threading
+import time
+
+import joblib as jb
+
+from instrumentation import instruments, current_rss, current_pss
+
+# ==============================
+# ARTIFACTS
+# ==============================
+# Folder holding the .pkl files (defaults to the folder of this file)
+MODEL_DIR = os.environ.get("MODEL_DIR", os.path.dirname(os.path.abspath(__file__)))
+
+# Registry name -> artifact file name
+ARTIFACTS = {
+    "student_model": "student_rf_model.pkl",
+    "cancer_model": "cancer_rf_model.pkl",
+    "student_defaults": "student_all_defaults.pkl",
+    "cancer_defaults": "cancer_all_defaults.pkl",
+    "top_student": "top_student_features.pkl",
+    "top_cancer": "top10_cancer_features.pkl",
+    "kmeans": "kmeans_model.pkl",
+    "scaler": "scaler.pkl",
+    # Written by forest_compiler.py (optional)
+    "student_compiled": "student_rf_compiled.joblib",
+    "cancer_compiled": "cancer_rf_compiled.joblib",
+    # Written by compact_format.py (optional)
+    "student_compact": "student_rf_compact.joblib",
+    "cancer_compact": "cancer_rf_compact.joblib",
+}
+
+# Artifacts whose numpy arrays are memory-mapped instead of copied, so every
+# worker process on a host shares one page-cache copy. Set MODEL_MMAP_MODE=""
+# to load private copies instead.
+MMAP_ARTIFACTS = {"student_compiled", "cancer_compiled", "student_compact", "cancer_compact", "kmeans", "scaler"}
+MMAP_MODE = os.environ.get("MODEL_MMAP_MODE", "r") or None
+
+
+def file_sha256(source):
+    """SHA-256 of a path or a (seekable) file object's bytes."""
+    digest = hashlib.sha256()
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    else:
+        position = source.tell()
+        source.seek(0)
+        for block in iter(lambda: source.read(1 << 20), b""):
+            digest.update(block)
+        source.seek(position)
+    return digest.hexdigest()
+
+
+# ==============================
+# REGISTRY
+# ==============================
+class ModelRegistry:
+    """Loads each artifact at most once per process, the first time it is asked for.
+
+    Streamlit re-runs the app scripts on every widget change but keeps imported
+    modules alive, so a module level registry survives the re-runs and is shared
+    by every session of the process.
+    """
+
+    def __init__(self, artifacts=None, model_dir=None, mmap_artifacts=None, mmap_mode=MMAP_MODE):
+        self.artifacts = dict(ARTIFACTS if artifacts is None else artifacts)
+        self.model_dir = model_dir or MODEL_DIR
+        self.mmap_artifacts = set(MMAP_ARTIFACTS if mmap_artifacts is None else mmap_artifacts)
+        self.mmap_mode = mmap_mode
+        self._objects = {}
+        self._metrics = {}
+        self._checksums = {}
+        self._stamps = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def path(self, name):
+        if name not in self.artifacts:
+            raise KeyError(f"Unknown artifact '{name}'. Known: {sorted(self.artifacts)}")
+        return os.path.join(self.model_dir, self.artifacts[name])
+
+    def _name_lock(self, name):
+        with self._lock:
+            return self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        """Return the loaded artifact, loading it on first use."""
+        if name in self._objects:
+            return self._objects[name]
+        with self._name_lock(name):
+            # Another thread may have loaded it while we waited
+            if name not in self._objects:
+                self._objects[name] = self._load(name)
+        return self._objects[name]
+
+    @staticmethod
+    def _stamp(path):
+        stat = os.stat(path)
+        return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+    def _load(self, name):
+        path = self.path(name)
+        # Taken before loading: a file replaced mid-load just gets reloaded again
+        self._stamps[name] = self._stamp(path)
+        rss_before = current_rss()
+        start = time.perf_counter()
+        mmap_mode = self.mmap_mode if name in self.mmap_artifacts else None
+        with instruments.span("load", artifact=name):
+            obj = jb.load(path, mmap_mode=mmap_mode)
+        load_seconds = time.perf_counter() - start
+        rss_after = current_rss()
+
+        self._metrics[name] = {
+            "file": self.artifacts[name],
+            "size_bytes": os.path.getsize(path),
+            "load_seconds": load_seconds,
+            "rss_delta_bytes": None if rss_before is None else rss_after - rss_before,
+            "mmap_mode": mmap_mode,
+            "loaded_at": time.time(),
+        }
+        return obj
+
+    def checksum(self, name):
+        """SHA-256 of the artifact file, recomputed only when its size or mtime changes."""
+        path = self.path(name)
+        stat = os.stat(path)
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        cached = self._checksums.get(name)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, file_sha256(path))
+            self._checksums[name] = cached
+        return cached[1]
+
+    def get_with_checksum(self, name):
+        """(artifact, SHA-256 of the file it was loaded from), reloading it first if the file changed.
+
+        Use this to key on-disk caches: checksum() alone describes the file now
+        on disk, which may be newer than the object get() returns.
+        """
+        while True:
+            self.reload_if_changed(name)
+            stamp = self._stamps.get(name)
+            obj = self.get(name)
+            checksum = self.checksum(name)
+            # Replaced again in between: the hash may be of a different file than obj
+            if stamp is not None and self._checksums[name][0] == stamp[:2]:
+                return obj, checksum
+
+    def reload_if_changed(self, name):
+        """Hot swap: reload a loaded artifact whose file was replaced since. Returns True if reloaded.
+
+        Callers holding the old object keep using it; the next get() returns the new one.
+        """
+        if name not in self._objects:
+            return False
+        try:
+            stamp = self._stamp(self.path(name))
+        except OSError:
+            return False
+        if stamp == self._stamps.get(name):
+            return False
+        with self._name_lock(name):
+            if stamp == self._stamps.get(name):
+                return False
+            self._objects[name] = self._load(name)
+        return True
+
+    def is_loaded(self, name):
+        return name in self._objects
+
+    def metrics(self):
+        """Load time / memory per loaded artifact plus the current process RSS."""
+        return {
+            "process_rss_bytes": current_rss(),
+            "process_pss_bytes": current_pss(),
+            "artifacts": {name: dict(m) for name, m in self._metrics.items()},
+        }
+
+    def clear(self, name=None):
+        """Forget one (or every) loaded artifact so the next get() reloads it."""
+        with self._lock:
+            names = [name] if name is not None else list(self._objects)
+            for n in names:
+                self._objects.pop(n, None)
+                self._metrics.pop(n, None)
+                self._stamps.pop(n, None)
+
+
+# Process wide registry used by every app
+registry = ModelRegistry()
+
+
+def get_model(name):
+    return registry.get(name)
@@ -0,0 +1,213 @@
+"""Multi-process batch inference for the student, cancer and ship models.
+
+Usage:
+    python -m parallel_inference student cohort.csv predictions.csv [--workers 4] [--chunk-rows 65536]
+    python -m parallel_inference cancer counties.parquet death_rates.parquet
+    python -m parallel_inference ship voyages.csv clusters.csv
+
+The unpickled forests predict on one core (their n_jobs is unset), so one
+predict over millions of rows leaves the other cores idle. ParallelPredictor
+writes the encoded matrix once to an .npy file and hands the workers
+(start, stop) row ranges of it; every worker memory-maps the matrix, loads
+each model once through its own registry and returns its shard's
+predictions. The parent concatenates the shards in submission order, so the
+output rows line up with the input rows.
+
+engine="sklearn" (the default) runs the forests' own Cython predict, the
+fastest per core for bulk scoring. engine="compiled" uses the exported node
+tables (see forest_compiler.py), which the workers memory-map and share
+through the page cache instead of each holding a private copy.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib as jb
+import numpy as np
+import pandas as pd
+
+from feature_encoder import STUDENT_ENCODER, CANCER_ENCODER, SHIP_ENCODER
+
+PARALLEL_WORKERS = int(os.environ.get("PARALLEL_WORKERS", "0")) or os.cpu_count() or 1
+PARALLEL_CHUNK_ROWS = int(os.environ.get("PARALLEL_CHUNK_ROWS", "65536"))
+# Where the shared input matrix is written (default: the system temp folder)
+PARALLEL_TMP_DIR = os.environ.get("PARALLEL_TMP_DIR") or None
+
+ENGINES = ("sklearn", "compiled")
+
+# Model -> (registry forest, method, encoder)
+MODELS = {
+    "student": ("student_model", "predict_proba", STUDENT_ENCODER),
+    "cancer": ("cancer_model", "predict", CANCER_ENCODER),
+    "ship": (None, "predict", SHIP_ENCODER),
+}
+
+
+# ==============================
+# WORKER SIDE
+# ==============================
+_predictors = {}
+
+
+def _predictor(model, engine):
+    """predict function of one model, loaded once per process."""
+    key = (model, engine)
+    if key not in _predictors:
+        forest_name, method, encoder = MODELS[model]
+        if forest_name is None:
+            from fleet_clustering import fleet_predictor
+
+            predict = fleet_predictor().predict
+        elif engine == "compiled":
+            from forest_compiler import compiled_model
+
+            predict = getattr(compiled_model(forest_name), method)
+        else:
+            from model_registry import registry
+
+            forest = getattr(registry.get(forest_name), method)
+            columns = encoder.feature_names
+
+            # The forests were fitted on DataFrames: keep the column names
+            def predict(X, forest=forest, columns=columns):
+                return forest(pd.DataFrame(X, columns=columns, copy=False))
+        _predictors[key] = predict
+    return _predictors[key]
+
+
+def _score_shard(model, engine, path, start, stop):
+    X = np.load(path, mmap_mode="r")
+    # One core per worker: don't let joblib start threads inside a worker
+    with jb.parallel_config(n_jobs=1):
+        return np.asarray(_predictor(model, engine)(X[start:stop]))
+
+
+# ==============================
+# PARENT SIDE
+# ==============================
+class ParallelPredictor:
+    """Shards encoded rows across a process pool; results come back in row order.
+
+    The pool is started on the first call and reused until close(), so the
+    workers load each model only once. workers=1 scores in this process.
+    """
+
+    def __init__(self, workers=PARALLEL_WORKERS, chunk_rows=PARALLEL_CHUNK_ROWS, engine="sklearn",
+                 tmp_dir=PARALLEL_TMP_DIR):
+        if engine not in ENGINES:
+            raise ValueError(f"engine must be one of {ENGINES}, got {engine!r}")
+        self.workers = max(1, int(workers))
+        self.chunk_rows = max(1, int(chunk_rows))
+        self.engine = engine
+        self.tmp_dir = tmp_dir
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            # spawn: the parent may run threads (batchers, Streamlit) that fork would copy mid-lock
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=mp.get_context("spawn"))
+        return self._pool
+
+    def warm_up(self, model):
+        """Start the workers and load `model` in each, so the first predict isn't timed with it."""
+        X = np.zeros((4 * self.workers, MODELS[model][2].n_features))
+        self.predict(model, X, chunk_rows=1)
+
+    def predict(self, model, X, chunk_rows=None):
+        """Predictions of `model` ('student', 'cancer' or 'ship') for encoded rows X.
+
+        X is an (n_rows, n_features) array in the encoder's column order, or a
+        DataFrame with those columns. Returns what the model's predict
+        (student: predict_proba) returns, for all rows in their original order.
+        """
+        encoder = MODELS[model][2]
+        columns = encoder.columns if model == "ship" else encoder.feature_names
+        if isinstance(X, pd.DataFrame):
+            X = X[columns]
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(columns):
+            raise ValueError(f"{model} expects (n_rows, {len(columns)}) inputs, got {X.shape}")
+
+        chunk_rows = chunk_rows or self.chunk_rows
+        if self.workers == 1 or len(X) <= chunk_rows:
+            with jb.parallel_config(n_jobs=1):
+                return np.asarray(_predictor(model, self.engine)(X))
+
+        pool = self._get_pool()
+        with tempfile.TemporaryDirectory(dir=self.tmp_dir) as tmp:
+            path = os.path.join(tmp, "X.npy")
+            np.save(path, X)
+            futures = [pool.submit(_score_shard, model, self.engine, path, start, min(start + chunk_rows, len(X)))
+                       for start in range(0, len(X), chunk_rows)]
+            return np.concatenate([f.result() for f in futures])
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# ==============================
+# CLI
+# ==============================
+def to_frame(model, output):
+    """Predictions as the columns written by the CLI."""
+    if model == "student":
+        from feature_schema import labels
+        from student_batch import PREDICTION_COLUMN, PROBA_COLUMNS
+
+        frame = pd.DataFrame(output, columns=PROBA_COLUMNS)
+        # Same column order as the fitted classifier's classes_ (0, 1, 2)
+        frame.insert(0, PREDICTION_COLUMN, np.asarray(labels)[output.argmax(axis=1)])
+        return frame
+    if model == "cancer":
+        return pd.DataFrame({"death_rate": output})
+    from fleet_clustering import describe_clusters
+
+    return pd.DataFrame(describe_clusters(output))[["cluster", "label"]]
+
+
+def score_file(model, input_path, output_path, predictor):
+    from student_batch import iter_chunks, write_chunks
+
+    encoder = MODELS[model][2]
+    start = time.perf_counter()
+    X = np.vstack([encoder.transform(chunk) for chunk in iter_chunks(input_path)])
+    encode_seconds = time.perf_counter() - start
+    output = predictor.predict(model, X)
+    predict_seconds = time.perf_counter() - start - encode_seconds
+    rows = write_chunks([to_frame(model, output)], output_path)
+    return {"rows": rows, "encode_seconds": encode_seconds, "predict_seconds": predict_seconds,
+            "seconds": time.perf_counter() - start}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a file with one model across several processes.")
+    parser.add_argument("model", choices=sorted(MODELS))
+    parser.add_argument("input", help="CSV or Parquet file with the model's features")
+    parser.add_argument("output", help="CSV or Parquet file to write predictions to")
+    parser.add_argument("--workers", type=int, default=PARALLEL_WORKERS)
+    parser.add_argument("--chunk-rows", type=int, default=PARALLEL_CHUNK_ROWS, help="rows per worker task")
+    parser.add_argument("--engine", choices=ENGINES, default="sklearn")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        parser.error(f"input file not found: {args.input}")
+
+    with ParallelPredictor(args.workers, args.chunk_rows, args.engine) as predictor:
+        summary = score_file(args.model, args.input, args.output, predictor)
+    print(f"Scored {summary['rows']} rows with {args.workers} workers in {summary['seconds']:.1f}s "
+          f"(encode {summary['encode_seconds']:.1f}s, predict {summary['predict_seconds']:.1f}s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
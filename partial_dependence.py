@@ -0,0 +1,124 @@
+"""Partial dependence and ICE curves of the cancer death-rate forest.
+
+For a feature and a grid of values, ICE gives every county's predicted death
+rate with that feature set to each grid value (everything else unchanged);
+partial dependence is the average ICE curve. All grid points x all counties
+are scored in chunked batches of DEFAULT_CHUNK_ROWS rows with the forest's
+own predict, and each result is cached on disk under the model checksum and
+a hash of the county data, so it is computed once per model and dataset.
+"""
+import hashlib
+import os
+
+import joblib as jb
+import numpy as np
+import pandas as pd
+
+from feature_encoder import CANCER_ENCODER
+from instrumentation import instruments
+from model_registry import registry
+
+# Rows (counties x grid points) sent to predict at once
+DEFAULT_CHUNK_ROWS = 65536
+DEFAULT_GRID_POINTS = 20
+# Numeric grids span these percentiles of the data, like sklearn's partial_dependence
+DEFAULT_PERCENTILES = (0.05, 0.95)
+
+PD_CACHE_DIR = os.environ.get("PD_CACHE_DIR", os.path.join(registry.model_dir, ".pd_cache"))
+
+
+def feature_grid(values, grid_points=DEFAULT_GRID_POINTS, percentiles=DEFAULT_PERCENTILES):
+    """Grid for one feature: its unique values if few, else evenly spaced between the percentiles."""
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    unique = np.unique(values)
+    if len(unique) <= grid_points:
+        return unique
+    low, high = np.quantile(values, percentiles)
+    if low == high:
+        return unique
+    return np.linspace(low, high, grid_points)
+
+
+def ice(model, X, feature_index, grid, chunk_rows=DEFAULT_CHUNK_ROWS, columns=None):
+    """(n_rows, len(grid)) predictions with column `feature_index` set to each grid value."""
+    X = np.asarray(X, dtype=np.float64)
+    n_grid = len(grid)
+    out = np.empty((len(X), n_grid))
+    rows_per_chunk = max(1, chunk_rows // max(n_grid, 1))
+    grid = np.asarray(grid, dtype=np.float64)
+
+    # joblib threads for the forest's per-tree loop when the model doesn't set n_jobs
+    with jb.parallel_config(n_jobs=-1):
+        for start in range(0, len(X), rows_per_chunk):
+            block = X[start:start + rows_per_chunk]
+            # Row-major: each county's grid points are consecutive
+            tiled = np.repeat(block, n_grid, axis=0)
+            tiled[:, feature_index] = np.tile(grid, len(block))
+            if columns is not None:
+                tiled = pd.DataFrame(tiled, columns=columns)
+            out[start:start + len(block)] = np.asarray(model.predict(tiled)).reshape(len(block), n_grid)
+    return out
+
+
+def data_hash(X):
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    digest = hashlib.blake2b(str(X.shape).encode(), digest_size=16)
+    digest.update(X.tobytes())
+    return digest.hexdigest()
+
+
+def _cache_path(cache_dir, *parts):
+    key = hashlib.sha256("|".join(str(p) for p in parts).encode()).hexdigest()[:32]
+    return os.path.join(cache_dir, f"pd_{key}.npz")
+
+
+def cancer_partial_dependence(counties, features, grid_points=DEFAULT_GRID_POINTS,
+                              model_name="cancer_model", cache_dir=PD_CACHE_DIR, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """PD / ICE of the cancer model over a county table.
+
+    `counties` is anything CANCER_ENCODER accepts (DataFrame, records); missing
+    columns use the defaults. Returns {feature: {"grid", "pd", "ice"}} where
+    ice has one row per county and one column per grid value.
+    """
+    # The checksum of the file this model was loaded from, so a retrain gets new cache entries
+    model, checksum = registry.get_with_checksum(model_name)
+    columns = list(getattr(model, "feature_names_in_", CANCER_ENCODER.feature_names))
+    X = CANCER_ENCODER.frame(counties)[columns].to_numpy()
+    hashed = data_hash(X)
+
+    results = {}
+    for feature in features:
+        path = _cache_path(cache_dir, checksum, hashed, feature, grid_points, DEFAULT_PERCENTILES)
+        if cache_dir and os.path.exists(path):
+            with np.load(path) as cached:
+                results[feature] = {key: cached[key] for key in ("grid", "pd", "ice")}
+            continue
+
+        j = columns.index(feature)
+        grid = feature_grid(X[:, j], grid_points)
+        with instruments.span("partial_dependence", feature=feature):
+            curves = ice(model, X, j, grid, chunk_rows, columns)
+        results[feature] = {"grid": grid, "pd": curves.mean(axis=0), "ice": curves}
+
+        if cache_dir:
+            # Write then rename, so a concurrent reader never sees half a file
+            tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                np.savez(tmp_path, **results[feature])
+                os.replace(tmp_path, path)
+            except OSError:
+                # Read-only model folder: just don't cache
+                pass
+    return results
+
+
+def check_ice(model, X, feature_index, grid, columns=None):
+    """True when the chunked ICE equals predicting every grid point separately."""
+    expected = []
+    for value in grid:
+        Xv = np.array(X, dtype=np.float64)
+        Xv[:, feature_index] = value
+        expected.append(model.predict(pd.DataFrame(Xv, columns=columns) if columns is not None else Xv))
+    return np.array_equal(np.column_stack(expected), ice(model, X, feature_index, grid, columns=columns))
@@ -0,0 +1,140 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from forest_compiler import COMPILED_ARTIFACTS, compiled_model
+from instrumentation import instruments
+from model_registry import registry
+
+# Size / lifetime of the shared cache (entries, seconds)
+CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", "4096"))
+CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", "3600"))
+
+
+def canonical_key(vector):
+    """Digest of one encoded feature vector.
+
+    The forests compare float32 inputs, so vectors that agree in float32 always
+    get the same prediction and share a key. -0.0 is folded into 0.0.
+    """
+    canonical = np.asarray(vector, dtype=np.float32) + np.float32(0.0)
+    return hashlib.blake2b(np.ascontiguousarray(canonical).tobytes(), digest_size=16).digest()
+
+
+class PredictionCache:
+    """Thread-safe LRU cache with a time-to-live, keyed on (model, checksum, vector).
+
+    Lives at module level, so every Streamlit session of the process shares it.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE, ttl=CACHE_TTL, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if self.ttl is not None and expires_at < self.clock():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        expires_at = self.clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, model_name=None):
+        """Drop the entries of one model (or all of them)."""
+        with self._lock:
+            stale = [k for k in self._entries if model_name is None or k[0] == model_name]
+            for k in stale:
+                del self._entries[k]
+            self.invalidations += len(stale)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries), "maxsize": self.maxsize, "ttl_seconds": self.ttl,
+                "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions, "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+# Shared by every session of the process
+prediction_cache = PredictionCache()
+
+# Model name -> checksum of the file its predictions came from
+_seen_checksums = {}
+
+
+def _current_checksum(name):
+    """Checksum of the pickle behind `name` and of its export, if any; drops stale entries when it changes.
+
+    The pickle is the source of truth: replacing it invalidates the cache even
+    while an older export is still on disk.
+    """
+    sources = [source for source in (name, COMPILED_ARTIFACTS[name]) if os.path.exists(registry.path(source))]
+    checksum = "/".join(registry.checksum(source) for source in sources)
+    previous = _seen_checksums.get(name)
+    if previous is not None and previous != checksum:
+        prediction_cache.invalidate(name)
+        for source in sources:
+            registry.clear(source)
+    _seen_checksums[name] = checksum
+    return checksum
+
+
+def _cached(name, X, method):
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    checksum = _current_checksum(name)
+    keys = [(name, method, checksum, canonical_key(row)) for row in X]
+
+    results = [prediction_cache.get(key) for key in keys]
+    missing = [i for i, value in enumerate(results) if value is None]
+    if missing:
+        # One model call for every row that wasn't cached
+        model = compiled_model(name)
+        with instruments.span("forest", model=name):
+            fresh = getattr(model, method)(X[missing])
+        for i, value in zip(missing, fresh):
+            prediction_cache.put(keys[i], value)
+            results[i] = value
+    return np.asarray(results)
+
+
+def cached_predict_proba(name, X):
+    """predict_proba of a registry classifier on encoded rows, through the shared cache."""
+    return _cached(name, X, "predict_proba")
+
+
+def cached_predict(name, X):
+    """predict of a registry model on encoded rows, through the shared cache."""
+    return _cached(name, X, "predict")
@@ -0,0 +1,192 @@
+"""Headless HTTP prediction service next to the Streamlit apps.
+
+Usage:
+    python prediction_service.py [--host 127.0.0.1] [--port 8000] [--max-batch-rows 256] [--max-wait-ms 5]
+
+Endpoints (JSON in, JSON out):
+    POST /student   one record or a list of records with ST_feature_names keys
+    POST /cancer    same, with CA_feature_names keys
+    POST /ship      same, with the 12 numerical + 5 categorical ship features
+    GET  /health
+    GET  /metrics   model load metrics, cache and batching counters
+
+Records use the same encoders, defaults and labels as the apps, so text
+options ("Yes", "Married", "HFO", ...) are accepted. Rows from concurrent
+requests to the same endpoint are scored together in one predict call
+(see batch_scheduler.MicroBatcher).
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from batch_scheduler import MicroBatcher, BATCH_MAX_ROWS, BATCH_MAX_WAIT_MS
+from feature_encoder import STUDENT_ENCODER, CANCER_ENCODER, SHIP_ENCODER
+from feature_schema import labels
+from fleet_clustering import describe_clusters, fleet_predictor
+from instrumentation import instruments
+from forest_compiler import compiled_model
+from model_registry import registry
+from prediction_cache import prediction_cache, cached_predict, cached_predict_proba
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 32 * 1024 * 1024
+
+
+# ==============================
+# ENDPOINTS
+# ==============================
+def _student_results(proba):
+    classes = compiled_model("student_model").classes_
+    return [{"prediction": labels[int(classes[p.argmax()])],
+             "probabilities": {label: float(v) for label, v in zip(labels, p)}} for p in proba]
+
+
+def _cancer_results(pred):
+    return [{"death_rate": float(v)} for v in pred]
+
+
+class PredictionService:
+    def __init__(self, max_batch_rows=BATCH_MAX_ROWS, max_wait_ms=BATCH_MAX_WAIT_MS):
+        def batcher(fn):
+            return MicroBatcher(fn, max_batch_rows, max_wait_ms)
+
+        # path -> (encoder, batcher, result formatter)
+        self.endpoints = {
+            "/student": (STUDENT_ENCODER.transform,
+                         batcher(lambda X: cached_predict_proba("student_model", X)), _student_results),
+            "/cancer": (CANCER_ENCODER.transform,
+                        batcher(lambda X: cached_predict("cancer_model", X)), _cancer_results),
+            "/ship": (SHIP_ENCODER.transform,
+                      batcher(lambda X: fleet_predictor().predict(X)), describe_clusters),
+        }
+
+    def metrics(self):
+        return {
+            "models": registry.metrics(),
+            "cache": prediction_cache.stats(),
+            "batching": {path: b.stats() for path, (_, b, _) in self.endpoints.items()},
+            # Empty unless the service runs with APP_DIAGNOSTICS=1
+            "spans": instruments.summary(),
+        }
+
+    async def handle(self, method, path, body):
+        """(status, payload) for one request."""
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok"}
+        if method == "GET" and path == "/metrics":
+            return 200, self.metrics()
+        if path not in self.endpoints:
+            return 404, {"error": f"unknown endpoint {path}"}
+        if method != "POST":
+            return 405, {"error": "use POST"}
+
+        try:
+            records = json.loads(body or b"null")
+        except ValueError as e:
+            return 400, {"error": f"invalid JSON: {e}"}
+        if isinstance(records, dict):
+            records = records.get("records", [records])
+        if not isinstance(records, list) or not all(isinstance(r, dict) for r in records):
+            return 400, {"error": "send a JSON object or a list of objects"}
+        if not records:
+            return 200, {"results": []}
+
+        encode, batcher, format_results = self.endpoints[path]
+        try:
+            X = encode(records)
+        except ValueError as e:
+            return 400, {"error": str(e)}
+        start = time.perf_counter()
+        # The batcher thread runs the model; the event loop keeps serving meanwhile
+        out = await asyncio.wrap_future(batcher.submit(X))
+        return 200, {"results": format_results(out), "latency_ms": (time.perf_counter() - start) * 1000}
+
+
+# ==============================
+# HTTP
+# ==============================
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+def _request_error(headers):
+    """(status, payload) for a Content-Length we won't read a body for, else None."""
+    value = headers.get("content-length", "") or "0"
+    if not (value.isascii() and value.isdigit()):
+        return 400, {"error": f"invalid Content-Length: {value!r}"}
+    if int(value) > MAX_BODY_BYTES:
+        return 413, {"error": "request body too large"}
+    return None
+
+
+async def _serve_connection(service, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, target, version = request_line.decode("latin-1").split()
+            except ValueError:
+                break
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            # The body of a rejected request is not read, so its connection is closed
+            error = _request_error(headers)
+            if error:
+                status, payload = error
+            else:
+                length = int(headers.get("content-length", "") or "0")
+                body = await reader.readexactly(length) if length else b""
+                try:
+                    status, payload = await service.handle(method, target.split("?")[0], body)
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+
+            data = json.dumps(payload).encode()
+            keep_alive = (version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                          and not error)
+            writer.write(
+                f"{version} {status} {REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + data)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host="127.0.0.1", port=8000, max_batch_rows=BATCH_MAX_ROWS, max_wait_ms=BATCH_MAX_WAIT_MS):
+    service = PredictionService(max_batch_rows, max_wait_ms)
+    server = await asyncio.start_server(lambda r, w: _serve_connection(service, r, w), host, port)
+    print(f"Prediction service listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the student, cancer and ship models over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-rows", type=int, default=BATCH_MAX_ROWS)
+    parser.add_argument("--max-wait-ms", type=float, default=BATCH_MAX_WAIT_MS)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch_rows, args.max_wait_ms))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,45 +1,20 @@
 import streamlit as st
-import joblib
-import pandas as pd
-import sklearn
+import inference
+from model_registry import registry
+from instrumentation import begin_run, diagnostics_panel
 
-# ==============================
-# LOAD MODELS & DEFAULTS
-# ==============================
-@st.cache_resource
-def load_assets():
-    return {
-        "student_model": joblib.load("student_rf_model.pkl"),
-        "cancer_model": joblib.load("cancer_rf_model.pkl"),
-        "student_defaults": joblib.load("student_all_defaults.pkl"),
-        "cancer_defaults": joblib.load("cancer_all_defaults.pkl"),
-        "top_student": joblib.load("top_student_features.pkl"),
-        "top_cancer": joblib.load("top10_cancer_features.pkl")
-    }
-
-assets = load_assets()
-
-student_model = assets["student_model"]
-cancer_model = assets["cancer_model"]
-student_defaults = assets["student_defaults"]
-cancer_defaults = assets["cancer_defaults"]
-TOP_STUDENT = assets["top_student"]
-TOP_CANCER = assets["top_cancer"]
+# Opt-in timing panel (APP_DIAGNOSTICS=1 or ?diagnostics=1)
+begin_run("predictive_app")
 
 # ==============================
-# HELPER FUNCTIONS
+# LOAD DEFAULTS
 # ==============================
-def create_full_input(user_inputs, defaults_dict):
-    """Merge user inputs with defaults to create full feature vector."""
-    full_input = defaults_dict.copy()
-    for feat, val in user_inputs.items():
-        if feat in full_input:
-            full_input[feat] = val
-    return pd.DataFrame([full_input])
-
-def encode_yes_no(df):
-    """Convert 'Yes'/'No' to 1/0 for model compatibility."""
-    return df.replace({"Yes": 1, "No": 0})
+# Small lookups are needed to draw the inputs; the forests are only
+# loaded by the registry when a Predict button is first pressed.
+student_defaults = registry.get("student_defaults")
+cancer_defaults = registry.get("cancer_defaults")
+TOP_STUDENT = registry.get("top_student")
+TOP_CANCER = registry.get("top_cancer")
 
 # ==============================
 # STREAMLIT APP
@@ -84,13 +59,8 @@ with tab1:
                 user_inputs[feat] = st.number_input(f"{feat}", value=float(student_defaults[feat]))
     
     if st.button("Predict Student Outcome"):
-        # Build full input (all 36 features)
-        full_df = create_full_input(user_inputs, student_defaults)
-        full_df = encode_yes_no(full_df)
-        
-        # Predict
-        pred = student_model.predict(full_df)[0]
-        proba = student_model.predict_proba(full_df)[0]
+        # Predict (missing features use the saved defaults, Yes/No -> 1/0)
+        pred, proba = inference.student_outcome(user_inputs, student_defaults)
         labels = ["Dropout", "Enrolled", "Graduate"]
         
         st.success(f"**Prediction**: {labels[pred]}")
@@ -129,11 +99,8 @@ with tab2:
                 user_inputs[feat] = st.slider(f"{feat} (%)", 0.0, 100.0, float(cancer_defaults[feat]))
     
     if st.button("Predict Death Rate"):
-        # Build full input (all 32 features)
-        full_df = create_full_input(user_inputs, cancer_defaults)
-        
-        # Predict
-        pred = cancer_model.predict(full_df)[0]
+        # Predict (missing features use the saved defaults)
+        pred = inference.cancer_death_rate(user_inputs, cancer_defaults)
         st.success(f"**Predicted Death Rate**: {pred:.1f} per 100,000 people")
         st.info("Model Performance: R² = 0.55 | Mean Absolute Error = ±14.1 deaths/100k")
 
@@ -141,4 +108,9 @@ with tab2:
 # FOOTER
 # ------------------------------
 st.markdown("---")
-st.caption("ML Portfolio Project • Random Forest Models • Data-Driven Insights")
\ No newline at end of file
+st.caption("ML Portfolio Project • Random Forest Models • Data-Driven Insights")
+
+with st.expander("⚙️ Model load metrics"):
+    st.json(inference.metrics())
+
+diagnostics_panel()
\ No newline at end of file
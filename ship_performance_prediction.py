@@ -1,82 +1,15 @@
 import streamlit as st
-import pandas as pd
-import joblib
-import numpy as np
+import inference
+from feature_schema import (numerical_features, categorical_features, all_onehot_features,
+                            cluster_labels, cluster_descriptions, cluster_recommendations)
+from instrumentation import begin_run, diagnostics_panel
 
-# Load saved objects
-kmeans = joblib.load('kmeans_model.pkl')
-scaler = joblib.load('scaler.pkl')
+# Opt-in timing panel (APP_DIAGNOSTICS=1 or ?diagnostics=1)
+begin_run("ship")
 
-# Feature lists (update these to match your 29 columns!)
-numerical_features = [
-    'Speed_Over_Ground_knots', 'Engine_Power_kW', 'Distance_Traveled_nm',
-    'Draft_meters', 'Cargo_Weight_tons', 'Operational_Cost_USD',
-    'Revenue_per_Voyage_USD', 'Turnaround_Time_hours',
-    'Efficiency_nm_per_kWh', 'Seasonal_Impact_Score',
-    'Weekly_Voyage_Count', 'Average_Load_Percentage'
-]
+# Saved objects (kmeans_model.pkl, scaler.pkl) are loaded lazily by the model registry
 
-categorical_features = {
-    'Ship_Type': ['Bulk', 'Container', 'Fish', 'Tanker'],
-    'Engine_Type': ['Diesel', 'HFO', 'Steam Turbine'],
-    'Maintenance_Status': ['Good', 'Fair', 'Critical'],
-    'Route_Type': ['Coastal', 'Transoceanic', 'Long haul', 'short haul'],
-    'Weather_Condition': ['Calm', 'Moderate', 'Rough']
-}
-
-all_onehot_features = [
- 'Speed_Over_Ground_knots',    #سرعة السفينة على الارض بالميل البحري في الساعة
- 'Engine_Power_kW',            #انتاج الطاقة من المحرك الرئيسي اثناء الرحلة بالكيلووات
- 'Distance_Traveled_nm',       #اجمالي الاميال البحرية التي سيتم اجتيازهااثناءالرحلة     nm = nautical mile
- 'Draft_meters',               #العمق الرأسي لهيكل السفينة تحت الماء
- 'Cargo_Weight_tons',          #الوزن الاجمالي للبضائع المنقولة
- 'Operational_Cost_USD',       #التكلفة الاجمالية لتشغيل السفينة لهذه الرحلة
- 'Revenue_per_Voyage_USD',     #الدخل المتولد من الرحلة(عقود الشحن) 
- 'Turnaround_Time_hours',      #الوقت التس تقضيه في الميناء للشحن/التفريغ والتزود بالوقود
- 'Efficiency_nm_per_kWh',      #مقياس الاداء الرئيسي, الاميال البحرية المقطوعة لكل كيلووات/ساعة من الطاقة
- 'Seasonal_Impact_Score',      #مقدار الموسمية التي اثرت على العمليات درجة مشتقة من 1-9
- 'Weekly_Voyage_Count',        #عدد الرحلات التي تكملها السفينة عادة في الاسبوع
- 'Average_Load_Percentage',    #مدى امتلاء السفينة كنسبة مئوية من السعة الكلية
- 'Ship_Type_Bulk Carrier',     #تصميم السفينة نقل سائب
- 'Ship_Type_Container Ship',   #تصميم السفينة سفينة حاويات
- 'Ship_Type_Fish Carrier',     #تصميم السفينة نقل سمك 
- 'Ship_Type_Tanker',           #تصميم السفينة ناقلة
- 'Route_Type_Coastal',         #طبيعة طريص الشحن : ساحلي
- 'Route_Type_Long-haul',       #طبيعة طريص الشحن :مدى طويل 
- 'Route_Type_Short-haul',      #طبيعة طريص الشحن : مدى قصير
- 'Route_Type_Transoceanic',    #طبيعة طريص الشحن : عبر المحيط
- 'Engine_Type_Diesel',         # نوع نظام الدفع: ديزل
- 'Engine_Type_Heavy Fuel Oil (HFO)', # نوع نظام الدفع: زيت نقل ثقيل
- 'Engine_Type_Steam Turbine',  # نوع نظام الدفع:توربين بخاري
- 'Maintenance_Status_Critical', #حالة الصيانة: حرجة
- 'Maintenance_Status_Fair',     #حالة الصيانة:  مُعرض
- 'Maintenance_Status_Good',     #حالة الصيانة: جيدة
- 'Weather_Condition_Calm',      
- 'Weather_Condition_Moderate',
- 'Weather_Condition_Rough']
-
-#cluster labels
-cluster_labels = {
-    0: "High-Cost Carriers",
-    1: "Cost-Efficient Carriers",
-    2: "Specialized Vessels"
-}
-
-# Descriptions for users
-cluster_descriptions = {
-    "High-Cost Carriers": (
-        "Vessels with higher operational costs and critical maintenance needs. "
-        "Often older bulk/tanker ships using Heavy Fuel Oil (HFO). Consider efficiency upgrades."
-    ),
-    "Cost-Efficient Carriers": (
-        "Modern, well-maintained ships (often bulk/container) with diesel engines. "
-        "Lowest operational cost and reliable performance — ideal for standard voyages."
-    ),
-    "Specialized Vessels": (
-        "Typically fishing or niche vessels (e.g., steam-powered). "
-        "Well-maintained but technologically distinct. Best for specialized operations, not general cargo."
-    )
-}
+# Feature lists, cluster labels and descriptions live in feature_schema.py
 
 # ==============================
 # STREAMLIT UI
@@ -132,25 +65,8 @@ with col3:
 # Prediction button
  if st.button("🔍 Predict Operational Group"):
     try:
-        # Create input DataFrame
-        df_input = pd.DataFrame([input_data])
-        
-        # One-hot encode (same as training)
-        df_encoded = pd.get_dummies(df_input, columns=list(categorical_features.keys()))
-        
-        # Align columns: add missing one-hot columns as 0
-        for col in all_onehot_features:
-            if col not in df_encoded.columns:
-                df_encoded[col] = 0
-        
-        # Reorder to match training data
-        df_encoded = df_encoded[all_onehot_features]
-        
-        # Scale
-        X_scaled = scaler.transform(df_encoded)
-        
-        # Predict
-        cluster_id = kmeans.predict(X_scaled)[0]
+        # One-hot encode, scale and predict (see inference.ship_cluster)
+        cluster_id = inference.ship_cluster(input_data)
         cluster_label = cluster_labels[cluster_id]
         description = cluster_descriptions[cluster_label]
         
@@ -159,16 +75,19 @@ with col3:
         st.info(description)
         
         # Simulating Recommendations:
+        recommendation = f"💡 **Recommendation**: {cluster_recommendations[cluster_label]}"
         if cluster_label == "High-Cost Carriers":
-             st.warning("💡 **Recommendation**: This vessel shows signs of high operational cost. "
-               "Consider engine retrofit or preventive maintenance.")
+             st.warning(recommendation)
         elif cluster_label == "Cost-Efficient Carriers":
-             st.success("💡 **Recommendation**: This is a benchmark vessel. "
-               "Use its settings (e.g., load %, speed) as a standard for similar ships.")
+             st.success(recommendation)
         elif cluster_label == "Specialized Vessels":
-             st.info("💡 **Recommendation**: This vessel is optimized for niche operations. "
-            "Avoid assigning it to standard cargo routes.")
+             st.info(recommendation)
         
     except Exception as e:
         st.error(f"Error during prediction: {str(e)}")
-        st.code(str(e))
\ No newline at end of file
+        st.code(str(e))
+
+with st.expander("⚙️ Model load metrics"):
+    st.json(inference.metrics())
+
+diagnostics_panel()
\ No newline at end of file
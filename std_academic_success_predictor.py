@@ -1,8 +1,10 @@
 import streamlit as st
-import joblib as jb
-import pandas as pd
-import numpy as np
-import sklearn
+import inference
+from instrumentation import begin_run, diagnostics_panel
+from feature_schema import ST_defaults, MOTHER_OCCU_MAP, labels
+
+# Opt-in timing panel (APP_DIAGNOSTICS=1 or ?diagnostics=1)
+begin_run("student")
 
 #-=================================================Enhancing the app UI========================================================================================
 # Custom CSS for a clean, modern look
@@ -49,29 +51,11 @@ st.markdown("""
 #===============================================================================================================================================================
 
 
-#Loading our trained models
-Clf_model = jb.load("student_rf_model.pkl")
-Reg_model =jb.load("cancer_rf_model.pkl")
+#Trained model is loaded lazily (once per process) by the model registry
 
 #================================================================Students Data=====================================================================================
 
-#Feature names Expected by model
-ST_feature_names  = ['Marital status', 'Application mode', 'Application order', 'Course', 'Daytime/evening attendance\t', 'Previous qualification', 'Previous qualification (grade)', 'Nacionality', "Mother's qualification", "Father's qualification", "Mother's occupation", "Father's occupation", 'Admission grade', 'Displaced', 'Educational special needs', 'Debtor', 'Tuition fees up to date', 'Gender', 'Scholarship holder', 'Age at enrollment', 'International', 'Curricular units 1st sem (credited)', 'Curricular units 1st sem (enrolled)', 'Curricular units 1st sem (evaluations)', 'Curricular units 1st sem (approved)', 'Curricular units 1st sem (grade)', 'Curricular units 1st sem (without evaluations)', 'Curricular units 2nd sem (credited)', 'Curricular units 2nd sem (enrolled)', 'Curricular units 2nd sem (evaluations)', 'Curricular units 2nd sem (approved)', 'Curricular units 2nd sem (grade)', 'Curricular units 2nd sem (without evaluations)', 'Unemployment rate', 'Inflation rate', 'GDP']
-
-# Set default values for all features
-ST_defaults = {
-    'Marital status': 1.0, 'Application mode': 17.0, 'Application order': 1.0, 'Course': 9238.0, 'Daytime/evening attendance\t': 1.0, 'Previous qualification': 1.0, 'Previous qualification (grade)': 133.1, 'Nacionality': 1.0, "Mother's qualification": 19.0, "Father's qualification": 19.0, "Mother's occupation": 5.0, "Father's occupation": 7.0, 'Admission grade': 126.0, 'Displaced': 1.0, 'Educational special needs': 0.0, 'Debtor': 0.0, 'Tuition fees up to date': 1.0, 'Gender': 0.0, 'Scholarship holder': 0.0, 'Age at enrollment': 20.0, 'International': 0.0, 'Curricular units 1st sem (credited)': 0.0, 'Curricular units 1st sem (enrolled)': 6.0, 'Curricular units 1st sem (evaluations)': 8.0, 'Curricular units 1st sem (approved)': 5.0, 'Curricular units 1st sem (grade)': 12.32, 'Curricular units 1st sem (without evaluations)': 0.0, 'Curricular units 2nd sem (credited)': 0.0, 'Curricular units 2nd sem (enrolled)': 6.0, 'Curricular units 2nd sem (evaluations)': 8.0, 'Curricular units 2nd sem (approved)': 5.0, 'Curricular units 2nd sem (grade)': 12.2, 'Curricular units 2nd sem (without evaluations)': 0.0, 'Unemployment rate': 11.1, 'Inflation rate': 1.4, 'GDP': 0.32
-}
-
-MOTHER_OCCU_MAP = {
-    "Unemployed": 0.0,
-    "Student": 1.0,
-    "Professional": 2.0,
-    "Administrative staff": 3.0,
-    "Service worker": 4.0,
-    "Manual laborer": 5.0,
-    "Other": 6.0
-}
+#Feature names, defaults and text option maps live in feature_schema.py
 
 
 # Student Helping Functions
@@ -146,42 +130,7 @@ def get_std_inputs():
 
     return inputs
 
-def prepare_std_input(user_inputs, defaults):
-    # Start with all defaults
-    full_input = defaults.copy()
-    
-    # Override with user inputs
-    for key, val in user_inputs.items():
-        if key in full_input:
-            # Handle Yes/No
-            if val == "Yes":
-                full_input[key] = 1.0
-            elif val == "No":
-                full_input[key] = 0.0
-            # Handle Marital Status
-            elif key == "Marital status":
-                marital_map = {
-                    "Single": 1.0, "Married": 2.0, "Widower": 3.0,
-                    "Divorced": 4.0, "Legally Separated": 5.0, "Other": 6.0
-                }
-                full_input[key] = marital_map[val]
-            # Handle Gender
-            elif key == "Gender":
-                full_input[key] = 0.0 if val == "Female" else 1.0
-            # Handle Attendance
-            elif key == "Daytime/evening attendance\t":
-                full_input[key] = 1.0 if val == "Daytime" else 0.0
-            elif key == "Mother's occupation":
-                full_input[key] = MOTHER_OCCU_MAP[val]
-            # Handle numeric inputs
-            else:
-                try:
-                    full_input[key] = float(val)
-                except (ValueError, TypeError):
-                    pass  # Keep default if conversion fails
-    
-    # Convert to DataFrame (one row, all 36 features)
-    return pd.DataFrame([full_input])
+#prepare_std_input now comes from feature_encoder.py (compiled STUDENT_ENCODER)
 
 
 #=================================================================================================================================================================================================================================
@@ -201,15 +150,10 @@ st.markdown(
 
 user_inputs = get_std_inputs()
 if st.button("Predict Academic Outcome", key="student_btn"): #Critical: Without key, buttons in different tabs interfere
-        input_df1 = prepare_std_input(user_inputs, ST_defaults)
-
         # make prediction
-        pred = Clf_model.predict(input_df1)[0]
-        proba = Clf_model.predict_proba(input_df1)[0]     
+        pred, proba = inference.student_outcome(user_inputs, ST_defaults)
 
         # Get results
-        
-        labels = ["Dropout", "Enrolled", "Graduate"]
         st.markdown(
              f"""
               <div style="background-color: #e8f4f8; padding: 15px; border-radius: 10px; border-left: 5px solid #3498db;">
@@ -231,3 +175,8 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+with st.expander("⚙️ Model load metrics"):
+    st.json(inference.metrics())
+
+diagnostics_panel()
+
@@ -0,0 +1,143 @@
+"""Batch scoring of a whole student cohort with the student classifier.
+
+Usage:
+    python student_batch.py cohort.csv predictions.csv [--chunksize 20000] [--id-column "Student ID"]
+    python student_batch.py cohort.csv predictions.csv --anytime 0.99   # early-exit voting
+
+The input (CSV or Parquet) may hold any subset of the 36 ST_feature_names
+columns, as codes or as the app's text options ("Yes", "Married", "Daytime",
+"Manual laborer", ...). Missing columns and unreadable values fall back to
+ST_defaults. The file is read and written chunk by chunk, so memory use only
+depends on --chunksize, not on the size of the file.
+
+--anytime CONFIDENCE scores with anytime_voting.AnytimeVoter, which stops
+each row once its class is settled at that confidence, and adds a
+trees_used column.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from feature_encoder import STUDENT_ENCODER
+from feature_schema import labels
+from model_registry import registry
+
+DEFAULT_CHUNKSIZE = 20000
+
+PREDICTION_COLUMN = "prediction"
+PROBA_COLUMNS = [f"p_{label.lower()}" for label in labels]
+TREES_USED_COLUMN = "trees_used"
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+
+
+def is_parquet(name):
+    return str(name).lower().endswith(PARQUET_EXTENSIONS)
+
+
+# ==============================
+# READING
+# ==============================
+def iter_chunks(source, chunksize=DEFAULT_CHUNKSIZE, parquet=None):
+    """Yield DataFrames of at most `chunksize` rows from a CSV/Parquet path or file object."""
+    if parquet is None:
+        parquet = is_parquet(getattr(source, "name", source))
+
+    if parquet:
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, chunksize=chunksize)
+
+
+# ==============================
+# SCORING
+# ==============================
+def score_chunk(model, df, id_column=None):
+    """Predicted outcome plus the three class probabilities for one chunk."""
+    X = STUDENT_ENCODER.frame(df)
+    # An AnytimeVoter also reports how many trees each row needed
+    proba, trees_used = model.vote(X) if hasattr(model, "vote") else (model.predict_proba(X), None)
+    pred = model.classes_[proba.argmax(axis=1)]
+
+    result = pd.DataFrame(proba, columns=PROBA_COLUMNS, index=df.index)
+    result.insert(0, PREDICTION_COLUMN, np.asarray(labels)[pred.astype(int)])
+    if trees_used is not None:
+        result[TREES_USED_COLUMN] = trees_used
+    if id_column is not None:
+        result.insert(0, id_column, df[id_column].to_numpy())
+    return result
+
+
+def iter_scored_chunks(source, chunksize=DEFAULT_CHUNKSIZE, id_column=None, model=None, parquet=None):
+    model = model if model is not None else registry.get("student_model")
+    for chunk in iter_chunks(source, chunksize, parquet=parquet):
+        yield score_chunk(model, chunk, id_column=id_column)
+
+
+def write_chunks(chunks, output_path):
+    """Stream scored chunks to a CSV or Parquet file. Returns the number of rows written."""
+    rows = 0
+    if is_parquet(output_path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output_path, table.schema)
+                writer.write_table(table)
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        with open(output_path, "w", newline="") as f:
+            for chunk in chunks:
+                chunk.to_csv(f, header=(rows == 0), index=False)
+                rows += len(chunk)
+    return rows
+
+
+def score_file(input_path, output_path, chunksize=DEFAULT_CHUNKSIZE, id_column=None, model=None):
+    start = time.perf_counter()
+    rows = write_chunks(iter_scored_chunks(input_path, chunksize, id_column, model), output_path)
+    seconds = time.perf_counter() - start
+    return {"rows": rows, "seconds": seconds, "rows_per_sec": rows / seconds if seconds else 0.0}
+
+
+# ==============================
+# CLI
+# ==============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a student cohort file with the student classifier.")
+    parser.add_argument("input", help="CSV or Parquet file with student features")
+    parser.add_argument("output", help="CSV or Parquet file to write predictions to")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="rows per chunk")
+    parser.add_argument("--id-column", default=None, help="input column copied to the output as row id")
+    parser.add_argument("--anytime", type=float, metavar="CONFIDENCE", default=None,
+                        help="early-exit voting at this confidence (1.0 = stop only when certain)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        parser.error(f"input file not found: {args.input}")
+
+    model = None
+    if args.anytime is not None:
+        from anytime_voting import anytime_model
+
+        model = anytime_model(args.anytime)
+    summary = score_file(args.input, args.output, args.chunksize, args.id_column, model)
+    print(f"Scored {summary['rows']} students in {summary['seconds']:.1f}s "
+          f"({summary['rows_per_sec']:.0f} rows/s) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""Micro-batching: a bad request fails alone and the batcher keeps serving."""
+import numpy as np
+import pytest
+
+from batch_scheduler import MicroBatcher
+
+
+def _row_sums(X):
+    # Like a fitted model: only three-column rows
+    if X.shape[1] != 3:
+        raise ValueError(f"X has {X.shape[1]} features, expected 3")
+    return X.sum(axis=1)
+
+
+def test_wrong_width_request_fails_alone():
+    batcher = MicroBatcher(_row_sums, max_wait_ms=50, name="test")
+    good, bad, other = batcher.submit(np.ones(3)), batcher.submit(np.ones(4)), batcher.submit(np.ones((2, 3)))
+    with pytest.raises(ValueError):
+        bad.result(timeout=5)
+    np.testing.assert_array_equal(good.result(timeout=5), [3.0])
+    np.testing.assert_array_equal(other.result(timeout=5), [3.0, 3.0])
+    assert batcher.stats()["errors"] == 1
+
+    np.testing.assert_array_equal(batcher.predict(np.ones((2, 3))), [3.0, 3.0])
+
+
+def test_failing_model_fails_every_request():
+    def predict(X):
+        raise RuntimeError("model down")
+
+    batcher = MicroBatcher(predict, max_wait_ms=50, name="test")
+    futures = [batcher.submit(np.ones(3)) for _ in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError):
+            future.result(timeout=5)
@@ -0,0 +1,137 @@
+"""CompactForest against the pickled forests it is exported from."""
+import joblib as jb
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from compact_format import (CompactForest, check_parity, check_structure, compact_forest, export,
+                            float32_floor, quantize)
+from forest_compiler import compile_forest
+
+
+def _data(n=3000, n_features=6, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, n_features)) * [1.0, 1e3, 1e-3, 1e5, 7.0, 0.1][:n_features]
+    y = (X[:, 0] + X[:, 1] / 1e3 + rng.normal(scale=0.5, size=n) > 0).astype(int) + (X[:, 4] > 7)
+    return X, y
+
+
+# ==============================
+# THRESHOLDS
+# ==============================
+def test_float32_floor_is_the_largest_float32_not_above():
+    t64 = np.array([0.1, -0.1, 1.0, 2.5, 1e-40, -1e-40, 3.4e38, 1e39, -1e39, np.inf, 16777217.0])
+    t32 = float32_floor(t64)
+    assert t32.dtype == np.float32
+    assert np.all(t32.astype(np.float64) <= t64)
+    finite = np.isfinite(t32)
+    assert np.all(np.nextafter(t32[finite], np.float32(np.inf)).astype(np.float64) > t64[finite])
+    assert float32_floor(np.array([np.inf]))[0] == np.inf
+    # Values already representable in float32 are kept as they are
+    exact = np.array([1.0, 2.5, -0.375], dtype=np.float32)
+    assert np.array_equal(float32_floor(exact.astype(np.float64)), exact)
+
+
+def test_float32_floor_preserves_every_float32_comparison():
+    rng = np.random.default_rng(0)
+    t64 = rng.normal(size=500) * 10.0 ** rng.integers(-8, 8, 500)
+    t32 = float32_floor(t64)
+    # Probe each threshold at its float32 neighbours, where a rounding error would show
+    nearest = t64.astype(np.float32)
+    x = np.concatenate([nearest, np.nextafter(nearest, np.float32(-np.inf)),
+                        np.nextafter(nearest, np.float32(np.inf))])
+    for t_64, t_32 in zip(t64, t32):
+        assert np.array_equal(x.astype(np.float64) <= t_64, x <= t_32)
+
+
+def test_quantize_error_is_within_half_a_step():
+    values = np.random.default_rng(1).uniform(50.0, 300.0, size=(1000, 1))
+    for bits in (8, 16):
+        q, offset, scale = quantize(values, bits)
+        assert np.abs(offset + scale * q - values).max() <= scale.max() / 2 * (1 + 1e-9)
+
+
+# ==============================
+# NODE LAYOUT
+# ==============================
+def test_small_trees_use_uint16_children_and_uint8_features():
+    X, y = _data()
+    forest = RandomForestClassifier(n_estimators=20, random_state=0).fit(X, y)
+    compiled = compile_forest(forest)
+    compact = CompactForest.from_compiled(compiled)
+    assert compact.children.dtype == np.uint16
+    assert compact.feature.dtype == np.uint8
+    assert compact.threshold.dtype == np.float32
+    assert check_structure(compiled, compact) == []
+    assert np.array_equal(compact.apply(X), compiled.apply(X))
+
+
+def test_trees_past_65536_nodes_use_uint32_children():
+    rng = np.random.default_rng(2)
+    X = rng.normal(size=(40000, 3))
+    # Unique noisy targets grow a single tree well past 65536 nodes
+    forest = RandomForestRegressor(n_estimators=2, bootstrap=False, random_state=0).fit(X, rng.normal(size=len(X)))
+    compiled = compile_forest(forest)
+    assert np.diff(np.append(compiled.roots, compiled.n_nodes)).max() > 65536
+    compact = CompactForest.from_compiled(compiled)
+    assert compact.children.dtype == np.uint32
+    assert check_structure(compiled, compact) == []
+    assert check_parity(forest, compact, X[:5000])["ok"]
+
+
+# ==============================
+# PARITY WITH THE PICKLES
+# ==============================
+@pytest.mark.parametrize("value_bits", [8, 16])
+def test_classifier_parity(value_bits):
+    X, y = _data(seed=3)
+    forest = RandomForestClassifier(n_estimators=40, min_samples_leaf=3, random_state=0).fit(X[:2000], y[:2000])
+    report = check_parity(forest, compact_forest(forest, value_bits), X)
+    assert report["ok"] and report["same_splits"] and report["changed_beyond_bound"] == 0
+
+
+@pytest.mark.parametrize("value_bits", [8, 16])
+def test_regressor_parity(value_bits):
+    X, _ = _data(seed=4)
+    target = X[:, 0] * 40.0 + X[:, 4] + 150.0
+    forest = RandomForestRegressor(n_estimators=30, random_state=0).fit(X[:2000], target[:2000])
+    report = check_parity(forest, compact_forest(forest, value_bits), X)
+    assert report["ok"] and report["max_error"] <= report["error_bound"] * (1 + 1e-9)
+
+
+def test_missing_values_follow_the_trained_direction():
+    X, y = _data(seed=5)
+    X[np.random.default_rng(5).random(X.shape) < 0.1] = np.nan
+    forest = RandomForestClassifier(n_estimators=20, random_state=0).fit(X[:2000], y[:2000])
+    assert check_parity(forest, compact_forest(forest), X)["ok"]
+
+
+# ==============================
+# EXPORT
+# ==============================
+def test_export_without_data_is_checked_structurally(tmp_path):
+    X, y = _data(seed=6)
+    forest = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    model_path, output_path = tmp_path / "forest.pkl", tmp_path / "forest_compact.joblib"
+    jb.dump(forest, model_path)
+
+    # No training matrix: only the data-free structure check can run
+    export(str(model_path), str(output_path))
+    loaded = jb.load(output_path, mmap_mode="r")
+    assert isinstance(loaded.children, np.memmap)
+    assert loaded.source_sha256 is not None
+    assert check_structure(compile_forest(forest), loaded) == []
+    assert check_parity(forest, loaded, X)["ok"]
+
+
+def test_export_refuses_a_table_that_fails_the_structure_check(tmp_path, monkeypatch):
+    import compact_format
+
+    X, y = _data(seed=7)
+    model_path = tmp_path / "forest.pkl"
+    jb.dump(RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y), model_path)
+    # Round to nearest instead of down: some splits would move
+    monkeypatch.setattr(compact_format, "float32_floor", lambda t: np.asarray(t, dtype=np.float32))
+    with pytest.raises(ValueError, match="thresholds"):
+        export(str(model_path), str(tmp_path / "out.joblib"))
+    assert not (tmp_path / "out.joblib").exists()
@@ -0,0 +1,44 @@
+"""County tables must come from, and be cached under, the model currently on disk."""
+import joblib as jb
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+import county_scoring
+from benchmarks.common import sample_cancer_records
+from feature_encoder import CANCER_ENCODER
+from model_registry import ModelRegistry, file_sha256
+
+
+def _forest(X, seed):
+    target = np.random.default_rng(seed).normal(170, 20, len(X))
+    return RandomForestRegressor(n_estimators=5 + seed, random_state=seed).fit(X, target)
+
+
+def test_retrained_model_is_rescored_not_served_from_cache(tmp_path, monkeypatch):
+    registry = ModelRegistry(model_dir=str(tmp_path))
+    monkeypatch.setattr(county_scoring, "registry", registry)
+    counties = pd.DataFrame(sample_cancer_records(50, seed=0)).assign(geography="Kitsap County, Washington")
+    counties.to_csv(tmp_path / "counties.csv", index=False)
+    X = CANCER_ENCODER.frame(counties)
+
+    first, second = _forest(X, 1), _forest(X, 2)
+    jb.dump(first, registry.path("cancer_model"))
+    cache_dir = str(tmp_path / "cache")
+    tables = county_scoring.county_scores(str(tmp_path / "counties.csv"), cache_dir=cache_dir)
+    np.testing.assert_allclose(tables["counties"]["death_rate"], first.predict(X))
+
+    # Retrain after the first model was loaded
+    jb.dump(second, registry.path("cancer_model"))
+    for _ in range(2):  # rescored, then read back from the cache
+        tables = county_scoring.county_scores(str(tmp_path / "counties.csv"), cache_dir=cache_dir)
+        np.testing.assert_allclose(tables["counties"]["death_rate"], second.predict(X))
+
+
+def test_file_sha256_of_a_file_object(tmp_path):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"x" * 3_000_000)
+    with open(path, "rb") as f:
+        f.seek(10)
+        assert file_sha256(f) == file_sha256(str(path))
+        assert f.tell() == 10
@@ -0,0 +1,28 @@
+"""Text columns: the per-distinct-value mapping must match the one-record loop."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from feature_encoder import LOOP_MAX_ROWS, STUDENT_ENCODER
+
+
+def test_long_text_column_matches_row_by_row():
+    values = ["Yes", " No ", "Married", "1", "2.5", "maybe", None, np.nan, 3, True, ""]
+    column = next(name for name, table in zip(STUDENT_ENCODER.feature_names, STUDENT_ENCODER.text_maps) if table)
+    frame = pd.DataFrame({column: pd.Series(values * (LOOP_MAX_ROWS // len(values) + 2), dtype=object)})
+    assert len(frame) > LOOP_MAX_ROWS
+
+    expected = np.vstack([STUDENT_ENCODER.transform({column: value}) for value in frame[column]])
+    np.testing.assert_array_equal(STUDENT_ENCODER.transform(frame), expected)
+
+
+def test_ship_batch_rejects_a_record_missing_a_number():
+    from benchmarks.common import sample_ship_records
+    from feature_encoder import SHIP_ENCODER
+
+    records = sample_ship_records(3)
+    feature = SHIP_ENCODER.numerical_features[0]
+    for broken in ({k: v for k, v in records[1].items() if k != feature}, {**records[1], feature: None}):
+        with pytest.raises(ValueError, match=feature):
+            SHIP_ENCODER.transform([records[0], broken, records[2]])
+    assert not np.isnan(SHIP_ENCODER.transform(records)).any()
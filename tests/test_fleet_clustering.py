@@ -0,0 +1,48 @@
+"""FusedClusterPredictor must label rows exactly like scaler.transform + kmeans.predict."""
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.cluster import KMeans
+from sklearn.preprocessing import StandardScaler
+
+from fleet_clustering import FusedClusterPredictor, check_parity
+
+
+def _voyages(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    numeric = rng.normal(loc=[15.0, 1500.0, 1e5], scale=[4.0, 600.0, 4e4], size=(n, 3))
+    onehot = np.eye(4)[rng.integers(0, 4, n)]
+    return np.hstack([numeric, onehot])
+
+
+@pytest.mark.parametrize("with_mean, with_std", [(True, True), (False, True), (True, False)])
+def test_fused_predict_matches_scaler_then_kmeans(with_mean, with_std):
+    X = _voyages()
+    scaler = StandardScaler(with_mean=with_mean, with_std=with_std).fit(X[:1500])
+    kmeans = KMeans(n_clusters=3, n_init=3, random_state=0).fit(scaler.transform(X[:1500]))
+
+    fused = FusedClusterPredictor(scaler, kmeans).predict(X)
+    assert np.array_equal(fused, kmeans.predict(scaler.transform(X)))
+    assert check_parity(scaler, kmeans, X) == 0
+
+
+@pytest.mark.parametrize("with_mean, with_std", [(True, True), (False, True), (True, False), (False, False)])
+def test_fused_predict_matches_on_close_clusters(with_mean, with_std):
+    # Off-centre data with overlapping clusters: any stray centring or scaling changes labels
+    rng = np.random.default_rng(2)
+    X = rng.normal(loc=5.0, scale=[1.0, 3.0, 0.5, 2.0], size=(3000, 4))
+    scaler = StandardScaler(with_mean=with_mean, with_std=with_std).fit(X)
+    kmeans = KMeans(n_clusters=6, n_init=3, random_state=0).fit(scaler.transform(X))
+
+    fused = FusedClusterPredictor(scaler, kmeans).predict(X)
+    assert np.array_equal(fused, kmeans.predict(scaler.transform(X)))
+
+
+def test_fused_predict_accepts_named_columns():
+    X = _voyages(n=300, seed=1)
+    columns = [f"c{i}" for i in range(X.shape[1])]
+    frame = pd.DataFrame(X, columns=columns)
+    scaler = StandardScaler().fit(frame)
+    kmeans = KMeans(n_clusters=3, n_init=3, random_state=0).fit(scaler.transform(frame))
+    assert np.array_equal(FusedClusterPredictor(scaler, kmeans).predict(frame),
+                          kmeans.predict(scaler.transform(frame)))
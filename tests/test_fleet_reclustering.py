@@ -0,0 +1,45 @@
+"""Re-clustering checkpoints only replace the registry's k-means with --promote."""
+import os
+import shutil
+
+import pytest
+
+import fleet_reclustering
+from benchmarks.common import sample_ship_frame
+from model_registry import ModelRegistry
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    for name in ("scaler", "kmeans"):
+        shutil.copy(os.path.join(REPO, fleet_reclustering.registry.artifacts[name]), tmp_path)
+    monkeypatch.setattr(fleet_reclustering, "registry", ModelRegistry(model_dir=str(tmp_path)))
+    sample_ship_frame(500, seed=0).to_csv(tmp_path / "voyages.csv", index=False)
+    return tmp_path
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_checkpoint_leaves_the_registry_model_alone(model_dir):
+    original = _read(model_dir / "kmeans_model.pkl")
+    output = model_dir / "out" / "fleet.pkl"
+    fleet_reclustering.main([str(model_dir / "voyages.csv"), "--output", str(output)])
+    assert output.exists()
+    assert _read(model_dir / "kmeans_model.pkl") == original
+
+
+def test_default_output_is_a_new_versioned_file(model_dir):
+    path = fleet_reclustering.versioned_path(str(model_dir / "checkpoints"))
+    assert os.path.dirname(path) == str(model_dir / "checkpoints")
+    assert os.path.basename(path).startswith("kmeans_model-") and path.endswith(".pkl")
+
+
+def test_promote_replaces_the_registry_model(model_dir):
+    output = model_dir / "fleet.pkl"
+    fleet_reclustering.main([str(model_dir / "voyages.csv"), "--output", str(output), "--promote"])
+    assert _read(model_dir / "kmeans_model.pkl") == _read(output)
@@ -0,0 +1,16 @@
+"""Reading voyage streams: one bad line must not end the stream."""
+from fleet_stream import InvalidRecord, iter_records
+
+
+def test_bad_json_lines_become_invalid_records():
+    lines = ['{"a": 1}\n', "not json\n", "[1, 2]\n", "\n", '{"b": 2}\n']
+    records = list(iter_records(lines))
+    assert records[0] == {"a": 1} and records[3] == {"b": 2}
+    assert isinstance(records[1], InvalidRecord) and records[1].error.startswith("invalid JSON")
+    assert isinstance(records[2], InvalidRecord) and "list" in records[2].error
+    # An invalid record is still an (empty) dict for readers that only look fields up
+    assert records[1].get("voyage_id") is None
+
+
+def test_csv_records_use_the_header():
+    assert list(iter_records(["x,y\n", "1,2\n"])) == [{"x": "1", "y": "2"}]
@@ -0,0 +1,64 @@
+"""CompiledForest must reproduce the sklearn forest it came from bit for bit."""
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from forest_compiler import check_parity, compile_forest
+
+
+def _data(n=3000, n_features=8, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, n_features))
+    y = (X[:, 0] + X[:, 1] * X[:, 2] + rng.normal(scale=0.5, size=n) > 0).astype(int) + (X[:, 3] > 1)
+    return X, y
+
+
+def test_classifier_predict_proba_is_bit_for_bit():
+    X, y = _data()
+    forest = RandomForestClassifier(n_estimators=60, min_samples_leaf=3, random_state=0).fit(X[:2000], y[:2000])
+    compiled = compile_forest(forest)
+    assert np.array_equal(forest.predict_proba(X), compiled.predict_proba(X))
+    assert np.array_equal(forest.predict(X), compiled.predict(X))
+    assert check_parity(forest, compiled, X)
+
+
+def test_regressor_predict_is_bit_for_bit():
+    X, y = _data(seed=1)
+    target = X[:, 0] * 3.0 + y
+    forest = RandomForestRegressor(n_estimators=30, random_state=0).fit(X[:2000], target[:2000])
+    assert check_parity(forest, compile_forest(forest), X)
+
+
+def test_missing_values_follow_the_trained_direction():
+    X, y = _data(seed=2)
+    X[np.random.default_rng(2).random(X.shape) < 0.1] = np.nan
+    forest = RandomForestClassifier(n_estimators=20, random_state=0).fit(X[:2000], y[:2000])
+    assert check_parity(forest, compile_forest(forest), X)
+
+
+def test_wrong_width_is_rejected():
+    X, y = _data(n=200)
+    compiled = compile_forest(RandomForestClassifier(n_estimators=3, random_state=0).fit(X, y))
+    with pytest.raises(ValueError):
+        compiled.predict(X[:, :-1])
+
+
+def test_stale_export_is_not_served(tmp_path, monkeypatch):
+    import joblib as jb
+
+    import forest_compiler
+    from model_registry import ModelRegistry
+
+    monkeypatch.setattr(forest_compiler, "registry", ModelRegistry(model_dir=str(tmp_path)))
+    registry = forest_compiler.registry
+    X, y = _data(n=500)
+    jb.dump(RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y), registry.path("student_model"))
+    forest_compiler.export(registry.path("student_model"), registry.path("student_compiled"))
+    assert forest_compiler.compiled_model("student_model") is registry.get("student_compiled")
+
+    # Retrain the pickle but leave the old export in place
+    retrained = RandomForestClassifier(n_estimators=6, random_state=1).fit(X, y)
+    jb.dump(retrained, registry.path("student_model"))
+    compiled = forest_compiler.compiled_model("student_model")
+    assert compiled.n_trees == 6
+    assert check_parity(retrained, compiled, X)
@@ -0,0 +1,30 @@
+"""PD / ICE curves must come from, and be cached under, the model currently on disk."""
+import joblib as jb
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+import partial_dependence
+from benchmarks.common import sample_cancer_records
+from feature_encoder import CANCER_ENCODER
+from model_registry import ModelRegistry
+
+
+def test_retrained_model_gets_new_curves(tmp_path, monkeypatch):
+    registry = ModelRegistry(model_dir=str(tmp_path))
+    monkeypatch.setattr(partial_dependence, "registry", registry)
+    counties = sample_cancer_records(40, seed=0)
+    X = CANCER_ENCODER.frame(counties)
+    feature = CANCER_ENCODER.feature_names[0]
+    cache_dir = str(tmp_path / "cache")
+
+    curves = []
+    for seed in (1, 2):
+        target = np.random.default_rng(seed).normal(170, 20, len(X)) + seed * X[feature]
+        jb.dump(RandomForestRegressor(n_estimators=5, random_state=seed).fit(X, target), registry.path("cancer_model"))
+        for _ in range(2):  # computed, then read back from the cache
+            result = partial_dependence.cancer_partial_dependence(counties, [feature], 5, cache_dir=cache_dir)
+            curves.append(result[feature]["pd"])
+
+    np.testing.assert_array_equal(curves[0], curves[1])
+    np.testing.assert_array_equal(curves[2], curves[3])
+    assert not np.array_equal(curves[0], curves[2])
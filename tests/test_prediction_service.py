@@ -0,0 +1,37 @@
+"""HTTP framing: bad or oversized Content-Length gets a status, not a dropped connection."""
+import asyncio
+
+import pytest
+
+from prediction_service import MAX_BODY_BYTES, _serve_connection
+
+
+class EchoService:
+    async def handle(self, method, path, body):
+        return 200, {"bytes": len(body)}
+
+
+def _request(content_length, body=b""):
+    # HTTP/1.0, so the server closes the connection after one response
+    async def request():
+        server = await asyncio.start_server(lambda r, w: _serve_connection(EchoService(), r, w), "127.0.0.1", 0)
+        async with server:
+            reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+            writer.write(f"POST /student HTTP/1.0\r\nContent-Length: {content_length}\r\n\r\n".encode() + body)
+            response = await reader.read()
+            writer.close()
+        return response
+
+    return asyncio.run(request())
+
+
+@pytest.mark.parametrize("content_length, status", [
+    ("abc", b"400"), ("-1", b"400"), ("1.5", b"400"), (str(MAX_BODY_BYTES + 1), b"413"),
+])
+def test_rejected_content_length(content_length, status):
+    assert _request(content_length).split()[1] == status
+
+
+def test_valid_content_length_reads_the_body():
+    response = _request("2", b"{}")
+    assert response.split()[1] == b"200" and response.endswith(b'{"bytes": 2}')
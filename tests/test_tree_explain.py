@@ -0,0 +1,21 @@
+"""Path attributions of forests without stored feature names."""
+import joblib as jb
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+import forest_compiler
+import tree_explain
+from model_registry import ModelRegistry
+
+
+def test_explain_row_names_unnamed_features(tmp_path, monkeypatch):
+    monkeypatch.setattr(forest_compiler, "registry", ModelRegistry(model_dir=str(tmp_path)))
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(300, 4))
+    forest = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, X[:, 0] - 2 * X[:, 2])
+    assert getattr(forest, "feature_names_in_", None) is None
+    jb.dump(forest, forest_compiler.registry.path("cancer_model"))
+
+    bias, frame = tree_explain.explain_row("cancer_model", X[:1])
+    assert sorted(frame["feature"]) == ["x0", "x1", "x2", "x3"]
+    assert np.isclose(bias + frame["contribution"].sum(), forest.predict(X[:1])[0])
@@ -0,0 +1,317 @@
+"""Build every model artifact the apps load from the raw datasets.
+
+Usage:
+    python -m training_pipeline --student data.csv --cancer cancer_reg.csv --ship Ship_Performance_Dataset.csv
+        [--output-dir DIR] [--n-jobs -1] [--cache-dir DIR] [--compile]
+
+Stages (each one only runs when its dataset is given):
+    student  RandomForestClassifier on the 36 ST_feature_names -> student_rf_model.pkl,
+             student_all_defaults.pkl (medians), top_student_features.pkl (top 8 importances)
+    cancer   RandomForestRegressor on the 30 CA_feature_names (text columns dropped, missing
+             values imputed with the median) -> cancer_rf_model.pkl, cancer_all_defaults.pkl,
+             top10_cancer_features.pkl
+    ship     StandardScaler + KMeans(3) on the 29 one-hot ship columns -> scaler.pkl, kmeans_model.pkl
+    compile  (--compile) the forests' memory-mappable node tables (see forest_compiler.py)
+
+The forests are fitted on the training 80% of a fixed split (holdout_split)
+and scored on the other 20%; the defaults are the column medians of the
+dataset, not the values shipped with the repository. Exports of a forest
+this run rewrites (*_compiled.joblib, *_compact.joblib) are deleted, so the
+apps never serve a table built from the old forest; --compile writes fresh
+compiled tables.
+
+The forests are fitted with n_jobs worker threads and saved with n_jobs unset,
+so the apps predict single rows without starting a thread pool. Every random
+step uses RANDOM_STATE, so the same data gives the same models. The encoded
+feature matrices are cached per dataset content hash, so re-runs skip reading
+and encoding. The time of each stage and the SHA-256 of each dataset and
+artifact go to training_manifest.json in the output folder.
+"""
+import argparse
+import json
+import os
+import platform
+import time
+
+import joblib as jb
+import numpy as np
+import pandas as pd
+import sklearn
+
+from feature_encoder import SHIP_ENCODER
+from feature_schema import ST_feature_names, CA_feature_names, labels
+from instrumentation import instruments
+from model_registry import ARTIFACTS, file_sha256, registry
+
+RANDOM_STATE = 42
+# Share of each dataset held out for the metrics in the manifest
+TEST_SIZE = 0.2
+N_ESTIMATORS = 100
+N_CLUSTERS = 3
+TOP_STUDENT_FEATURES = 8
+TOP_CANCER_FEATURES = 10
+
+STUDENT_TARGET = "Target"
+CANCER_TARGET = "target_deathrate"
+
+# Bump when the encoding below changes, to invalidate cached feature matrices
+FEATURES_VERSION = 1
+CACHE_DIR = os.environ.get("TRAINING_CACHE_DIR", os.path.join(registry.model_dir, ".training_cache"))
+MANIFEST_FILE = "training_manifest.json"
+
+
+# ==============================
+# FEATURE MATRICES
+# ==============================
+def student_matrix(path):
+    """(X, y) of the student dataset; the UCI file is ';'-separated with text targets."""
+    data = pd.read_csv(path, sep=None, engine="python")
+    target = data[STUDENT_TARGET]
+    if target.dtype == object:
+        target = target.str.strip().map({label: i for i, label in enumerate(labels)})
+        if target.isna().any():
+            raise ValueError(f"Unknown {STUDENT_TARGET} values; expected {labels}")
+    return data[ST_feature_names].to_numpy(dtype=np.float64), target.to_numpy(dtype=np.int64)
+
+
+def cancer_matrix(path):
+    """(X, y) of the cancer dataset with missing values imputed by the column median."""
+    data = pd.read_csv(path, encoding="latin-1")
+    X = data[CA_feature_names].to_numpy(dtype=np.float64)
+    medians = np.nanmedian(X, axis=0)
+    missing = np.isnan(X)
+    X[missing] = np.take(medians, np.nonzero(missing)[1])
+    return X, data[CANCER_TARGET].to_numpy(dtype=np.float64)
+
+
+def ship_matrix(path):
+    """One-hot ship matrix in the trained column order; 'None' categories stay all-zero."""
+    data = pd.read_csv(path)
+    return SHIP_ENCODER.transform(data, errors="ignore"), None
+
+
+MATRICES = {"student": student_matrix, "cancer": cancer_matrix, "ship": ship_matrix}
+
+
+def cached_matrix(name, path, cache_dir=CACHE_DIR):
+    """MATRICES[name](path), cached on disk per dataset hash. Returns (X, y, dataset sha256)."""
+    sha = file_sha256(path)
+    cache_path = os.path.join(cache_dir, f"{name}_{sha[:16]}_v{FEATURES_VERSION}.npz") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            return cached["X"], (cached["y"] if "y" in cached else None), sha
+
+    X, y = MATRICES[name](path)
+    if cache_path:
+        arrays = {"X": X} if y is None else {"X": X, "y": y}
+        # Write then rename, so an interrupted run never leaves half a cache file
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp.npz"
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.savez(tmp_path, **arrays)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+    return X, y, sha
+
+
+def holdout_split(stage, X, y):
+    """(X_train, X_test, y_train, y_test): the fixed split the forests are fitted and scored on."""
+    from sklearn.model_selection import train_test_split
+
+    stratify = y if stage == "student" else None
+    return train_test_split(X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE, stratify=stratify)
+
+
+# ==============================
+# PIPELINE
+# ==============================
+class TrainingPipeline:
+    """Runs the stages and writes their artifacts and the manifest into `output_dir`."""
+
+    def __init__(self, output_dir=None, n_jobs=-1, cache_dir=CACHE_DIR, forest_params=None):
+        self.output_dir = output_dir or registry.model_dir
+        self.n_jobs = n_jobs
+        self.cache_dir = cache_dir
+        # Stage -> forest hyperparameters overriding the defaults (e.g. from tuning.py)
+        self.forest_params = forest_params or {}
+        self.manifest = {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "environment": {"python": platform.python_version(), "sklearn": sklearn.__version__,
+                            "numpy": np.__version__, "pandas": pd.__version__},
+            "params": {"random_state": RANDOM_STATE, "test_size": TEST_SIZE, "n_estimators": N_ESTIMATORS,
+                       "n_clusters": N_CLUSTERS, "n_jobs": n_jobs, "features_version": FEATURES_VERSION,
+                       "forest_params": self.forest_params},
+            "datasets": {}, "stages": {}, "metrics": {}, "artifacts": {}, "removed": [],
+        }
+
+    def _timed(self, stage, name, func, *args):
+        start = time.perf_counter()
+        with instruments.span("train", stage=stage, step=name):
+            result = func(*args)
+        self.manifest["stages"].setdefault(stage, {})[name] = time.perf_counter() - start
+        return result
+
+    def _save(self, name, obj):
+        """Write one registry artifact (atomically) and record its hash."""
+        path = os.path.join(self.output_dir, ARTIFACTS[name])
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        jb.dump(obj, tmp_path)
+        os.replace(tmp_path, path)
+        self.manifest["artifacts"][name] = {"file": ARTIFACTS[name], "bytes": os.path.getsize(path),
+                                            "sha256": file_sha256(path)}
+        return path
+
+    def _load(self, stage, path):
+        X, y, sha = self._timed(stage, "features", cached_matrix, stage, path, self.cache_dir)
+        self.manifest["datasets"][stage] = {"file": os.path.basename(path), "rows": len(X), "sha256": sha}
+        return X, y
+
+    def _fit_forest(self, stage, estimator, X, y):
+        X_train, X_test, y_train, y_test = holdout_split(stage, X, y)
+        columns = ST_feature_names if stage == "student" else CA_feature_names
+        # Fit on named columns, like the shipped models (predict checks the names)
+        X_train = pd.DataFrame(X_train, columns=columns)
+        X_test = pd.DataFrame(X_test, columns=columns)
+        self._timed(stage, "fit", estimator.fit, X_train, y_train)
+        predicted = self._timed(stage, "evaluate", estimator.predict, X_test)
+        # Ship single-threaded: the apps predict a row at a time
+        estimator.set_params(n_jobs=None)
+        return y_test, predicted
+
+    def _top_features(self, forest, columns, n):
+        order = np.argsort(forest.feature_importances_)[::-1][:n]
+        return [columns[i] for i in order]
+
+    def train_student(self, path):
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.metrics import accuracy_score, f1_score
+
+        X, y = self._load("student", path)
+        forest = RandomForestClassifier(**{"n_estimators": N_ESTIMATORS, **self.forest_params.get("student", {})},
+                                        random_state=RANDOM_STATE, n_jobs=self.n_jobs)
+        y_test, predicted = self._fit_forest("student", forest, X, y)
+        self.manifest["metrics"]["student"] = {"accuracy": accuracy_score(y_test, predicted),
+                                               "macro_f1": f1_score(y_test, predicted, average="macro")}
+
+        defaults = dict(zip(ST_feature_names, np.median(X, axis=0).tolist()))
+        self._timed("student", "save", self._save_all, {
+            "student_model": forest,
+            "student_defaults": defaults,
+            "top_student": self._top_features(forest, ST_feature_names, TOP_STUDENT_FEATURES),
+        })
+
+    def train_cancer(self, path):
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.metrics import mean_absolute_error, r2_score
+
+        X, y = self._load("cancer", path)
+        forest = RandomForestRegressor(**{"n_estimators": N_ESTIMATORS, **self.forest_params.get("cancer", {})},
+                                       random_state=RANDOM_STATE, n_jobs=self.n_jobs)
+        y_test, predicted = self._fit_forest("cancer", forest, X, y)
+        self.manifest["metrics"]["cancer"] = {"r2": r2_score(y_test, predicted),
+                                              "mae": mean_absolute_error(y_test, predicted)}
+
+        defaults = dict(zip(CA_feature_names, np.median(X, axis=0).tolist()))
+        self._timed("cancer", "save", self._save_all, {
+            "cancer_model": forest,
+            "cancer_defaults": defaults,
+            "top_cancer": self._top_features(forest, CA_feature_names, TOP_CANCER_FEATURES),
+        })
+
+    def train_ship(self, path):
+        from sklearn.cluster import KMeans
+        from sklearn.preprocessing import StandardScaler
+
+        X, _ = self._load("ship", path)
+        X = pd.DataFrame(X, columns=SHIP_ENCODER.columns)
+        scaler = StandardScaler()
+        scaled = self._timed("ship", "scale", scaler.fit_transform, X)
+        kmeans = KMeans(n_clusters=N_CLUSTERS, random_state=RANDOM_STATE, n_init="auto")
+        self._timed("ship", "fit", kmeans.fit, scaled)
+        self.manifest["metrics"]["ship"] = {"inertia": float(kmeans.inertia_),
+                                            "cluster_sizes": np.bincount(kmeans.labels_).tolist()}
+        self._timed("ship", "save", self._save_all, {"scaler": scaler, "kmeans": kmeans})
+
+    def compile_forests(self):
+        from forest_compiler import COMPILED_ARTIFACTS, compile_file
+
+        for name, compiled_name in COMPILED_ARTIFACTS.items():
+            path = os.path.join(self.output_dir, ARTIFACTS[name])
+            if os.path.exists(path):
+                self._timed("compile", name, lambda: self._save(compiled_name, compile_file(path)))
+
+    def remove_stale_exports(self):
+        """Delete the compiled / compact exports of every forest this run rewrote."""
+        from compact_format import COMPACT_ARTIFACTS
+        from forest_compiler import COMPILED_ARTIFACTS
+
+        for name in (COMPILED_ARTIFACTS.keys() & self.manifest["artifacts"].keys()):
+            for export_name in (COMPILED_ARTIFACTS[name], COMPACT_ARTIFACTS[name]):
+                path = os.path.join(self.output_dir, ARTIFACTS[export_name])
+                if os.path.exists(path):
+                    os.remove(path)
+                    self.manifest["removed"].append(ARTIFACTS[export_name])
+
+    def _save_all(self, artifacts):
+        for name, obj in artifacts.items():
+            self._save(name, obj)
+
+    def run(self, student=None, cancer=None, ship=None, compiled=False):
+        os.makedirs(self.output_dir, exist_ok=True)
+        start = time.perf_counter()
+        for stage, path, train in (("student", student, self.train_student), ("cancer", cancer, self.train_cancer),
+                                   ("ship", ship, self.train_ship)):
+            if path:
+                train(path)
+        self.remove_stale_exports()
+        if compiled:
+            self.compile_forests()
+        self.manifest["total_seconds"] = time.perf_counter() - start
+
+        manifest_path = os.path.join(self.output_dir, MANIFEST_FILE)
+        with open(manifest_path, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        return self.manifest
+
+
+# ==============================
+# CLI
+# ==============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the app models from the raw datasets.")
+    parser.add_argument("--student", help="student dropout / academic success CSV (UCI, ';'-separated)")
+    parser.add_argument("--cancer", help="cancer regression CSV (cancer_reg.csv)")
+    parser.add_argument("--ship", help="ship performance CSV")
+    parser.add_argument("--output-dir", default=None, help="where to write the artifacts (default: MODEL_DIR)")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="threads for fitting the forests")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help="feature matrix cache ('' to disable)")
+    parser.add_argument("--compile", action="store_true", help="also export the compiled node tables")
+    parser.add_argument("--params", help='JSON file of forest hyperparameters, {"student": {...}, "cancer": {...}}'
+                                         " (as written by tuning.py --best-params)")
+    args = parser.parse_args(argv)
+
+    if not (args.student or args.cancer or args.ship):
+        parser.error("give at least one of --student, --cancer, --ship")
+    for path in (args.student, args.cancer, args.ship):
+        if path and not os.path.exists(path):
+            parser.error(f"dataset not found: {path}")
+
+    forest_params = None
+    if args.params:
+        with open(args.params) as f:
+            forest_params = json.load(f)
+    pipeline = TrainingPipeline(args.output_dir, args.n_jobs, args.cache_dir or None, forest_params)
+    manifest = pipeline.run(args.student, args.cancer, args.ship, args.compile)
+    for stage, steps in manifest["stages"].items():
+        print(f"{stage:<8} " + "  ".join(f"{step} {seconds:.2f}s" for step, seconds in steps.items()))
+    for stage, metrics in manifest["metrics"].items():
+        print(f"{stage:<8} {metrics}")
+    if manifest["removed"]:
+        print(f"Removed stale exports: {', '.join(manifest['removed'])}")
+    print(f"{len(manifest['artifacts'])} artifacts in {manifest['total_seconds']:.1f}s -> "
+          f"{os.path.join(pipeline.output_dir, MANIFEST_FILE)}")
+
+
+if __name__ == "__main__":
+    main()
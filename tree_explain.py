@@ -0,0 +1,107 @@
+"""Per-prediction feature contributions for the compiled forests (Saabas path attribution).
+
+Every node of every tree stores the mean target (regressor) or class
+probabilities (classifier) of its training samples. Walking a row down a tree,
+each split moves the prediction from value[node] to value[child]; that change
+is credited to the split's feature. Averaged over the trees:
+
+    prediction = bias + sum(contributions)
+    bias       = mean over trees of value[root]
+
+The node-to-child deltas are computed once per forest and cached, so
+explaining a batch costs one walk down the trees (the same active-set
+traversal as CompiledForest.apply) plus a bincount per output.
+"""
+import numpy as np
+import pandas as pd
+
+from forest_compiler import DEFAULT_CHUNK_ROWS, compiled_model
+
+
+class PathExplainer:
+    def __init__(self, forest):
+        self.forest = forest
+        value = forest.value if forest.value.ndim == 2 else forest.value[:, np.newaxis]
+
+        # delta[c] = value[c] - value[parent of c]; roots keep 0
+        self.node_delta = np.zeros_like(value)
+        internal = np.flatnonzero(~forest.is_leaf)
+        for side in (0, 1):
+            child = forest.children[internal, side]
+            self.node_delta[child] = value[child] - value[internal]
+        self.bias = value[forest.roots].mean(axis=0)
+        self.n_outputs = value.shape[1]
+
+    def _contributions(self, X):
+        forest = self.forest
+        n_rows, n_features = X.shape
+        n_trees = forest.n_trees
+        node = np.tile(forest.roots, n_rows)
+        row = np.repeat(np.arange(n_rows), n_trees)
+        flat_X = np.ascontiguousarray(X).ravel()
+        children = forest.children.ravel()
+        has_nan = np.isnan(flat_X).any()
+
+        out = np.zeros((n_rows * n_features, self.n_outputs))
+        active = np.flatnonzero(~forest.is_leaf[node])
+        while active.size:
+            current = node[active]
+            feature = forest.feature[current]
+            slot = row[active] * n_features + feature
+            x = flat_X[slot]
+            go_left = x <= forest.threshold[current]
+            if has_nan:
+                go_left |= np.isnan(x) & forest.missing_left[current]
+            current = children[2 * current + ~go_left]
+            # Credit the move to the split's feature, for every output at once
+            delta = self.node_delta[current]
+            for k in range(self.n_outputs):
+                out[:, k] += np.bincount(slot, weights=delta[:, k], minlength=len(out))
+            node[active] = current
+            active = active[~forest.is_leaf[current]]
+        return out.reshape(n_rows, n_features, self.n_outputs) / n_trees
+
+    def contributions(self, X):
+        """(n_rows, n_features, n_outputs) contributions; bias + their sum over features = prediction."""
+        X = self.forest._as_array(X)
+        chunks = [self._contributions(X[i:i + DEFAULT_CHUNK_ROWS]) for i in range(0, len(X), DEFAULT_CHUNK_ROWS)]
+        if not chunks:
+            return np.empty((0, X.shape[1], self.n_outputs))
+        return np.concatenate(chunks)
+
+    def check(self, X):
+        """True when bias + contributions reproduces the forest's predictions (up to rounding)."""
+        expected = self.forest._mean_value(X)
+        if expected.ndim == 1:
+            expected = expected[:, np.newaxis]
+        return np.allclose(self.bias + self.contributions(X).sum(axis=1), expected, rtol=1e-9, atol=1e-9)
+
+
+_explainers = {}
+
+
+def explainer(name):
+    """Cached PathExplainer for a registry model ('student_model' or 'cancer_model')."""
+    forest = compiled_model(name)
+    if _explainers.get(name, (None,))[0] is not forest:
+        _explainers[name] = (forest, PathExplainer(forest))
+    return _explainers[name][1]
+
+
+def explain_row(name, X, output=0, feature_names=None, top=None):
+    """Contributions of one encoded row to one output, sorted by absolute size.
+
+    Returns (bias, DataFrame with 'feature', 'value' and 'contribution' columns).
+    """
+    path_explainer = explainer(name)
+    X = path_explainer.forest._as_array(X)[:1]
+    contrib = path_explainer.contributions(X)[0, :, output]
+    if feature_names is None:
+        feature_names = path_explainer.forest.feature_names_in_
+    if feature_names is None:
+        # Forest fitted on a plain array: sklearn's own x0, x1, ... names
+        feature_names = [f"x{i}" for i in range(X.shape[1])]
+    frame = pd.DataFrame({"feature": [str(f).strip() for f in feature_names], "value": X[0],
+                          "contribution": contrib})
+    frame = frame.reindex(frame["contribution"].abs().sort_values(ascending=False).index)
+    return float(path_explainer.bias[output]), (frame if top is None else frame.head(top)).reset_index(drop=True)
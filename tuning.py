@@ -0,0 +1,293 @@
+"""Hyperparameter search for the student classifier and the cancer regressor.
+
+Usage:
+    python -m tuning student data.csv [--candidates 27] [--factor 3] [--folds 5] [--n-jobs -1]
+    python -m tuning cancer cancer_reg.csv --hyperband --output cancer_tuning.csv --best-params params.json
+
+Successive halving over n_estimators, max_depth and max_features: every
+candidate is cross-validated on a small share of the training rows, the best
+1/factor go on to `factor` times as many rows, until the survivors are scored
+on all of them. --hyperband runs several such brackets that start with
+fewer candidates on more rows, in case a small budget misjudges them.
+
+X, y and the fold assignment are written once as .npy files and every worker
+memory-maps them, so candidates and folds share one copy of the data. The
+(candidate, fold) fits of a round run in parallel, one core each. Besides
+the CV score, every fit records the single-row latency of the compiled forest
+(the apps' serving path, see forest_compiler.py) and its node count. The
+latencies are measured while other fits run, so compare them with each other
+rather than with the app.
+
+--best-params writes the best candidate in the format training_pipeline.py's
+--params reads.
+"""
+import argparse
+import json
+import math
+import os
+import tempfile
+import time
+
+import joblib as jb
+import numpy as np
+import pandas as pd
+
+from training_pipeline import RANDOM_STATE, cached_matrix
+
+SEARCH_SPACE = {
+    "n_estimators": [25, 50, 100, 200, 400],
+    "max_depth": [None, 8, 12, 16, 24],
+    "max_features": ["sqrt", "log2", 0.3, 0.5, 1.0],
+}
+DEFAULT_CANDIDATES = 27
+DEFAULT_FACTOR = 3
+DEFAULT_FOLDS = 5
+# Fewest training rows a first-round candidate is fitted on
+DEFAULT_MIN_RESOURCES = 200
+# Single-row predictions timed per fit
+LATENCY_CALLS = 50
+
+TASKS = {
+    "student": {"estimator": "RandomForestClassifier", "metric": "accuracy", "stratified": True},
+    "cancer": {"estimator": "RandomForestRegressor", "metric": "r2", "stratified": False},
+}
+
+
+# ==============================
+# CACHED FOLDS
+# ==============================
+class FoldCache:
+    """X, y and each row's CV fold, saved once as .npy files that workers memory-map.
+
+    `order` is a fixed shuffle of the rows; a fit on r rows uses the first r
+    rows of that order outside the test fold, so a smaller budget is always
+    a subset of a larger one.
+    """
+
+    def __init__(self, X, y, n_folds=DEFAULT_FOLDS, stratified=False, directory=None, seed=RANDOM_STATE):
+        from sklearn.model_selection import KFold, StratifiedKFold
+
+        self._tmp = None
+        if directory is None:
+            self._tmp = tempfile.TemporaryDirectory(prefix="tuning_")
+            directory = self._tmp.name
+        os.makedirs(directory, exist_ok=True)
+        self.n_folds = n_folds
+
+        splitter = (StratifiedKFold if stratified else KFold)(n_folds, shuffle=True, random_state=seed)
+        fold = np.empty(len(X), dtype=np.int64)
+        for k, (_, test) in enumerate(splitter.split(X, y)):
+            fold[test] = k
+        arrays = {"X": np.ascontiguousarray(X, dtype=np.float64), "y": np.asarray(y), "fold": fold,
+                  "order": np.random.default_rng(seed).permutation(len(X))}
+        self.paths = {}
+        for name, array in arrays.items():
+            self.paths[name] = os.path.join(directory, f"{name}.npy")
+            np.save(self.paths[name], array)
+        self.n_rows = len(X)
+
+    def max_resources(self):
+        """Training rows in the smallest fold's training set."""
+        fold = np.load(self.paths["fold"])
+        return int(self.n_rows - np.bincount(fold).max())
+
+    def close(self):
+        if self._tmp is not None:
+            self._tmp.cleanup()
+            self._tmp = None
+
+
+def _fold_rows(paths, k, n_rows):
+    """(train rows, test rows) of fold k, training on the first n_rows of the fixed order."""
+    fold = np.load(paths["fold"], mmap_mode="r")
+    order = np.load(paths["order"], mmap_mode="r")
+    train = order[fold[order] != k][:n_rows]
+    return np.sort(train), np.flatnonzero(fold == k)
+
+
+# ==============================
+# ONE FIT
+# ==============================
+def _estimator(task, params):
+    from sklearn import ensemble
+
+    cls = getattr(ensemble, TASKS[task]["estimator"])
+    return cls(random_state=RANDOM_STATE, n_jobs=1, **params)
+
+
+def single_row_latency(model, row, calls=LATENCY_CALLS):
+    """(p50, p99) in milliseconds of `model.predict` on one row."""
+    times = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter_ns()
+        model.predict(row)
+        times[i] = time.perf_counter_ns() - start
+    p50, p99 = np.percentile(times, [50, 99]) / 1e6
+    return float(p50), float(p99)
+
+
+def evaluate(task, params, paths, k, n_rows):
+    """Fit `params` on n_rows training rows of fold k; score it and time the compiled forest."""
+    from sklearn.metrics import accuracy_score, r2_score
+
+    from forest_compiler import compile_forest
+
+    X = np.load(paths["X"], mmap_mode="r")
+    y = np.load(paths["y"], mmap_mode="r")
+    train, test = _fold_rows(paths, k, n_rows)
+
+    model = _estimator(task, params)
+    start = time.perf_counter()
+    model.fit(X[train], y[train])
+    fit_seconds = time.perf_counter() - start
+
+    metric = accuracy_score if TASKS[task]["metric"] == "accuracy" else r2_score
+    score = metric(y[test], model.predict(X[test]))
+
+    compiled = compile_forest(model)
+    p50, p99 = single_row_latency(compiled, np.array(X[test[:1]]))
+    return {"score": float(score), "fit_seconds": fit_seconds, "latency_p50_ms": p50, "latency_p99_ms": p99,
+            "n_nodes": int(compiled.n_nodes)}
+
+
+# ==============================
+# SEARCH
+# ==============================
+def sample_candidates(n, seed=RANDOM_STATE, space=SEARCH_SPACE):
+    from sklearn.model_selection import ParameterSampler
+
+    return list(ParameterSampler(space, n, random_state=seed))
+
+
+def successive_halving(task, candidates, folds, min_resources=DEFAULT_MIN_RESOURCES, factor=DEFAULT_FACTOR,
+                       n_jobs=-1, bracket=0, first_id=0):
+    """Run one successive-halving bracket. Returns one result row per (candidate, round)."""
+    max_resources = folds.max_resources()
+    alive = list(enumerate(candidates, start=first_id))
+    n_rows = min(min_resources, max_resources)
+    results, round_ = [], 0
+    while alive:
+        tasks = [(cid, params, k) for cid, params in alive for k in range(folds.n_folds)]
+        scored = jb.Parallel(n_jobs=n_jobs)(jb.delayed(evaluate)(task, params, folds.paths, k, n_rows)
+                                            for _, params, k in tasks)
+
+        by_candidate = {}
+        for (cid, _, _), fit in zip(tasks, scored):
+            by_candidate.setdefault(cid, []).append(fit)
+        for cid, params in alive:
+            fits = pd.DataFrame(by_candidate[cid])
+            results.append({"candidate": cid, "bracket": bracket, "round": round_, "n_rows": n_rows,
+                            **{name: params.get(name) for name in SEARCH_SPACE},
+                            "score": fits["score"].mean(), "score_std": fits["score"].std(ddof=0),
+                            "fit_seconds": fits["fit_seconds"].mean(),
+                            "latency_p50_ms": fits["latency_p50_ms"].median(),
+                            "latency_p99_ms": fits["latency_p99_ms"].median(),
+                            "n_nodes": int(fits["n_nodes"].mean())})
+
+        if n_rows >= max_resources:
+            break
+        # Keep the best 1/factor on `factor` times the rows (a lone survivor goes straight to all rows)
+        this_round = {r["candidate"]: r["score"] for r in results[-len(alive):]}
+        alive = sorted(alive, key=lambda c: this_round[c[0]], reverse=True)[:max(1, len(alive) // factor)]
+        n_rows = max_resources if len(alive) == 1 else min(n_rows * factor, max_resources)
+        round_ += 1
+    return results
+
+
+def hyperband(task, folds, factor=DEFAULT_FACTOR, min_resources=DEFAULT_MIN_RESOURCES, n_jobs=-1, seed=RANDOM_STATE):
+    """Hyperband: successive-halving brackets from many candidates on few rows to few on many."""
+    max_resources = folds.max_resources()
+    s_max = max(0, int(math.log(max_resources / min_resources, factor)))
+    results, first_id = [], 0
+    for s in range(s_max, -1, -1):
+        n = int(math.ceil((s_max + 1) / (s + 1) * factor ** s))
+        candidates = sample_candidates(n, seed + s)
+        start_rows = int(max_resources / factor ** s)
+        results += successive_halving(task, candidates, folds, start_rows, factor, n_jobs, bracket=s_max - s,
+                                      first_id=first_id)
+        first_id += n
+    return results
+
+
+def pareto_front(results):
+    """Candidates scored on all rows that no other one beats on both score and p50 latency."""
+    final = results[results["n_rows"] == results["n_rows"].max()].sort_values("latency_p50_ms")
+    return final[final["score"] >= final["score"].cummax()]
+
+
+def tune(task, dataset, n_candidates=DEFAULT_CANDIDATES, factor=DEFAULT_FACTOR, n_folds=DEFAULT_FOLDS,
+         min_resources=DEFAULT_MIN_RESOURCES, n_jobs=-1, use_hyperband=False, fold_dir=None):
+    """Search the forest hyperparameters of `task` ('student' or 'cancer') on a raw dataset file.
+
+    Returns a DataFrame with one row per (candidate, round), best first.
+    """
+    X, y, _ = cached_matrix(task, dataset)
+    folds = FoldCache(X, y, n_folds, TASKS[task]["stratified"], fold_dir)
+    try:
+        if use_hyperband:
+            results = hyperband(task, folds, factor, min_resources, n_jobs)
+        else:
+            results = successive_halving(task, sample_candidates(n_candidates), folds, min_resources, factor, n_jobs)
+    finally:
+        folds.close()
+    results = pd.DataFrame(results)
+    # Nullable ints: keeps None (unlimited depth) without turning the depths into floats
+    results["max_depth"] = results["max_depth"].astype("Int64")
+    return results.sort_values(["n_rows", "score"], ascending=False, ignore_index=True)
+
+
+def best_params(results):
+    """Hyperparameters of the best candidate scored on all rows, as plain JSON-able values."""
+    best = results.iloc[0]
+    max_features = best["max_features"]
+    return {"n_estimators": int(best["n_estimators"]),
+            "max_depth": None if pd.isna(best["max_depth"]) else int(best["max_depth"]),
+            "max_features": max_features if isinstance(max_features, str) else float(max_features)}
+
+
+# ==============================
+# CLI
+# ==============================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tune the student or cancer forest with successive halving.")
+    parser.add_argument("task", choices=sorted(TASKS))
+    parser.add_argument("dataset", help="raw dataset CSV (as for training_pipeline.py)")
+    parser.add_argument("--candidates", type=int, default=DEFAULT_CANDIDATES)
+    parser.add_argument("--factor", type=int, default=DEFAULT_FACTOR)
+    parser.add_argument("--folds", type=int, default=DEFAULT_FOLDS)
+    parser.add_argument("--min-resources", type=int, default=DEFAULT_MIN_RESOURCES, help="first-round rows")
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    parser.add_argument("--hyperband", action="store_true")
+    parser.add_argument("--fold-dir", default=None, help="where to write the memory-mapped folds (default: temp)")
+    parser.add_argument("--output", help="write every (candidate, round) result as CSV")
+    parser.add_argument("--best-params", help="merge the best candidate into this JSON params file")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = tune(args.task, args.dataset, args.candidates, args.factor, args.folds, args.min_resources,
+                   args.n_jobs, args.hyperband, args.fold_dir)
+    seconds = time.perf_counter() - start
+
+    columns = ["candidate", "n_rows", *SEARCH_SPACE, "score", "score_std", "latency_p50_ms", "n_nodes"]
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(results[columns].head(10).to_string(index=False))
+        print("\nScore vs latency (candidates scored on all rows):")
+        print(pareto_front(results)[columns].to_string(index=False))
+    best = best_params(results)
+    print(f"\n{len(results)} evaluations in {seconds:.1f}s. Best {TASKS[args.task]['metric']}: "
+          f"{results['score'].iloc[0]:.4f} with {best}")
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+    if args.best_params:
+        params = {}
+        if os.path.exists(args.best_params):
+            with open(args.best_params) as f:
+                params = json.load(f)
+        params[args.task] = best
+        with open(args.best_params, "w") as f:
+            json.dump(params, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""What-if sweeps: how the student outcome probabilities respond to one feature.
+
+All grids of all swept features are written into one array built from the
+current (encoded) inputs and scored with a single predict_proba call, instead
+of one script re-run per value.
+"""
+import numpy as np
+import pandas as pd
+
+from feature_encoder import STUDENT_ENCODER, prepare_std_input
+from feature_schema import (ST_defaults, ST_CATEGORY_MAPS, YES_NO_MAP, labels,
+                            STUDENT_SWEEP_RANGES, STUDENT_YES_NO_FEATURES)
+from forest_compiler import compiled_model
+
+
+def sweep_values(feature):
+    """(codes, display labels) swept for one student feature."""
+    if feature in STUDENT_SWEEP_RANGES:
+        low, high, step = STUDENT_SWEEP_RANGES[feature]
+        codes = np.arange(low, high + step / 2, step)
+        return codes, codes
+    table = ST_CATEGORY_MAPS.get(feature, YES_NO_MAP if feature in STUDENT_YES_NO_FEATURES else None)
+    if table is None:
+        raise KeyError(f"No sweep range for '{feature}'")
+    options = sorted(table, key=table.get)
+    return np.array([table[o] for o in options], dtype=np.float64), options
+
+
+def build_grid(base, features):
+    """Stack one copy of `base` per swept value, features one after another.
+
+    Returns (grid, [(feature, codes, display labels, row slice), ...]).
+    """
+    blocks, offset = [], 0
+    for feature in features:
+        codes, display = sweep_values(feature)
+        blocks.append((feature, codes, display, slice(offset, offset + len(codes))))
+        offset += len(codes)
+
+    grid = np.repeat(np.asarray(base, dtype=np.float64).reshape(1, -1), offset, axis=0)
+    for feature, codes, _, rows in blocks:
+        grid[rows, STUDENT_ENCODER.index[feature]] = codes
+    return grid, blocks
+
+
+def student_sweep(user_inputs, features, defaults=ST_defaults, model_name="student_model"):
+    """Outcome probabilities along each swept feature, holding the other inputs fixed.
+
+    Returns {feature: DataFrame indexed by the swept value, one column per outcome}.
+    """
+    base = prepare_std_input(user_inputs, defaults).to_numpy()[0]
+    grid, blocks = build_grid(base, features)
+
+    # One model call for every grid point of every feature
+    model = compiled_model(model_name)
+    proba = model.predict_proba(grid)
+    columns = [labels[int(c)] for c in model.classes_]
+
+    return {feature: pd.DataFrame(proba[rows], index=pd.Index(display, name=feature), columns=columns)
+            for feature, _, display, rows in blocks}